@@ -3,8 +3,9 @@ The main instructor module responsible for processing user requests and determin
 whether to direct users to the marketplace or the data recording application.
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Union, Any, BinaryIO, Set, Tuple, Callable
 
 import sys
 import os
@@ -12,11 +13,16 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from Instructor.task_classifier import TaskClassifier
+from Instructor.result_cache import ResultCache
 from multimodal.image_processor import ImageProcessor
 from multimodal.text_processor import TextProcessor
 from multimodal.video_processor import VideoProcessor
+from multimodal.multimodal_processor import MultimodalProcessor
 from database.neo4j_client import Neo4jClient
-from api.groq_client import GroqClient
+from api.groq_client import GroqClient, GroqAPIError
+from api.embedding_provider import create_embedding_provider
+from helpers import get_file_size
+from metrics import STAGE_LATENCY, PAYLOAD_BYTES
 
 logger = logging.getLogger(__name__)
 
@@ -26,56 +32,187 @@ class Instructor:
     and determines whether to direct users to the marketplace or data recording application.
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any],
+                 neo4j_client: Optional[Neo4jClient] = None,
+                 groq_client: Optional[GroqClient] = None):
         """
         Initialize the Instructor with necessary components.
         
+        The Instructor is meant to live for the whole application lifetime;
+        clients that are passed in are shared, clients that are not are
+        created here and owned by the Instructor.
+        
         Args:
             config: Configuration dictionary containing necessary settings
+            neo4j_client: Optional shared Neo4j client
+            groq_client: Optional shared Groq client
         """
         self.config = config
         self.task_classifier = TaskClassifier()
-        self.multimodal_processor = MultimodalProcessor()
 
-        self.neo4j_client = Neo4jClient(
-            uri=config["neo4j"]["uri"],
-            username=config["neo4j"]["username"],
-            password=config["neo4j"]["password"]
+        self._owns_neo4j_client = neo4j_client is None
+        self._owns_groq_client = groq_client is None
+
+        if neo4j_client is None:
+            neo4j_client = Neo4jClient.from_config(config["neo4j"])
+        self.neo4j_client = neo4j_client
+
+        if groq_client is None:
+            groq_client = GroqClient.from_config(config["groq"])
+        self.groq_client = groq_client
+        self.latency_budget = config.get("groq", {}).get("latency_budget_seconds", 5.0)
+        self.embedding_provider = create_embedding_provider(
+            config.get("embeddings", {}), groq_client=self.groq_client
+        )
+
+        self.multimodal_processor = MultimodalProcessor.from_config(
+            config.get("multimodal", {}), groq_client=self.groq_client
         )
-        self.groq_client = GroqClient(api_key=config["groq"]["api_key"])
+
+        self.result_cache = None
+        cache_config = config.get("app", {}).get("result_cache", {})
+        if cache_config.get("enabled", True):
+            self.result_cache = ResultCache(
+                ttl_seconds=cache_config.get("ttl_seconds", 300.0),
+                max_entries=cache_config.get("max_entries", 256)
+            )
+            self.neo4j_client.add_task_listener(self.result_cache.on_task_changed)
+        
+    async def close(self):
+        """Release the clients owned by this Instructor."""
+        await self.embedding_provider.close()
+        if self._owns_groq_client:
+            await self.groq_client.close()
+        if self._owns_neo4j_client:
+            await self.neo4j_client.close()
         
     async def process_request(self, 
                         text: Optional[str] = None, 
-                        images: Optional[List[bytes]] = None,
-                        video: Optional[bytes] = None) -> Dict[str, Any]:
+                        images: Optional[List[Union[bytes, BinaryIO]]] = None,
+                        video: Optional[Union[bytes, BinaryIO]] = None,
+                        progress: Optional[Callable[[str, float], None]] = None,
+                        on_token: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
         """
         Process a user request containing multimodal data.
         
         Args:
             text: Optional text input from the user
-            images: Optional list of image data
-            video: Optional video data
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+            progress: Optional callback receiving (stage, fraction complete)
+            on_token: Optional callback receiving (modality, token) as LLM
+                summaries are generated
             
         Returns:
             A dictionary containing the response to the user, including
             whether to redirect to marketplace or data recording app
         """
+        self._observe_payload(text, images, video)
+        
+        with STAGE_LATENCY.time(stage="request"):
+            # Callers watching progress or tokens need their own pipeline run;
+            # a shared run or a cached response would report to nobody
+            if self.result_cache is None or progress is not None or on_token is not None:
+                response, _, _ = await self._run_pipeline(text, images, video, progress, on_token)
+                return response
+
+            # Identical concurrent requests share one pipeline run
+            key = await self.result_cache.make_key(text, images, video)
+            return await self.result_cache.get_or_compute(
+                key, lambda: self._run_pipeline(text, images, video, progress, on_token)
+            )
+        
+    @staticmethod
+    def _observe_payload(text: Optional[str],
+                         images: Optional[List[Union[bytes, BinaryIO]]],
+                         video: Optional[Union[bytes, BinaryIO]]):
+        """
+        Record the input sizes of a request.
+        
+        Args:
+            text: Optional text input
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+        """
+        def size(data: Union[bytes, BinaryIO]) -> int:
+            return len(data) if isinstance(data, (bytes, bytearray)) else get_file_size(data)
+            
+        if text:
+            PAYLOAD_BYTES.observe(len(text.encode("utf-8")), kind="text")
+        for image in images or []:
+            PAYLOAD_BYTES.observe(size(image), kind="image")
+        if video is not None:
+            PAYLOAD_BYTES.observe(size(video), kind="video")
+        
+    async def _run_pipeline(self,
+                            text: Optional[str] = None,
+                            images: Optional[List[Union[bytes, BinaryIO]]] = None,
+                            video: Optional[Union[bytes, BinaryIO]] = None,
+                            progress: Optional[Callable[[str, float], None]] = None,
+                            on_token: Optional[Callable[[str, str], None]] = None
+                            ) -> Tuple[Dict[str, Any], Set[str], Optional[List[float]]]:
+        """
+        Run the full processing pipeline for a request.
+        
+        Args:
+            text: Optional text input from the user
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+            progress: Optional callback receiving (stage, fraction complete)
+            on_token: Optional callback receiving (modality, token) as LLM
+                summaries are generated
+            
+        Returns:
+            Tuple of (response, IDs of the similar tasks found, request embedding)
+        """
+        if progress is None:
+            progress = lambda stage, fraction: None
+        
         # Process multimodal inputs
-        processed_data = await self.multimodal_processor.process(text, images, video)
+        progress("processing_inputs", 0.05)
+        with STAGE_LATENCY.time(stage="multimodal"):
+            processed_data = await self.multimodal_processor.process(
+                text, images, video, on_token=on_token,
+                progress=lambda stage, fraction: progress(stage, 0.05 + 0.6 * fraction)
+            )
         
-        # Get embedding from Groq API
-        embedding = await self.groq_client.get_embedding(processed_data["combined_representation"])
+        # Get embedding from the configured provider
+        progress("embedding", 0.7)
+        degraded = False
+        try:
+            with STAGE_LATENCY.time(stage="embedding"):
+                embedding = await asyncio.wait_for(
+                    self.embedding_provider.embed(processed_data["combined_representation"]),
+                    self.latency_budget
+                )
+        except (GroqAPIError, asyncio.TimeoutError) as e:
+            # Groq is down, throttled or too slow: match on keywords instead
+            logger.warning(f"Embedding unavailable, using degraded keyword routing: {str(e) or type(e).__name__}")
+            embedding = None
+            degraded = True
         
         # Check if similar task exists in marketplace
-        similar_tasks = await self.neo4j_client.find_similar_tasks(embedding)
+        progress("matching", 0.85)
+        if degraded:
+            with STAGE_LATENCY.time(stage="keyword_search"):
+                similar_tasks = await self.neo4j_client.find_tasks_by_keywords(
+                    processed_data["combined_representation"]
+                )
+        else:
+            with STAGE_LATENCY.time(stage="similarity_search"):
+                similar_tasks = await self.neo4j_client.find_similar_tasks(embedding)
         
         # Classify the task
-        task_type = self.task_classifier.classify(processed_data, similar_tasks)
+        progress("classifying", 0.95)
+        with STAGE_LATENCY.time(stage="classification"):
+            task_type = self.task_classifier.classify(processed_data, similar_tasks)
+        
+        matched_ids = {task["id"] for task in similar_tasks}
         
         # Determine where to direct the user
         if similar_tasks and task_type["marketplace_confidence"] > 0.8:
             # High confidence match in marketplace
-            return {
+            response = {
                 "redirect_to": "marketplace",
                 "task_id": similar_tasks[0]["id"],
                 "confidence": task_type["marketplace_confidence"],
@@ -83,11 +220,13 @@ class Instructor:
             }
         else:
             # No good match, direct to data recording
-            return {
+            response = {
                 "redirect_to": "record_new_data",
                 "processed_data": processed_data,
                 "message": "Let's create a new task with your data to help you better."
             }
+        response["degraded"] = degraded
+        return response, matched_ids, embedding
     
     async def save_new_task(self, task_data: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -100,7 +239,7 @@ class Instructor:
             Information about the saved task
         """
         # Generate embedding for the task
-        embedding = await self.groq_client.get_embedding(task_data["description"])
+        embedding = await self.embedding_provider.embed(task_data["description"])
         
         # Save to Neo4j
         task_id = await self.neo4j_client.create_task(
@@ -114,4 +253,49 @@ class Instructor:
             "task_id": task_id,
             "status": "created",
             "message": "Your task has been created successfully."
-        }
\ No newline at end of file
+        }
+        
+    async def save_new_tasks(self, tasks: List[Dict[str, Any]], batch_size: int = 100) -> Dict[str, Any]:
+        """
+        Save many tasks, e.g. when seeding or refreshing the marketplace.
+        
+        Descriptions are embedded in batches and each batch is written with a
+        single UNWIND transaction. A failing batch is reported without
+        stopping the others.
+        
+        Args:
+            tasks: Data about the new tasks
+            batch_size: Number of tasks embedded and written per batch
+            
+        Returns:
+            Summary with the created task IDs and a report per batch
+        """
+        created_ids: List[str] = []
+        batches: List[Dict[str, Any]] = []
+        
+        for start in range(0, len(tasks), batch_size):
+            chunk = tasks[start:start + batch_size]
+            report = {"batch": start // batch_size, "size": len(chunk), "created": 0, "error": None}
+            
+            try:
+                embeddings = await self.embedding_provider.embed_batch([task["description"] for task in chunk])
+                rows = [dict(task, embedding=embedding) for task, embedding in zip(chunk, embeddings)]
+                result = await self.neo4j_client.create_tasks(rows, batch_size=len(rows))
+                
+                created_ids.extend(result["task_ids"])
+                report["created"] = result["created"]
+                report["error"] = result["batches"][0]["error"] if result["batches"] else None
+            except Exception as e:
+                logger.error(f"Error saving task batch {report['batch']}: {str(e)}")
+                report["error"] = str(e)
+                
+            logger.info(f"Task batch {report['batch']}: {report['created']}/{report['size']} created")
+            batches.append(report)
+            
+        return {
+            "created": len(created_ids),
+            "failed": len(tasks) - len(created_ids),
+            "task_ids": created_ids,
+            "batches": batches,
+            "status": "completed" if len(created_ids) == len(tasks) else "partial"
+        }
@@ -0,0 +1,256 @@
+"""
+Result cache for processed user requests.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple, Union, BinaryIO
+from collections import OrderedDict
+import asyncio
+import hashlib
+import logging
+import time
+
+import numpy as np
+
+from helpers import as_binary_file
+
+logger = logging.getLogger(__name__)
+
+class _LeaderCancelled(Exception):
+    """Set on a shared computation whose caller was cancelled, so waiters retry."""
+
+class ResultCache:
+    """
+    TTL cache of final routing responses keyed on a hash of the normalised inputs.
+
+    Concurrent identical requests are de-duplicated (single flight): the first
+    caller computes the response and the others await the same result. If
+    that caller is cancelled, one of the waiters computes the response instead.
+
+    Each entry remembers the IDs of the tasks it matched and the request
+    embedding, so task writes only invalidate the entries they can affect:
+    updates and deletes drop entries that matched the task, and new or
+    re-embedded tasks drop entries whose request is similar enough to match them.
+    A response whose computation overlapped a task write is not stored,
+    since it may have read the tasks before the write.
+    """
+
+    def __init__(self, ttl_seconds: float = 300.0, max_entries: int = 256,
+                 match_threshold: float = 0.7):
+        """
+        Initialize the result cache.
+
+        Args:
+            ttl_seconds: Lifetime of a cached response
+            max_entries: Maximum number of cached responses
+            match_threshold: Similarity at which a new task counts as a match
+                for a cached request
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.match_threshold = match_threshold
+
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        # Bumped on every task write, so computations can tell they raced one
+        self._write_generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+        self.invalidations = 0
+
+    async def make_key(self, text: Optional[str] = None,
+                       images: Optional[List[Union[bytes, BinaryIO]]] = None,
+                       video: Optional[Union[bytes, BinaryIO]] = None) -> str:
+        """
+        Hash the normalised request inputs.
+
+        Text is whitespace-normalised; images and video are hashed by content.
+
+        Args:
+            text: Optional text input
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+
+        Returns:
+            Hex digest identifying the request
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._hash_inputs, text, images, video)
+
+    def _hash_inputs(self, text: Optional[str], images: Optional[List[Union[bytes, BinaryIO]]],
+                     video: Optional[Union[bytes, BinaryIO]]) -> str:
+        """
+        Hash request inputs, reading uploads in chunks.
+
+        Args:
+            text: Optional text input
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.sha256()
+        digest.update(b"text:" + " ".join((text or "").split()).encode("utf-8"))
+
+        for image in images or []:
+            digest.update(b"|image:" + self._hash_stream(image).encode("ascii"))
+        if video is not None:
+            digest.update(b"|video:" + self._hash_stream(video).encode("ascii"))
+
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_stream(data: Union[bytes, BinaryIO], chunk_size: int = 1024 * 1024) -> str:
+        """
+        Calculate the SHA-256 of bytes or a file handle.
+
+        Args:
+            data: Raw bytes or a binary file handle
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            Hex digest of the content
+        """
+        stream = as_binary_file(data)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            digest.update(chunk)
+        stream.seek(0)
+        return digest.hexdigest()
+
+    async def get_or_compute(self, key: str,
+                             compute: Callable[[], Awaitable[Tuple[Dict[str, Any], Set[str], Optional[List[float]]]]]
+                             ) -> Dict[str, Any]:
+        """
+        Return the cached response for a key, computing it once if needed.
+
+        Args:
+            key: Request key from make_key
+            compute: Coroutine function returning (response, matched task IDs,
+                request embedding)
+
+        Returns:
+            Response dictionary
+        """
+        while True:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry["expires_at"] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(entry["response"])
+                del self._entries[key]
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            self.shared += 1
+            try:
+                return dict(await asyncio.shield(in_flight))
+            except _LeaderCancelled:
+                # The caller computing the response went away; the first
+                # waiter to get here takes over and the others join it
+                continue
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        generation = self._write_generation
+
+        try:
+            response, task_ids, embedding = await compute()
+        except asyncio.CancelledError:
+            # Cancelling the future would cancel every waiter with it
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else waits on it
+            future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+        # Degraded responses are only good while the outage lasts
+        if not response.get("degraded") and generation == self._write_generation:
+            self._store(key, response, task_ids, embedding)
+        future.set_result(response)
+        return dict(response)
+
+    def _store(self, key: str, response: Dict[str, Any], task_ids: Set[str],
+               embedding: Optional[List[float]]):
+        """
+        Insert a response, evicting the least recently used entries.
+
+        Args:
+            key: Request key
+            response: Response dictionary
+            task_ids: IDs of the tasks the request matched
+            embedding: Request embedding, if one was computed
+        """
+        vector = None
+        if embedding:
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            vector = vector / norm if norm > 0 else None
+
+        self._entries[key] = {
+            "response": response,
+            "task_ids": set(task_ids),
+            "embedding": vector,
+            "expires_at": time.monotonic() + self.ttl_seconds
+        }
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def on_task_changed(self, event: str, task_id: str, embedding: Optional[List[float]] = None):
+        """
+        Invalidate entries affected by a task write.
+
+        Args:
+            event: "created", "updated" or "deleted"
+            task_id: ID of the task that changed
+            embedding: New embedding of the task, if it was set
+        """
+        self._write_generation += 1
+        stale = [key for key, entry in self._entries.items() if task_id in entry["task_ids"]]
+
+        if embedding and event in ("created", "updated"):
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = float(np.linalg.norm(vector))
+            for key, entry in self._entries.items():
+                if entry["embedding"] is None:
+                    continue
+                if norm == 0 or float(entry["embedding"] @ vector) / norm >= self.match_threshold:
+                    stale.append(key)
+
+        for key in set(stale):
+            self._entries.pop(key, None)
+        if stale:
+            self.invalidations += len(set(stale))
+            logger.debug(f"Invalidated {len(set(stale))} cached responses after task {task_id} was {event}")
+
+    def clear(self):
+        """Drop all cached responses."""
+        self._write_generation += 1
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit/miss/shared/invalidation counters and size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries)
+        }
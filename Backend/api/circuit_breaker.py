@@ -0,0 +1,170 @@
+"""
+Circuit breaker for calls to external APIs.
+"""
+
+from typing import Any, Dict
+from collections import deque
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Stops calls to an API that is failing or too slow.
+
+    Outcomes of the last `window_size` calls are kept. Once at least
+    `minimum_calls` are recorded, the circuit opens when the failure rate
+    or the rate of calls slower than `slow_call_seconds` reaches its
+    threshold. While open, calls are rejected immediately. After
+    `open_seconds` the circuit is half-open and lets `half_open_calls`
+    trial calls through: if they all succeed quickly the circuit closes,
+    otherwise it opens again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate_threshold: float = 0.5, slow_call_seconds: float = 3.0,
+                 slow_call_rate_threshold: float = 0.8, window_size: int = 20,
+                 minimum_calls: int = 10, open_seconds: float = 30.0, half_open_calls: int = 3):
+        """
+        Initialize a closed circuit breaker.
+
+        Args:
+            failure_rate_threshold: Failure rate (0-1) that opens the circuit
+            slow_call_seconds: Duration above which a call counts as slow
+            slow_call_rate_threshold: Slow call rate (0-1) that opens the circuit
+            window_size: Number of recent calls considered
+            minimum_calls: Calls needed before the rates are evaluated
+            open_seconds: Time the circuit stays open before trial calls
+            half_open_calls: Successful trial calls needed to close the circuit
+        """
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = self.CLOSED
+        self._calls = deque(maxlen=window_size)
+        self._state_since = time.monotonic()
+        self._trial_calls = 0
+        self._trial_successes = 0
+        self.times_opened = 0
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go ahead.
+
+        Returns:
+            False while the circuit is open or the half-open trials are taken
+        """
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+
+        if self.state == self.OPEN:
+            if now - self._state_since < self.open_seconds:
+                return False
+            self._transition(self.HALF_OPEN)
+
+        # Trial calls that never reported back must not block the circuit forever
+        if now - self._state_since > self.open_seconds:
+            self._trial_calls = 0
+            self._trial_successes = 0
+            self._state_since = now
+
+        if self._trial_calls >= self.half_open_calls:
+            return False
+        self._trial_calls += 1
+        return True
+
+    def record_success(self, duration: float):
+        """
+        Record a completed call.
+
+        Args:
+            duration: Call duration in seconds
+        """
+        slow = duration >= self.slow_call_seconds
+        if self.state == self.HALF_OPEN:
+            if slow:
+                self._transition(self.OPEN)
+                return
+            self._trial_successes += 1
+            if self._trial_successes >= self.half_open_calls:
+                self._transition(self.CLOSED)
+            return
+
+        self._calls.append((False, slow))
+        self._evaluate()
+
+    def record_failure(self):
+        """Record a failed call."""
+        if self.state == self.HALF_OPEN:
+            self._transition(self.OPEN)
+            return
+
+        self._calls.append((True, False))
+        self._evaluate()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the breaker state and the rates over the current window.
+
+        Returns:
+            Dictionary with state, rates, window size and open count
+        """
+        failure_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "calls_in_window": len(self._calls),
+            "times_opened": self.times_opened
+        }
+
+    def _rates(self):
+        """
+        Compute the failure and slow call rates over the window.
+
+        Returns:
+            Tuple of (failure rate, slow call rate)
+        """
+        if not self._calls:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._calls if failed)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+        return failures / len(self._calls), slow / len(self._calls)
+
+    def _evaluate(self):
+        """Open the circuit if the closed-state window crosses a threshold."""
+        if self.state != self.CLOSED or len(self._calls) < self.minimum_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold:
+            logger.warning(f"Opening circuit: failure rate {failure_rate:.2f}, "
+                           f"slow call rate {slow_rate:.2f}")
+            self._transition(self.OPEN)
+
+    def _transition(self, state: str):
+        """
+        Move to a new state and reset the per-state counters.
+
+        Args:
+            state: New state
+        """
+        if state == self.state:
+            return
+        logger.info(f"Circuit {self.state} -> {state}")
+        if state == self.OPEN:
+            self.times_opened += 1
+        self.state = state
+        self._state_since = time.monotonic()
+        self._trial_calls = 0
+        self._trial_successes = 0
+        if state == self.CLOSED:
+            self._calls.clear()
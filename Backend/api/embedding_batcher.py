@@ -0,0 +1,111 @@
+"""
+Micro-batcher that coalesces concurrent embedding requests.
+"""
+
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingBatcher:
+    """
+    Collects embedding requests that arrive within a short window and sends
+    them upstream as a single batch call, then fans the results back out.
+
+    A batch is flushed when it reaches `max_batch_size` items or when
+    `max_wait_ms` has passed since its first item, whichever comes first.
+    Identical texts within a batch are only sent once.
+    """
+
+    def __init__(self, fetch: Callable[[List[str]], Awaitable[List[List[float]]]],
+                 max_batch_size: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize the batcher.
+
+        Args:
+            fetch: Coroutine function embedding a list of texts in one upstream call
+            max_batch_size: Maximum number of texts per upstream call
+            max_wait_ms: Maximum time to wait for more requests before flushing
+        """
+        self.fetch = fetch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._in_flight: Set[asyncio.Task] = set()
+
+        self.batches_sent = 0
+        self.items_submitted = 0
+
+    async def submit(self, text: str) -> List[float]:
+        """
+        Queue a text for embedding and wait for its result.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Vector embedding as list of floats
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        self.items_submitted += 1
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Send the pending requests as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]):
+        """
+        Embed a batch and resolve the waiting futures.
+
+        Args:
+            batch: Pending (text, future) pairs
+        """
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches_sent += 1
+
+        try:
+            embeddings = await self.fetch(unique_texts)
+            results: Dict[str, List[float]] = dict(zip(unique_texts, embeddings))
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(unique_texts)} failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future in batch:
+            if future.done():
+                continue
+            embedding = results.get(text)
+            if embedding is None:
+                future.set_exception(Exception("Missing embedding in batch response"))
+            else:
+                future.set_result(embedding)
+
+    async def close(self):
+        """Flush pending requests and wait for in-flight batches to finish."""
+        self._flush()
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
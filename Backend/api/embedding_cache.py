@@ -0,0 +1,252 @@
+"""
+Content-addressed cache for text embeddings.
+"""
+
+from typing import Dict, List, Any, Optional
+from collections import OrderedDict
+from array import array
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from helpers import calculate_hash
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache keyed by model name and a SHA-256 of the input text.
+
+    The memory tier is an LRU bounded by the size of the stored vectors. The
+    optional disk tier is a SQLite file that survives restarts; it is bounded
+    by size as well and evicts the least recently used entries first.
+    Vectors are stored as float32 in both tiers.
+    """
+
+    def __init__(self, max_memory_mb: float = 64, disk_path: Optional[str] = None,
+                 max_disk_mb: float = 512):
+        """
+        Initialize the embedding cache.
+
+        Args:
+            max_memory_mb: Size budget of the in-memory LRU tier
+            disk_path: Path of the SQLite file, or None to disable the disk tier
+            max_disk_mb: Size budget of the disk tier
+        """
+        self.max_memory_bytes = int(max_memory_mb * 1024 * 1024)
+        self.max_disk_bytes = int(max_disk_mb * 1024 * 1024)
+        self.disk_path = disk_path
+
+        self._memory: "OrderedDict[str, array]" = OrderedDict()
+        self._memory_bytes = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._disk_bytes = 0
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+
+        if disk_path:
+            self._open_disk_tier(disk_path)
+
+    def _open_disk_tier(self, disk_path: str):
+        """
+        Open (and create if needed) the SQLite disk tier.
+
+        Args:
+            disk_path: Path of the SQLite file
+        """
+        self._db = sqlite3.connect(disk_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings(last_access)")
+        self._db.commit()
+        row = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        self._disk_bytes = row[0]
+
+    @staticmethod
+    def make_key(model: str, text: str) -> str:
+        """
+        Build the cache key for a model and input text.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+
+        Returns:
+            Cache key
+        """
+        return f"{model}:{calculate_hash(text.encode('utf-8'))}"
+
+    async def get(self, model: str, text: str) -> Optional[List[float]]:
+        """
+        Look up an embedding.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+
+        Returns:
+            Cached embedding, or None on a miss
+        """
+        key = self.make_key(model, text)
+
+        vector = self._memory.get(key)
+        if vector is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return vector.tolist()
+
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            vector = await loop.run_in_executor(None, self._disk_get, key)
+            if vector is not None:
+                self.disk_hits += 1
+                self._memory_put(key, vector)
+                return vector.tolist()
+
+        self.misses += 1
+        return None
+
+    async def set(self, model: str, text: str, embedding: List[float]):
+        """
+        Store an embedding in both tiers.
+
+        Args:
+            model: Embedding model name
+            text: Input text
+            embedding: Embedding to store
+        """
+        if not embedding:
+            return
+
+        key = self.make_key(model, text)
+        vector = array("f", embedding)
+        self._memory_put(key, vector)
+
+        if self._db is not None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._disk_put, key, vector)
+
+    def _memory_put(self, key: str, vector: array):
+        """
+        Insert into the memory tier, evicting least recently used entries.
+
+        Args:
+            key: Cache key
+            vector: Embedding as float32 array
+        """
+        size = vector.itemsize * len(vector)
+        if size > self.max_memory_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.itemsize * len(previous)
+
+        self._memory[key] = vector
+        self._memory_bytes += size
+
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.itemsize * len(evicted)
+            self.memory_evictions += 1
+
+    def _disk_get(self, key: str) -> Optional[array]:
+        """
+        Read an entry from the disk tier and refresh its access time.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Embedding as float32 array, or None if not stored
+        """
+        with self._db_lock:
+            row = self._db.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE embeddings SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+
+        vector = array("f")
+        vector.frombytes(row[0])
+        return vector
+
+    def _disk_put(self, key: str, vector: array):
+        """
+        Write an entry to the disk tier, evicting old entries over budget.
+
+        Args:
+            key: Cache key
+            vector: Embedding as float32 array
+        """
+        blob = vector.tobytes()
+        with self._db_lock:
+            row = self._db.execute("SELECT size FROM embeddings WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._disk_bytes -= row[0]
+            self._db.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time())
+            )
+            self._disk_bytes += len(blob)
+
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+            self._db.commit()
+
+    def _evict_disk(self):
+        """Drop least recently used disk entries until 90% of the budget is free."""
+        target = int(self.max_disk_bytes * 0.9)
+        rows = self._db.execute("SELECT key, size FROM embeddings ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self._disk_bytes -= size
+
+        self._db.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+        self.disk_evictions += len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get cache counters.
+
+        Returns:
+            Dictionary of hit/miss/eviction counters and tier sizes
+        """
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "memory_evictions": self.memory_evictions,
+            "disk_bytes": self._disk_bytes,
+            "disk_evictions": self.disk_evictions
+        }
+
+    def close(self):
+        """Close the disk tier."""
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
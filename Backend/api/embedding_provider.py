@@ -0,0 +1,218 @@
+"""
+Embedding providers: the remote Groq embedding model and a local NumPy embedder.
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingProvider:
+    """
+    Interface of the components that turn text into embedding vectors.
+
+    Every provider exposes a `name` and its `dimensions`; embeddings from
+    different providers are not comparable with each other.
+    """
+
+    name = "base"
+    dimensions = 0
+
+    async def embed(self, text: str) -> List[float]:
+        """
+        Embed a single text.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Vector embedding as list of floats
+        """
+        return (await self.embed_batch([text]))[0]
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed several texts.
+
+        Args:
+            texts: Texts to embed
+
+        Returns:
+            Vector embeddings in the same order as the input texts
+        """
+        raise NotImplementedError
+
+    async def close(self):
+        """Release resources held by the provider."""
+
+
+class GroqEmbeddingProvider(EmbeddingProvider):
+    """
+    Embeddings from the remote Groq embedding model, with the client's
+    cache, micro-batching and rate limiting.
+    """
+
+    name = "groq"
+
+    def __init__(self, groq_client):
+        """
+        Initialize the provider.
+
+        Args:
+            groq_client: Shared GroqClient; it is not closed by the provider
+        """
+        self.groq_client = groq_client
+        self.dimensions = groq_client.embedding_dimensions
+
+    async def embed(self, text: str) -> List[float]:
+        return await self.groq_client.get_embedding(text)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        return await self.groq_client.get_embeddings(texts)
+
+
+class HashedNgramEmbeddingProvider(EmbeddingProvider):
+    """
+    Local embeddings from hashed character n-grams, computed with NumPy.
+
+    The lowercased text is split into overlapping character n-grams, each
+    n-gram is hashed with a vectorised rolling hash and added with a
+    pseudo-random sign to one of `dimensions` buckets (the hashing trick).
+    Counts are damped with log1p and the vector is L2-normalised, so the
+    cosine similarity reflects shared word fragments.
+
+    No network, model files or training are needed and the output is
+    deterministic across processes. It captures surface overlap rather
+    than meaning, so it suits tests, benchmarks and air-gapped deployments
+    rather than replacing a semantic model. It is a deployment-wide choice,
+    not a first-pass filter in front of the groq provider: its scores are
+    not comparable with semantic embeddings, and Tasks only store the
+    embedding of the configured provider.
+    """
+
+    name = "hashed-ngram"
+
+    # Batches larger than this are embedded in a worker thread
+    EXECUTOR_BATCH_SIZE = 32
+
+    _PRIME = np.uint64(1099511628211)
+    _MIX = np.uint64(0xff51afd7ed558ccd)
+
+    def __init__(self, dimensions: int = 1536, ngram_min: int = 3, ngram_max: int = 5,
+                 seed: int = 0):
+        """
+        Initialize the provider.
+
+        Args:
+            dimensions: Embedding dimensionality
+            ngram_min: Shortest character n-gram
+            ngram_max: Longest character n-gram
+            seed: Hash seed; embeddings are only comparable for equal seeds
+        """
+        if ngram_min < 1 or ngram_max < ngram_min:
+            raise ValueError(f"Invalid n-gram range: {ngram_min}-{ngram_max}")
+
+        self.dimensions = dimensions
+        self.ngram_min = ngram_min
+        self.ngram_max = ngram_max
+        self.seed = np.uint64(seed)
+
+    async def embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) <= self.EXECUTOR_BATCH_SIZE:
+            return [self.embed_text(text) for text in texts]
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: [self.embed_text(text) for text in texts])
+
+    def embed_text(self, text: str) -> List[float]:
+        """
+        Embed a text synchronously.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length vector as list of floats; all zeros for empty text
+        """
+        return self.embed_array(text).tolist()
+
+    def embed_array(self, text: str) -> "np.ndarray":
+        """
+        Embed a text as a float32 array.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            Unit-length vector; all zeros for empty text
+        """
+        normalized = " " + " ".join((text or "").lower().split()) + " "
+        codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+
+        vector = np.zeros(self.dimensions, dtype=np.float64)
+        for n in range(self.ngram_min, self.ngram_max + 1):
+            count = codes.shape[0] - n + 1
+            if count <= 0:
+                break
+
+            # Rolling polynomial hash of every n-gram at once (wraps modulo 2**64)
+            hashes = np.full(count, self.seed ^ np.uint64(n), dtype=np.uint64)
+            for offset in range(n):
+                hashes = hashes * self._PRIME + codes[offset:offset + count]
+
+            # Finalise so buckets and signs use well-mixed bits
+            hashes ^= hashes >> np.uint64(33)
+            hashes *= self._MIX
+            hashes ^= hashes >> np.uint64(33)
+
+            buckets = (hashes % np.uint64(self.dimensions)).astype(np.intp)
+            signs = np.where(hashes >> np.uint64(63), -1.0, 1.0)
+            vector += np.bincount(buckets, weights=signs, minlength=self.dimensions)
+
+        vector = np.sign(vector) * np.log1p(np.abs(vector))
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.astype(np.float32)
+
+
+# Names accepted by the EMBEDDING_PROVIDER setting
+PROVIDERS = ("groq", "local")
+
+def create_embedding_provider(config: Dict[str, Any], groq_client=None) -> EmbeddingProvider:
+    """
+    Create the embedding provider selected in the "embeddings" config section.
+
+    Args:
+        config: Embedding configuration dictionary
+        groq_client: Shared GroqClient, required for the "groq" provider
+
+    Returns:
+        Configured embedding provider
+
+    Raises:
+        ValueError: If the provider is unknown or cannot produce the configured dimensions
+    """
+    provider = config.get("provider", "groq")
+    if provider == "groq":
+        if groq_client is None:
+            raise ValueError("The groq embedding provider needs a GroqClient")
+        groq_provider = GroqEmbeddingProvider(groq_client)
+        # The vector indexes are sized from the setting, so a mismatch would
+        # only show up as failing or meaningless similarity searches
+        dimensions = config.get("dimensions", groq_provider.dimensions)
+        if dimensions != groq_provider.dimensions:
+            raise ValueError(f"EMBEDDING_DIMENSIONS is {dimensions}, but the groq provider "
+                             f"produces {groq_provider.dimensions}-dimension embeddings")
+        return groq_provider
+    if provider == "local":
+        logger.info("Using local hashed n-gram embeddings")
+        return HashedNgramEmbeddingProvider(
+            dimensions=config.get("dimensions", 1536),
+            ngram_min=config.get("ngram_min", 3),
+            ngram_max=config.get("ngram_max", 5),
+            seed=config.get("seed", 0)
+        )
+    raise ValueError(f"Unknown embedding provider: {provider} (expected one of {', '.join(PROVIDERS)})")
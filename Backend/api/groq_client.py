@@ -2,74 +2,658 @@
 Groq API client for multimodal processing.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import AsyncIterator, Callable, Dict, List, Any, Optional
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 import aiohttp
 import json
 import base64
+import time
+
+from api.embedding_cache import EmbeddingCache
+from api.embedding_batcher import EmbeddingBatcher
+from api.circuit_breaker import CircuitBreaker
+from api.rate_limit import (
+    TokenBucket, AdaptiveConcurrencyLimiter, RetryPolicy, RateLimitStats, parse_retry_after
+)
+from helpers import gather_bounded
+from metrics import UPSTREAM_LATENCY, UPSTREAM_ERRORS
 
 logger = logging.getLogger(__name__)
 
+class GroqAPIError(Exception):
+    """Raised when a Groq API call fails."""
+    
+    def __init__(self, message: str, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        """
+        Initialize the error.
+        
+        Args:
+            message: Error message
+            status: HTTP status, or None for connection errors and timeouts
+            retry_after: Delay requested by the server in seconds, if any
+        """
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+class CircuitOpenError(GroqAPIError):
+    """Raised without calling the API while the circuit breaker is open."""
+
 class GroqClient:
     """
     Client for interacting with Groq's multimodal API.
     Handles processing of text, images, and video.
+    
+    A single pooled, keep-alive HTTP session is shared by all calls made
+    through one client, so the client should live as long as the application.
+    
+    Requests pass through an optional token bucket and an optional AIMD
+    concurrency limiter, are retried on throttling and transient errors with
+    Retry-After-aware jittered backoff, and can be hedged to cut tail latency.
+    An optional circuit breaker rejects calls immediately while the API is
+    failing or too slow, so callers can degrade instead of waiting.
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str,
+                 max_connections: int = 100,
+                 max_connections_per_host: int = 50,
+                 keepalive_timeout: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 request_timeout: float = 60.0,
+                 embedding_cache: Optional[EmbeddingCache] = None,
+                 embedding_batch_size: int = 64,
+                 embedding_batch_window_ms: float = 0.0,
+                 frame_concurrency: int = 4,
+                 frame_timeout: Optional[float] = 30.0,
+                 rate_limiter: Optional[TokenBucket] = None,
+                 concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 hedge_delay_ms: float = 0.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None,
+                 base_url: str = "https://api.groq.com/v1"):
         """
         Initialize Groq API client.
         
         Args:
             api_key: API key for Groq
+            max_connections: Total connection limit of the shared pool
+            max_connections_per_host: Per-host connection limit of the shared pool
+            keepalive_timeout: Seconds an idle connection is kept open for reuse
+            connect_timeout: Seconds allowed for establishing a connection
+            request_timeout: Total seconds allowed for a single API call
+            embedding_cache: Optional cache consulted before embedding calls
+            embedding_batch_size: Maximum number of texts per /embeddings call
+            embedding_batch_window_ms: Window for coalescing concurrent get_embedding
+                calls into one request; 0 disables micro-batching
+            frame_concurrency: Maximum number of video frames analysed at once
+            frame_timeout: Seconds allowed for analysing a single video frame
+            rate_limiter: Optional token bucket bounding the request rate
+            concurrency_limiter: Optional adaptive limit on requests in flight
+            retry_policy: Backoff policy, a default one is used if omitted
+            hedge_delay_ms: Send a second copy of a non-streaming request that has
+                not finished after this many milliseconds; 0 disables hedging
+            circuit_breaker: Optional breaker tripping on error rate or latency
+            base_url: API base URL, e.g. a local stand-in for benchmarks
         """
         self.api_key = api_key
-        self.base_url = "https://api.groq.com/v1"
+        self.base_url = base_url.rstrip("/")
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(total=request_timeout, connect=connect_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.embedding_model = "embedding-001"
+        self.embedding_dimensions = 1536  # Standard embedding size
+        self.embedding_cache = embedding_cache
+        self.embedding_batch_size = embedding_batch_size
+        self.frame_concurrency = frame_concurrency
+        self.frame_timeout = frame_timeout
+        self.rate_limiter = rate_limiter
+        self.concurrency_limiter = concurrency_limiter
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_delay = hedge_delay_ms / 1000.0 if hedge_delay_ms > 0 else None
+        self.stats = RateLimitStats()
+        self.circuit_breaker = circuit_breaker
+        self.embedding_batcher: Optional[EmbeddingBatcher] = None
+        if embedding_batch_window_ms > 0:
+            self.embedding_batcher = EmbeddingBatcher(
+                self._fetch_embeddings,
+                max_batch_size=embedding_batch_size,
+                max_wait_ms=embedding_batch_window_ms
+            )
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "GroqClient":
+        """
+        Create a client from the "groq" section of the application config.
+        
+        Args:
+            config: Groq configuration dictionary
+            
+        Returns:
+            Configured GroqClient
+        """
+        embedding_cache = None
+        cache_config = config.get("embedding_cache") or {}
+        if cache_config.get("enabled"):
+            embedding_cache = EmbeddingCache(
+                max_memory_mb=cache_config.get("max_memory_mb", 64),
+                disk_path=cache_config.get("disk_path"),
+                max_disk_mb=cache_config.get("max_disk_mb", 512)
+            )
+            
+        rate_limiter = None
+        if config.get("requests_per_second", 0) > 0:
+            rate_limiter = TokenBucket(config["requests_per_second"], config.get("burst", 20))
+            
+        concurrency_limiter = None
+        if config.get("adaptive_concurrency", True):
+            concurrency_limiter = AdaptiveConcurrencyLimiter(
+                initial_limit=config.get("initial_concurrency", 16),
+                min_limit=config.get("min_concurrency", 1),
+                max_limit=config.get("max_concurrency", 64)
+            )
+            
+        circuit_breaker = None
+        breaker_config = config.get("circuit_breaker") or {}
+        if breaker_config.get("enabled"):
+            circuit_breaker = CircuitBreaker(
+                failure_rate_threshold=breaker_config.get("failure_rate_threshold", 0.5),
+                slow_call_seconds=breaker_config.get("slow_call_seconds", 3.0),
+                slow_call_rate_threshold=breaker_config.get("slow_call_rate_threshold", 0.8),
+                window_size=breaker_config.get("window_size", 20),
+                minimum_calls=breaker_config.get("minimum_calls", 10),
+                open_seconds=breaker_config.get("open_seconds", 30.0)
+            )
+            
+        retry_policy = RetryPolicy(
+            max_retries=config.get("max_retries", 3),
+            base_delay=config.get("backoff_base", 0.5),
+            max_delay=config.get("backoff_max", 20.0)
+        )
+            
+        return cls(
+            api_key=config["api_key"],
+            max_connections=config.get("max_connections", 100),
+            max_connections_per_host=config.get("max_connections_per_host", 50),
+            keepalive_timeout=config.get("keepalive_timeout", 30.0),
+            connect_timeout=config.get("connect_timeout", 10.0),
+            request_timeout=config.get("request_timeout", 60.0),
+            embedding_cache=embedding_cache,
+            embedding_batch_size=config.get("embedding_batch_size", 64),
+            embedding_batch_window_ms=config.get("embedding_batch_window_ms", 0.0),
+            frame_concurrency=config.get("frame_concurrency", 4),
+            frame_timeout=config.get("frame_timeout", 30.0),
+            rate_limiter=rate_limiter,
+            concurrency_limiter=concurrency_limiter,
+            retry_policy=retry_policy,
+            hedge_delay_ms=config.get("hedge_delay_ms", 0.0),
+            circuit_breaker=circuit_breaker,
+            base_url=config.get("base_url") or "https://api.groq.com/v1"
+        )
+        
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared HTTP session, creating it on first use.
+        
+        The session is created lazily so that it binds to the running event loop.
+        
+        Returns:
+            Shared aiohttp session
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=self.timeout
+            )
+        return self._session
+        
+    async def close(self):
+        """Close the shared HTTP session, its connection pool and the embedding cache."""
+        if self.embedding_batcher is not None:
+            await self.embedding_batcher.close()
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+        
+    def rate_limit_stats(self) -> Dict[str, Any]:
+        """
+        Get throttling, retry and hedging counters.
+        
+        Returns:
+            Dictionary of counters plus the current concurrency limit and
+            circuit breaker state
+        """
+        stats = self.stats.to_dict()
+        if self.concurrency_limiter is not None:
+            stats["concurrency_limit"] = self.concurrency_limiter.limit
+            stats["in_flight"] = self.concurrency_limiter.in_flight
+        if self.circuit_breaker is not None:
+            stats["circuit_breaker"] = self.circuit_breaker.stats()
+        return stats
+        
+    @property
+    def available(self) -> bool:
+        """Whether calls are currently let through by the circuit breaker."""
+        return self.circuit_breaker is None or self.circuit_breaker.state != CircuitBreaker.OPEN
+        
+    def _operation(self, endpoint: str) -> str:
+        """
+        Get the metrics label of an endpoint, e.g. "chat_completions".
+        
+        Args:
+            endpoint: Full endpoint URL
+            
+        Returns:
+            Endpoint path relative to the base URL with underscores
+        """
+        if endpoint.startswith(self.base_url):
+            endpoint = endpoint[len(self.base_url):]
+        return endpoint.strip("/").replace("/", "_")
+        
+    @asynccontextmanager
+    async def _request_slot(self):
+        """Wait for the rate limiter and a concurrency slot for one request."""
+        if self.circuit_breaker is not None and not self.circuit_breaker.allow_request():
+            self.stats.circuit_rejected += 1
+            raise CircuitOpenError("Groq API circuit breaker is open")
+        self.stats.requests += 1
+        if self.rate_limiter is not None:
+            self.stats.rate_limit_wait_seconds += await self.rate_limiter.acquire()
+        if self.concurrency_limiter is None:
+            yield
+            return
+        async with self.concurrency_limiter.slot():
+            yield
+        
+    async def _record_success(self, duration: float):
+        """
+        Record a successful response.
+        
+        Args:
+            duration: Seconds until the response arrived
+        """
+        self.stats.successes += 1
+        if self.concurrency_limiter is not None:
+            await self.concurrency_limiter.on_success()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_success(duration)
+            
+    def _record_abandoned(self, duration: float):
+        """
+        Record a request cancelled by its caller, e.g. on a latency budget.
+        
+        Only requests that were already slow count against the circuit breaker.
+        
+        Args:
+            duration: Seconds the request had been running
+        """
+        if self.circuit_breaker is not None and duration >= self.circuit_breaker.slow_call_seconds:
+            self.circuit_breaker.record_success(duration)
+        
+    def _record_failure(self, status: Optional[int]):
+        """
+        Record a failed request and shrink the concurrency limit on overload.
+        
+        Args:
+            status: HTTP status, or None for connection errors and timeouts
+        """
+        if status == 429:
+            self.stats.throttled += 1
+        elif status is None:
+            self.stats.connection_errors += 1
+        elif status >= 500:
+            self.stats.server_errors += 1
+        else:
+            return
+        if self.concurrency_limiter is not None:
+            self.concurrency_limiter.on_overload()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record_failure()
+        
+    async def _error_from(self, response: aiohttp.ClientResponse) -> GroqAPIError:
+        """
+        Build the error for a non-200 response.
+        
+        Args:
+            response: Failed response
+            
+        Returns:
+            GroqAPIError carrying the status and Retry-After delay
+        """
+        error_text = await response.text()
+        if self.retry_policy.is_retryable(response.status):
+            logger.warning(f"Groq API error {response.status}: {error_text}")
+        else:
+            logger.error(f"Groq API error: {error_text}")
+        self._record_failure(response.status)
+        return GroqAPIError(
+            f"Groq API error: {response.status}",
+            status=response.status,
+            retry_after=parse_retry_after(response.headers.get("Retry-After"))
+        )
+        
+    async def _backoff(self, error: GroqAPIError, attempt: int):
+        """
+        Wait before retrying a failed attempt, or re-raise if it should not be retried.
+        
+        Args:
+            error: Error of the failed attempt
+            attempt: Number of the failed attempt, starting at 0
+        """
+        if isinstance(error, CircuitOpenError):
+            raise error
+        if not self.retry_policy.is_retryable(error.status) or attempt >= self.retry_policy.max_retries:
+            self.stats.failures += 1
+            raise error
+            
+        if error.retry_after is not None and self.rate_limiter is not None:
+            # Hold back every request, not just this one, while the server asks us to
+            self.rate_limiter.penalize(error.retry_after)
+            
+        delay = self.retry_policy.delay(attempt, error.retry_after)
+        self.stats.retries += 1
+        self.stats.backoff_seconds += delay
+        logger.info(f"Retrying Groq request in {delay:.2f}s after: {str(error)}")
+        await asyncio.sleep(delay)
+        
+    async def _post(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a JSON POST request through the shared session, retrying on
+        throttling and transient errors.
+        
+        Args:
+            endpoint: Full endpoint URL
+            payload: JSON payload
+            
+        Returns:
+            Decoded JSON response
+        """
+        attempt = 0
+        while True:
+            try:
+                if self.hedge_delay is None:
+                    return await self._post_once(endpoint, payload)
+                return await self._post_hedged(endpoint, payload)
+            except GroqAPIError as e:
+                await self._backoff(e, attempt)
+                attempt += 1
+        
+    async def _post_once(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a single JSON POST request.
+        
+        Args:
+            endpoint: Full endpoint URL
+            payload: JSON payload
+            
+        Returns:
+            Decoded JSON response
+        """
+        operation = self._operation(endpoint)
+        async with self._request_slot():
+            session = self._get_session()
+            start = time.perf_counter()
+            try:
+                async with session.post(endpoint, json=payload) as response:
+                    if response.status != 200:
+                        UPSTREAM_ERRORS.inc(service="groq", operation=operation, kind=str(response.status))
+                        raise await self._error_from(response)
+                    data = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                UPSTREAM_ERRORS.inc(service="groq", operation=operation, kind=type(e).__name__)
+                self._record_failure(None)
+                raise GroqAPIError(f"Groq API request failed: {type(e).__name__}: {str(e)}") from e
+            except asyncio.CancelledError:
+                self._record_abandoned(time.perf_counter() - start)
+                raise
+                
+        duration = time.perf_counter() - start
+        UPSTREAM_LATENCY.observe(duration, service="groq", operation=operation)
+        await self._record_success(duration)
+        return data
+        
+    async def _post_hedged(self, endpoint: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Send a request and, if it is slow, a second copy; use whichever
+        succeeds first.
+        
+        No hedge is sent while the concurrency limiter is saturated, so
+        hedging never adds load to an overloaded API.
+        
+        Args:
+            endpoint: Full endpoint URL
+            payload: JSON payload
+            
+        Returns:
+            Decoded JSON response
+        """
+        primary = asyncio.ensure_future(self._post_once(endpoint, payload))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.hedge_delay)
+            limiter = self.concurrency_limiter
+            if done or (limiter is not None and limiter.in_flight >= limiter.limit):
+                return await primary
+                
+            self.stats.hedged += 1
+            hedge = asyncio.ensure_future(self._post_once(endpoint, payload))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+        
+    async def _stream(self, endpoint: str, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Send a chat completion request with `stream=true` and yield content tokens.
+        
+        The response is a server-sent event stream of completion chunks that
+        ends with a `[DONE]` event. Failures before the first token are
+        retried like other requests; a stream that breaks later is not.
+        
+        Args:
+            endpoint: Full endpoint URL
+            payload: JSON payload
+            
+        Yields:
+            Content deltas in the order they arrive
+        """
+        operation = self._operation(endpoint) + "_stream"
+        attempt = 0
+        while True:
+            started = False
+            try:
+                async with self._request_slot():
+                    session = self._get_session()
+                    start = time.perf_counter()
+                    async with session.post(endpoint, json={**payload, "stream": True}) as response:
+                        if response.status != 200:
+                            UPSTREAM_ERRORS.inc(service="groq", operation=operation, kind=str(response.status))
+                            raise await self._error_from(response)
+                        # Time to the response headers; tokens keep arriving afterwards
+                        duration = time.perf_counter() - start
+                        UPSTREAM_LATENCY.observe(duration, service="groq", operation=operation)
+                        await self._record_success(duration)
+                            
+                        async for raw_line in response.content:
+                            line = raw_line.decode("utf-8").strip()
+                            if not line.startswith("data:"):
+                                continue
+                            data = line[len("data:"):].strip()
+                            if data == "[DONE]":
+                                break
+                            
+                            chunk = json.loads(data)
+                            for choice in chunk.get("choices", []):
+                                token = (choice.get("delta") or {}).get("content")
+                                if token:
+                                    started = True
+                                    yield token
+                return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                UPSTREAM_ERRORS.inc(service="groq", operation=operation, kind=type(e).__name__)
+                self._record_failure(None)
+                error = GroqAPIError(f"Groq API request failed: {type(e).__name__}: {str(e)}")
+                if started:
+                    self.stats.failures += 1
+                    raise error from e
+                await self._backoff(error, attempt)
+            except GroqAPIError as e:
+                await self._backoff(e, attempt)
+            attempt += 1
+        
+    async def _complete(self, payload: Dict[str, Any],
+                        on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Run a chat completion and return the message content.
+        
+        Args:
+            payload: Chat completion payload
+            on_token: Optional callback receiving content tokens as they arrive;
+                when given the completion is streamed
+            
+        Returns:
+            Full message content
+        """
+        endpoint = f"{self.base_url}/chat/completions"
+        
+        if on_token is None:
+            data = await self._post(endpoint, payload)
+            return data.get("choices", [{}])[0].get("message", {}).get("content", "")
+        
+        tokens = []
+        async for token in self._stream(endpoint, payload):
+            tokens.append(token)
+            on_token(token)
+        return "".join(tokens)
         
     async def get_embedding(self, text: str) -> List[float]:
         """
         Get vector embedding for text.
         
+        Concurrent calls are coalesced into batch requests when micro-batching
+        is enabled.
+        
         Args:
             text: Text to generate embedding for
             
         Returns:
             Vector embedding as list of floats
         """
+        if self.embedding_cache is not None:
+            cached = await self.embedding_cache.get(self.embedding_model, text)
+            if cached is not None:
+                return cached
+                
+        if self.embedding_batcher is not None:
+            embedding = await self.embedding_batcher.submit(text)
+        else:
+            embedding = (await self._fetch_embeddings([text]))[0]
+        
+        if self.embedding_cache is not None:
+            await self.embedding_cache.set(self.embedding_model, text, embedding)
+        return embedding
+        
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Get vector embeddings for several texts.
+        
+        Cached texts are served locally; the rest are sent in batches of at
+        most `embedding_batch_size` texts per request.
+        
+        Args:
+            texts: Texts to generate embeddings for
+            
+        Returns:
+            Vector embeddings in the same order as the input texts
+        """
+        embeddings: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        
+        for i, text in enumerate(texts):
+            if self.embedding_cache is not None:
+                cached = await self.embedding_cache.get(self.embedding_model, text)
+                if cached is not None:
+                    embeddings[i] = cached
+                    continue
+            missing.setdefault(text, []).append(i)
+            
+        missing_texts = list(missing)
+        for start in range(0, len(missing_texts), self.embedding_batch_size):
+            batch = missing_texts[start:start + self.embedding_batch_size]
+            batch_embeddings = await self._fetch_embeddings(batch)
+            
+            for text, embedding in zip(batch, batch_embeddings):
+                for i in missing[text]:
+                    embeddings[i] = embedding
+                if self.embedding_cache is not None:
+                    await self.embedding_cache.set(self.embedding_model, text, embedding)
+                    
+        return embeddings
+        
+    async def _fetch_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Request embeddings for a list of texts in a single API call.
+        
+        Args:
+            texts: Texts to generate embeddings for
+            
+        Returns:
+            Vector embeddings in the same order as the input texts
+        """
         endpoint = f"{self.base_url}/embeddings"
         
         payload = {
-            "model": "embedding-001",
-            "input": text,
-            "dimensions": 1536  # Standard embedding size
+            "model": self.embedding_model,
+            "input": texts,
+            "dimensions": self.embedding_dimensions
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, headers=self.headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Groq API error: {error_text}")
-                    raise Exception(f"Groq API error: {response.status}")
-                    
-                data = await response.json()
-                return data.get("data", [{}])[0].get("embedding", [])
+        data = await self._post(endpoint, payload)
+        items = sorted(data.get("data", []), key=lambda item: item.get("index", 0))
+        if len(items) != len(texts):
+            raise GroqAPIError(f"Groq API returned {len(items)} embeddings for {len(texts)} inputs")
+            
+        return [item.get("embedding", []) for item in items]
                 
-    async def process_text(self, text: str) -> Dict[str, Any]:
+    async def process_text(self, text: str,
+                           on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Process text using Groq API.
         
         Args:
             text: Text to process
+            on_token: Optional callback receiving completion tokens as they arrive
             
         Returns:
             Dictionary with processed text information
         """
-        endpoint = f"{self.base_url}/chat/completions"
-        
         payload = {
             "model": "mixtral-8x7b-32768",  # Or other appropriate model
             "messages": [
@@ -79,37 +663,28 @@ class GroqClient:
             "temperature": 0.1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, headers=self.headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Groq API error: {error_text}")
-                    raise Exception(f"Groq API error: {response.status}")
-                    
-                data = await response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-                try:
-                    # Parse the structured response (assuming model returns JSON-like format)
-                    result = json.loads(content)
-                except Exception:
-                    # If not JSON, use the raw text
-                    result = {"summary": content}
-                    
-                return result
-                
-    async def process_image(self, image_data: str) -> Dict[str, Any]:
+        content = await self._complete(payload, on_token)
+        
+        try:
+            # Parse the structured response (assuming model returns JSON-like format)
+            result = json.loads(content)
+        except Exception:
+            # If not JSON, use the raw text
+            result = {"summary": content}
+            
+        return result
+        
+    async def process_image(self, image_data: str, mime_type: str = "image/jpeg") -> Dict[str, Any]:
         """
         Process image using Groq API.
         
         Args:
             image_data: Base64 encoded image data
+            mime_type: MIME type of the encoded image
             
         Returns:
             Dictionary with image analysis results
         """
-        endpoint = f"{self.base_url}/chat/completions"
-        
         # Construct the prompt with image
         payload = {
             "model": "llava-13b-v1.6",  # Use a multimodal model that supports images
@@ -119,57 +694,54 @@ class GroqClient:
                     "role": "user", 
                     "content": [
                         {"type": "text", "text": "What's in this image?"},
-                        {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_data}"}}
+                        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{image_data}"}}
                     ]
                 }
             ],
             "temperature": 0.1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, headers=self.headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Groq API error: {error_text}")
-                    raise Exception(f"Groq API error: {response.status}")
-                    
-                data = await response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-                # Extract information from the model's response
-                return {
-                    "description": content,
-                    "objects": self._extract_objects_from_description(content)
-                }
+        content = await self._complete(payload)
+        
+        # Extract information from the model's response
+        return {
+            "description": content,
+            "objects": self._extract_objects_from_description(content)
+        }
     
-    async def process_video(self, video_path: str, key_frames: List[bytes]) -> Dict[str, Any]:
+    async def process_video(self, video_path: str, key_frames: List[bytes],
+                            on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Process video using key frames and Groq API.
         
         Args:
             video_path: Path to video file
             key_frames: List of key frame data in bytes
+            on_token: Optional callback receiving summary tokens as they arrive
             
         Returns:
             Dictionary with video analysis results
         """
-        # Process key frames individually
-        frame_descriptions = []
-        for i, frame_data in enumerate(key_frames):
-            # Convert frame to base64
+        # Analyse key frames concurrently; failed or slow frames are dropped
+        async def describe_frame(frame_data: bytes) -> Dict[str, Any]:
             base64_frame = base64.b64encode(frame_data).decode('utf-8')
+            return await self.process_image(base64_frame)
             
-            # Process each frame
-            frame_result = await self.process_image(base64_frame)
+        frame_results = await gather_bounded(
+            describe_frame, key_frames, self.frame_concurrency, self.frame_timeout
+        )
+        frame_descriptions = []
+        frame_lines = []
+        for i, frame_result in enumerate(frame_results):
+            if frame_result is None:
+                continue
             frame_descriptions.append(frame_result)
+            frame_lines.append(f"Frame {i+1}: {frame_result['description']}")
             
         # Combine frame descriptions to create video summary
-        combined_text = "\n".join([f"Frame {i+1}: {desc['description']}" 
-                                for i, desc in enumerate(frame_descriptions)])
+        combined_text = "\n".join(frame_lines)
         
         # Get overall summary of the video
-        endpoint = f"{self.base_url}/chat/completions"
-        
         payload = {
             "model": "mixtral-8x7b-32768",  # Or appropriate model
             "messages": [
@@ -179,21 +751,13 @@ class GroqClient:
             "temperature": 0.1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(endpoint, headers=self.headers, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    logger.error(f"Groq API error: {error_text}")
-                    raise Exception(f"Groq API error: {response.status}")
-                    
-                data = await response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                
-                return {
-                    "summary": content,
-                    "frame_descriptions": frame_descriptions,
-                    "description": self._extract_main_description(content)
-                }
+        content = await self._complete(payload, on_token)
+        
+        return {
+            "summary": content,
+            "frame_descriptions": frame_descriptions,
+            "description": self._extract_main_description(content)
+        }
     
     def _extract_objects_from_description(self, description: str) -> str:
         """
@@ -0,0 +1,305 @@
+"""
+Background jobs for long-running /process requests.
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from collections import OrderedDict
+import asyncio
+import logging
+import time
+import uuid
+
+from helpers import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+# Callback used by job functions to report (stage, fraction complete)
+ProgressCallback = Callable[[str, float], None]
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class Job:
+    """
+    State of a single background job.
+    """
+
+    def __init__(self, func: Callable[[ProgressCallback], Awaitable[Any]],
+                 cleanup: Optional[Callable[[], None]] = None):
+        """
+        Initialize a queued job.
+
+        Args:
+            func: Coroutine function doing the work; called with a progress callback
+            cleanup: Optional callable releasing the job's resources when it ends
+        """
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.cleanup = cleanup
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Optional[Any] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.finished_at: Optional[float] = None
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the job to its API representation.
+
+        Returns:
+            Dictionary with the job status, progress and result or error
+        """
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "result": self.result,
+            "error": self.error,
+            "created_at": format_timestamp(self.created_at),
+            "updated_at": format_timestamp(self.updated_at)
+        }
+
+    def _publish(self):
+        """Push the current state to all subscribers."""
+        self.updated_at = time.time()
+        event = self.to_dict()
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+
+class JobManager:
+    """
+    Bounded pool of background workers with in-memory job state.
+
+    Jobs wait in a bounded queue and are run by a fixed number of worker
+    tasks, so slow video requests cannot take over the event loop's capacity
+    for fast requests. Finished jobs are kept for `result_ttl_seconds` so
+    clients can poll for the result.
+
+    Job state lives in this process only; with several API workers a client
+    must poll the worker that accepted its job.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue_size: int = 100,
+                 result_ttl_seconds: float = 3600.0):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_workers: Number of jobs run concurrently
+            max_queue_size: Maximum number of queued jobs
+            result_ttl_seconds: How long finished jobs are kept
+        """
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "JobManager":
+        """
+        Create a job manager from the "jobs" section of the application config.
+
+        Args:
+            config: Job configuration dictionary
+
+        Returns:
+            Configured JobManager instance
+        """
+        return cls(
+            max_workers=config.get("max_workers", 2),
+            max_queue_size=config.get("max_queue_size", 100),
+            result_ttl_seconds=config.get("result_ttl_seconds", 3600.0)
+        )
+
+    async def start(self):
+        """Start the worker tasks."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._workers = [
+            asyncio.create_task(self._worker(index)) for index in range(self.max_workers)
+        ]
+        logger.info(f"Started {self.max_workers} background job workers")
+
+    async def close(self):
+        """Stop the workers and release the resources of unfinished jobs."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        for job in self._jobs.values():
+            if not job.done:
+                job.status = "failed"
+                job.error = "Server shutting down"
+                job._publish()
+                self._release(job)
+
+    def submit(self, func: Callable[[ProgressCallback], Awaitable[Any]],
+               cleanup: Optional[Callable[[], None]] = None) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            func: Coroutine function doing the work; called with a progress callback
+            cleanup: Optional callable releasing the job's resources when it ends
+
+        Returns:
+            The queued job
+        """
+        if self._queue is None:
+            raise RuntimeError("Job manager has not been started")
+
+        self._expire()
+        job = Job(func, cleanup)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.max_queue_size} jobs)")
+
+        self._jobs[job.id] = job
+        logger.info(f"Queued job {job.id}")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Look up a job.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            The job, or None if it is unknown or expired
+        """
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def subscribe(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the state of a job every time it changes, until it finishes.
+
+        Args:
+            job_id: Job ID
+
+        Yields:
+            Job dictionaries as returned by Job.to_dict()
+        """
+        job = self.get(job_id)
+        if job is None:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        job._subscribers.append(queue)
+        try:
+            event = job.to_dict()
+            while True:
+                yield event
+                if event["status"] in ("succeeded", "failed"):
+                    return
+                event = await queue.get()
+        finally:
+            job._subscribers.remove(queue)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Count jobs by status.
+
+        Returns:
+            Dictionary of job counts per status
+        """
+        counts = {status: 0 for status in JOB_STATUSES}
+        for job in self._jobs.values():
+            counts[job.status] += 1
+        return counts
+
+    async def _worker(self, index: int):
+        """
+        Run queued jobs one at a time.
+
+        Args:
+            index: Worker number, used in log messages
+        """
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        """
+        Run a job and record its outcome.
+
+        Args:
+            job: Job to run
+        """
+        def progress(stage: str, fraction: float):
+            job.stage = stage
+            job.progress = max(job.progress, min(1.0, fraction))
+            job._publish()
+
+        job.status = "running"
+        job.stage = "running"
+        job._publish()
+        start = time.perf_counter()
+
+        try:
+            job.result = await job.func(progress)
+            job.status = "succeeded"
+            job.stage = "done"
+            job.progress = 1.0
+        except asyncio.CancelledError:
+            job.status = "failed"
+            job.error = "Job cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {str(e)}")
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            job._publish()
+            self._release(job)
+            logger.info(f"Job {job.id} {job.status} in {time.perf_counter() - start:.2f}s")
+
+    @staticmethod
+    def _release(job: Job):
+        """
+        Call a job's cleanup callback once.
+
+        Args:
+            job: Finished job
+        """
+        cleanup, job.cleanup = job.cleanup, None
+        job.func = None
+        if cleanup is not None:
+            try:
+                cleanup()
+            except Exception as e:
+                logger.warning(f"Cleanup of job {job.id} failed: {str(e)}")
+
+    def _expire(self):
+        """Drop finished jobs older than the result TTL."""
+        cutoff = time.time() - self.result_ttl_seconds
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.done and job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
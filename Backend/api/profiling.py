@@ -0,0 +1,211 @@
+"""
+Sampled per-request profiling middleware.
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import cProfile
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+
+from helpers import format_timestamp
+from metrics import record_observations
+
+try:
+    from pyinstrument import Profiler as PyinstrumentProfiler
+except ImportError:
+    PyinstrumentProfiler = None
+
+logger = logging.getLogger(__name__)
+
+# Values accepted by the PROFILING_ENGINE setting
+PROFILING_ENGINES = ("auto", "cprofile", "pyinstrument")
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles a sample of requests.
+
+    A request is profiled when it carries the configured header with the
+    secret token, or at random with probability `sample_rate`. Each profile
+    is written to `output_dir` as a JSON summary (request, status, duration,
+    the stage and upstream timings recorded through the metrics module and,
+    for cProfile, the top functions) plus the raw profile: a .prof file for
+    cProfile, which snakeviz or pstats can open, or an HTML report for
+    pyinstrument. Only the newest `max_profiles` profiles are kept.
+
+    pyinstrument, when installed, attributes time spent awaiting to the
+    awaiting coroutine. cProfile only measures CPU time on the event loop
+    thread and also sees other requests served while the profile runs.
+    Only one request is profiled at a time; others pass through untouched.
+    """
+
+    def __init__(self, app, output_dir: str = "profiles", sample_rate: float = 0.0,
+                 header: str = "X-Profile", token: Optional[str] = None,
+                 max_profiles: int = 50, engine: str = "auto", top_functions: int = 40):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            output_dir: Directory the profiles are written to
+            sample_rate: Fraction of requests profiled at random
+            header: Request header that asks for a profile
+            token: Value the header must carry; without one the header is ignored
+            max_profiles: Number of profiles kept on disk
+            engine: "cprofile", "pyinstrument" or "auto" (pyinstrument if installed)
+            top_functions: Functions listed in the summary of a cProfile profile
+        """
+        if engine not in PROFILING_ENGINES:
+            raise ValueError(f"Unknown profiling engine: {engine} (expected one of {', '.join(PROFILING_ENGINES)})")
+        if engine == "pyinstrument" and PyinstrumentProfiler is None:
+            logger.warning("pyinstrument is not installed, profiling with cProfile")
+        use_pyinstrument = engine != "cprofile" and PyinstrumentProfiler is not None
+
+        self.app = app
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.header = header.lower().encode("latin-1")
+        self.token = token
+        self.max_profiles = max(1, max_profiles)
+        self.engine = "pyinstrument" if use_pyinstrument else "cprofile"
+        self.top_functions = top_functions
+        self._active = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self._active:
+            await self.app(scope, receive, send)
+            return
+
+        trigger = self._trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex[:12]
+        status = None
+
+        async def send_with_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", [])) + [(b"x-profile-id", profile_id.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        self._active = True
+        profiler = self._start_profiler()
+        observations: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        try:
+            with record_observations() as observations:
+                await self.app(scope, receive, send_with_id)
+        finally:
+            duration = time.perf_counter() - start
+            if self.engine == "pyinstrument":
+                profiler.stop()
+            else:
+                profiler.disable()
+            self._active = False
+
+            summary = {
+                "id": profile_id,
+                "timestamp": format_timestamp(),
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status,
+                "trigger": trigger,
+                "engine": self.engine,
+                "duration_seconds": round(duration, 6),
+                "stages": [{**o, "value": round(o["value"], 6)} for o in observations]
+            }
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._write, summary, profiler)
+            except Exception as e:
+                logger.error(f"Error writing profile {profile_id}: {str(e)}")
+
+    def _trigger(self, scope) -> Optional[str]:
+        """
+        Decide whether to profile a request.
+
+        Args:
+            scope: ASGI connection scope
+
+        Returns:
+            "header" or "sample" if the request should be profiled, else None
+        """
+        if self.token:
+            for name, value in scope.get("headers") or []:
+                if name == self.header and hmac.compare_digest(value, self.token.encode("latin-1")):
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def _start_profiler(self):
+        """
+        Create and start a profiler for the configured engine.
+
+        Returns:
+            Running profiler
+        """
+        if self.engine == "pyinstrument":
+            profiler = PyinstrumentProfiler(async_mode="enabled")
+            profiler.start()
+        else:
+            profiler = cProfile.Profile()
+            profiler.enable()
+        return profiler
+
+    def _write(self, summary: Dict[str, Any], profiler):
+        """
+        Write a profile and its summary, then enforce the retention cap.
+
+        Runs in a worker thread.
+
+        Args:
+            summary: Request summary with stage timings
+            profiler: Stopped profiler
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        stem = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{summary['id']}")
+
+        if self.engine == "pyinstrument":
+            profile_path = f"{stem}.html"
+            with open(profile_path, "w") as f:
+                f.write(profiler.output_html())
+        else:
+            profile_path = f"{stem}.prof"
+            profiler.dump_stats(profile_path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(self.top_functions)
+            summary["top_functions"] = report.getvalue()
+
+        summary["profile_file"] = os.path.basename(profile_path)
+        with open(f"{stem}.json", "w") as f:
+            json.dump(summary, f, indent=2)
+        logger.info(f"Wrote profile {summary['id']} for {summary['method']} {summary['path']} "
+                    f"({summary['duration_seconds']:.3f}s) to {profile_path}")
+
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """Delete the oldest profiles beyond the retention cap."""
+        summaries = sorted(
+            (entry for entry in os.scandir(self.output_dir) if entry.name.endswith(".json")),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in summaries[:max(0, len(summaries) - self.max_profiles)]:
+            stem = entry.path[:-len(".json")]
+            for suffix in (".json", ".prof", ".html"):
+                try:
+                    os.remove(stem + suffix)
+                except FileNotFoundError:
+                    pass
@@ -0,0 +1,262 @@
+"""
+Client-side rate limiting, adaptive concurrency and retry backoff for API calls.
+"""
+
+from typing import Any, Dict, Optional
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import random
+import time
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """
+    Token bucket limiting the request rate.
+
+    Tokens are refilled continuously at `rate` per second up to `burst`;
+    every request takes one token and waits when none are left.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Initialize the bucket, starting full.
+
+        Args:
+            rate: Tokens added per second; 0 or less disables limiting
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting for the refill if the bucket is empty.
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+
+        waited = 0.0
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def penalize(self, seconds: float):
+        """
+        Drain the bucket so no request starts for the given time.
+
+        Used when the server asks us to back off with Retry-After.
+
+        Args:
+            seconds: Seconds to hold back new requests
+        """
+        if self.rate <= 0:
+            return
+        self._tokens = min(self._tokens, -seconds * self.rate)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD limit on the number of requests in flight.
+
+    The limit grows by one after every `increase_every` consecutive
+    successes and is multiplied by `decrease_factor` when the server
+    throttles or fails, at most once per `decrease_cooldown` seconds so a
+    burst of errors from the same overload only counts once.
+    """
+
+    def __init__(self, initial_limit: int = 16, min_limit: int = 1, max_limit: int = 64,
+                 increase_every: int = 10, decrease_factor: float = 0.5,
+                 decrease_cooldown: float = 1.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            initial_limit: Starting concurrency limit
+            min_limit: Lowest limit
+            max_limit: Highest limit
+            increase_every: Consecutive successes per additive increase
+            decrease_factor: Multiplier applied on throttling
+            decrease_cooldown: Minimum seconds between two decreases
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self.increase_every = increase_every
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+
+        self.in_flight = 0
+        self._successes = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    async def on_success(self):
+        """Record a successful request (additive increase)."""
+        self._successes += 1
+        if self._successes >= self.increase_every and self.limit < self.max_limit:
+            self._successes = 0
+            async with self._condition:
+                self.limit += 1
+                # The new slot is free right away, not only once a request finishes
+                self._condition.notify_all()
+
+    def on_overload(self):
+        """Record a throttled or failed request (multiplicative decrease)."""
+        self._successes = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, int(self.limit * self.decrease_factor))
+        if new_limit < self.limit:
+            logger.warning(f"Reducing API concurrency limit from {self.limit} to {new_limit}")
+            self.limit = new_limit
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter that honours Retry-After.
+    """
+
+    # Status codes worth retrying: throttling and transient server errors
+    RETRYABLE_STATUSES = (408, 409, 429, 500, 502, 503, 504)
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 20.0):
+        """
+        Initialize the retry policy.
+
+        Args:
+            max_retries: Retries after the first attempt
+            base_delay: Backoff for the first retry in seconds
+            max_delay: Upper bound for a single backoff in seconds
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def is_retryable(self, status: Optional[int]) -> bool:
+        """
+        Check whether a failure may succeed when retried.
+
+        Args:
+            status: HTTP status, or None for connection errors and timeouts
+
+        Returns:
+            True if the request should be retried
+        """
+        return status is None or status in self.RETRYABLE_STATUSES
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Compute the wait before the next attempt.
+
+        Args:
+            attempt: Number of the failed attempt, starting at 0
+            retry_after: Delay requested by the server, if any
+
+        Returns:
+            Seconds to wait
+        """
+        if retry_after is not None:
+            # Never retry earlier than asked; a little jitter spreads the retries out
+            return retry_after + random.uniform(0, self.base_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given in seconds or as an HTTP date.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Delay in seconds, or None if absent or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitStats:
+    """
+    Counters describing throttling, retries and hedging of an API client.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.connection_errors = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.circuit_rejected = 0
+        self.rate_limit_wait_seconds = 0.0
+        self.backoff_seconds = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the counters to a dictionary.
+
+        Returns:
+            Dictionary of counter values
+        """
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "server_errors": self.server_errors,
+            "connection_errors": self.connection_errors,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "circuit_rejected": self.circuit_rejected,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait_seconds, 3),
+            "backoff_seconds": round(self.backoff_seconds, 3)
+        }
@@ -3,13 +3,17 @@ API routes for the multimodal instructor backend.
 """
 
 from typing import Dict, Any, List, Optional
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Depends, Body
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, File, Form, UploadFile, HTTPException, Depends, Body, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 from Instructor.instructor import Instructor
 from config.settings import get_settings
+from api.uploads import open_upload, copy_upload
+from api.jobs import JobManager, JobQueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -20,47 +24,89 @@ class TaskResponse(BaseModel):
     task_id: Optional[str] = None
     confidence: Optional[float] = None
     processed_data: Optional[Dict[str, Any]] = None
+    degraded: bool = False
 
 class NewTaskRequest(BaseModel):
     title: str
     description: str
     metadata: Dict[str, Any]
 
+class BulkTaskRequest(BaseModel):
+    tasks: List[NewTaskRequest]
+    batch_size: int = Field(100, ge=1, le=1000)
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    progress: float
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
 # Create router
 router = APIRouter(prefix="/api/v1")
 
 # Dependency to get the instructor
-async def get_instructor():
-    settings = get_settings()
-    instructor = Instructor(settings.dict())
-    try:
-        yield instructor
-    finally:
-        # Any cleanup if needed
-        pass
+async def get_instructor(request: Request) -> Instructor:
+    """
+    Return the application-scoped instructor built during startup.
+    """
+    instructor = getattr(request.app.state, "instructor", None)
+    if instructor is None:
+        raise HTTPException(status_code=503, detail="Instructor is not available")
+    return instructor
+
+# Dependency to get the background job manager
+async def get_job_manager(request: Request) -> JobManager:
+    """
+    Return the application-scoped job manager started during startup.
+    """
+    job_manager = getattr(request.app.state, "job_manager", None)
+    if job_manager is None:
+        raise HTTPException(status_code=503, detail="Background jobs are not available")
+    return job_manager
 
 @router.post("/process", response_model=TaskResponse)
 async def process_request(
+    request: Request,
     text: Optional[str] = Form(None),
     images: Optional[List[UploadFile]] = File(None),
     video: Optional[UploadFile] = File(None),
+    run_as_job: bool = Form(False),
     instructor: Instructor = Depends(get_instructor)
 ):
     """
     Process a multimodal request and determine where to direct the user.
+    
+    With run_as_job set, the request is queued as a background job and a
+    202 response with the job ID is returned immediately; poll
+    GET /jobs/{job_id} or stream GET /jobs/{job_id}/events for the result.
     """
     try:
+        max_bytes = get_settings().max_upload_size_mb * 1024 * 1024
+        
+        if run_as_job:
+            # Only job submissions need the job manager; synchronous calls
+            # keep working when it is unavailable
+            job_manager = await get_job_manager(request)
+            return await _submit_process_job(text, images, video, max_bytes,
+                                             instructor, job_manager)
+        
+        # Uploads are already spooled to temporary files by the form parser;
+        # pass the file handles on instead of reading them into memory
+        
         # Process uploaded images if any
         image_data = []
         if images:
             for img in images:
-                content = await img.read()
-                image_data.append(content)
+                image_data.append(open_upload(img, max_bytes))
                 
         # Process uploaded video if any
         video_data = None
         if video:
-            video_data = await video.read()
+            video_data = open_upload(video, max_bytes)
              
         # Process the request with the instructor
         result = await instructor.process_request(
@@ -71,10 +117,144 @@ async def process_request(
         
         return result
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
 
+@router.post("/process/stream")
+async def process_request_stream(
+    text: Optional[str] = Form(None),
+    images: Optional[List[UploadFile]] = File(None),
+    video: Optional[UploadFile] = File(None),
+    instructor: Instructor = Depends(get_instructor)
+):
+    """
+    Process a multimodal request, streaming progress and LLM tokens as
+    server-sent events.
+    
+    Emits `progress` events with the pipeline stage, `token` events with
+    generated text as it arrives (tagged with the "text" or "video"
+    modality it summarises), and a final `result` (the same body as
+    /process) or `error` event.
+    """
+    max_bytes = get_settings().max_upload_size_mb * 1024 * 1024
+    image_data = [open_upload(img, max_bytes) for img in images or []]
+    video_data = open_upload(video, max_bytes) if video else None
+    
+    events: asyncio.Queue = asyncio.Queue()
+    
+    async def run():
+        try:
+            result = await instructor.process_request(
+                text=text,
+                images=image_data if image_data else None,
+                video=video_data,
+                progress=lambda stage, fraction: events.put_nowait(
+                    ("progress", {"stage": stage, "progress": round(fraction, 3)})
+                ),
+                on_token=lambda modality, token: events.put_nowait(
+                    ("token", {"modality": modality, "text": token})
+                )
+            )
+            events.put_nowait(("result", result))
+        except Exception as e:
+            logger.error(f"Error processing request: {str(e)}")
+            events.put_nowait(("error", {"detail": f"Error processing request: {str(e)}"}))
+    
+    async def stream():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                event, data = await events.get()
+                yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+                if event in ("result", "error"):
+                    break
+        finally:
+            # The client went away; stop the pipeline
+            if not task.done():
+                task.cancel()
+    
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+async def _submit_process_job(text: Optional[str], images: Optional[List[UploadFile]],
+                              video: Optional[UploadFile], max_bytes: int,
+                              instructor: Instructor, job_manager: JobManager) -> JSONResponse:
+    """
+    Queue a /process request as a background job.
+    
+    The uploads are closed when the request ends, so they are copied to
+    temporary files that the job closes when it finishes.
+    """
+    files = []
+    try:
+        image_data = []
+        for img in images or []:
+            image_data.append(await copy_upload(img, max_bytes))
+            files.append(image_data[-1])
+        
+        video_data = None
+        if video:
+            video_data = await copy_upload(video, max_bytes)
+            files.append(video_data)
+    except Exception:
+        for f in files:
+            f.close()
+        raise
+    
+    def cleanup():
+        for f in files:
+            f.close()
+    
+    async def run(progress):
+        return await instructor.process_request(
+            text=text,
+            images=image_data if image_data else None,
+            video=video_data,
+            progress=progress
+        )
+    
+    try:
+        job = job_manager.submit(run, cleanup=cleanup)
+    except JobQueueFullError as e:
+        cleanup()
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    
+    return JSONResponse(status_code=202, content=job.to_dict())
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Get the status, progress and, once finished, the result of a background job.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: str,
+    job_manager: JobManager = Depends(get_job_manager)
+):
+    """
+    Stream the progress of a background job as server-sent events.
+    """
+    if job_manager.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    
+    async def events():
+        async for event in job_manager.subscribe(job_id):
+            yield f"data: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
 @router.post("/tasks", response_model=Dict[str, Any])
 async def create_task(
     task_data: NewTaskRequest,
@@ -90,6 +270,21 @@ async def create_task(
         logger.error(f"Error creating task: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating task: {str(e)}")
 
+@router.post("/tasks/bulk", response_model=Dict[str, Any])
+async def create_tasks_bulk(
+    bulk_data: BulkTaskRequest,
+    instructor: Instructor = Depends(get_instructor)
+):
+    """
+    Create many tasks at once, e.g. to seed or refresh the marketplace.
+    """
+    try:
+        tasks = [task.dict() for task in bulk_data.tasks]
+        return await instructor.save_new_tasks(tasks, batch_size=bulk_data.batch_size)
+    except Exception as e:
+        logger.error(f"Error creating tasks: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error creating tasks: {str(e)}")
+
 @router.get("/marketplace/{task_id}", response_model=Dict[str, Any])
 async def get_marketplace_task(
     task_id: str,
@@ -110,8 +305,15 @@ async def get_marketplace_task(
         raise HTTPException(status_code=500, detail=f"Error retrieving task: {str(e)}")
 
 @router.get("/health")
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint.
+    
+    Includes the Groq throttling and retry counters, which are used to size
+    the API quota.
     """
-    return {"status": "ok", "service": "multimodal-instructor"}
\ No newline at end of file
+    health = {"status": "ok", "service": "multimodal-instructor"}
+    instructor = getattr(request.app.state, "instructor", None)
+    if instructor is not None:
+        health["groq"] = instructor.groq_client.rate_limit_stats()
+    return health
\ No newline at end of file
@@ -0,0 +1,477 @@
+"""
+Capture of sanitized API requests into an on-disk corpus for later replay.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import random
+import re
+import tempfile
+import threading
+import time
+import zlib
+from urllib.parse import parse_qsl, urlencode
+
+logger = logging.getLogger(__name__)
+
+# Request paths recorded by default, matched as suffixes
+RECORDED_PATHS = ("/process", "/tasks")
+
+# Request headers kept in the corpus; everything else (cookies, tokens) is dropped
+KEPT_HEADERS = ("content-type",)
+
+# Body types sanitize_body() can redact; requests with any other non-empty body are not recorded
+SANITIZED_TYPES = ("application/json", "multipart/form-data", "application/x-www-form-urlencoded")
+
+# Recorded bodies up to this size are kept in memory, larger ones are spooled to a temporary file
+SPOOL_BYTES = 1024 * 1024
+
+# Uploads are hashed and written to their blobs in chunks of this size
+BLOB_CHUNK_BYTES = 1024 * 1024
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE = re.compile(r"(?<!\w)\+?\d(?:[\s().-]?\d){8,14}(?!\w)")
+_FILENAME = re.compile(rb'(filename\*?=)("[^"]*"|[^;\r\n]*)', re.IGNORECASE)
+
+def redact_text(text: str) -> str:
+    """
+    Replace e-mail addresses and phone numbers in a text.
+
+    Args:
+        text: Text to redact
+
+    Returns:
+        Redacted text
+    """
+    return _PHONE.sub("[phone]", _EMAIL.sub("[email]", text))
+
+def _redact_json(value: Any) -> Any:
+    if isinstance(value, str):
+        return redact_text(value)
+    if isinstance(value, list):
+        return [_redact_json(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _redact_json(item) for key, item in value.items()}
+    return value
+
+def _redact_bytes(data: bytes) -> bytes:
+    # surrogateescape keeps bytes that are not UTF-8, so only the matches change
+    return redact_text(data.decode("utf-8", "surrogateescape")).encode("utf-8", "surrogateescape")
+
+def can_sanitize(content_type: str) -> bool:
+    """
+    Check whether sanitize_body() can redact bodies of a content type.
+
+    Args:
+        content_type: Content-Type header of the request
+
+    Returns:
+        True for JSON, multipart and URL-encoded form bodies
+    """
+    return content_type.lower().startswith(SANITIZED_TYPES)
+
+def sanitize_body(content_type: str, body: bytes) -> bytes:
+    """
+    Remove personal data from a request body while keeping it replayable.
+
+    Text in JSON bodies, in URL-encoded form values and in non-file
+    multipart fields is redacted and uploaded file names are replaced;
+    file contents are kept unchanged. Invalid JSON is redacted as text.
+
+    Args:
+        content_type: Content-Type header of the request
+        body: Raw request body
+
+    Returns:
+        Sanitized body
+
+    Raises:
+        ValueError: If the content type cannot be sanitized
+    """
+    if content_type.lower().startswith("application/json"):
+        try:
+            return json.dumps(_redact_json(json.loads(body))).encode("utf-8")
+        except ValueError:
+            return _redact_bytes(body)
+
+    if content_type.lower().startswith("application/x-www-form-urlencoded"):
+        fields = parse_qsl(body.decode("latin-1"), keep_blank_values=True,
+                           encoding="utf-8", errors="surrogateescape")
+        fields = [(name, redact_text(value)) for name, value in fields]
+        return urlencode(fields, encoding="utf-8", errors="surrogateescape").encode("ascii")
+
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not content_type.lower().startswith("multipart/form-data") or match is None:
+        raise ValueError(f"Cannot sanitize a body of type {content_type or 'unknown'}")
+
+    delimiter = b"--" + match.group(1).encode("latin-1")
+    parts = body.split(delimiter)
+    for i, part in enumerate(parts):
+        head, separator, content = part.partition(b"\r\n\r\n")
+        if not separator:
+            continue
+        if b"filename" in head.lower():
+            head = _FILENAME.sub(lambda m: m.group(1) + b'"upload"', head)
+        else:
+            # Field values end with the CRLF that precedes the next delimiter
+            value, crlf = (content[:-2], content[-2:]) if content.endswith(b"\r\n") else (content, b"")
+            content = _redact_bytes(value) + crlf
+        parts[i] = head + separator + content
+    return delimiter.join(parts)
+
+
+def split_uploads(content_type: str, body) -> List[Tuple[bool, int, int]]:
+    """
+    Split a request body into uploaded files and the bytes around them.
+
+    Only offsets are returned, so the body can be a memory-mapped file
+    and uploads are never copied.
+
+    Args:
+        content_type: Content-Type header of the request
+        body: Request body as bytes or an mmap
+
+    Returns:
+        (is_file, start, end) spans that together cover the body
+    """
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if not content_type.lower().startswith("multipart/form-data") or match is None:
+        return [(False, 0, len(body))]
+
+    delimiter = b"--" + match.group(1).encode("latin-1")
+    spans = []
+    pending = 0
+    part_start = 0
+    while part_start <= len(body):
+        part_end = body.find(delimiter, part_start)
+        if part_end == -1:
+            part_end = len(body)
+        separator = body.find(b"\r\n\r\n", part_start, part_end)
+        if separator != -1 and b"filename" in body[part_start:separator].lower():
+            content_start = separator + 4
+            data_end = part_end - 2 if body[part_end - 2:part_end] == b"\r\n" else part_end
+            if part_end - content_start > 2:
+                spans += [(False, pending, content_start), (True, content_start, data_end)]
+                pending = data_end
+        part_start = part_end + len(delimiter)
+    spans.append((False, pending, len(body)))
+    return [(is_file, start, end) for is_file, start, end in spans if end > start or is_file]
+
+
+class TrafficCorpus:
+    """
+    Append-only request corpus on disk.
+
+    `index.jsonl` holds one line per request: arrival offset, method, path,
+    kept headers, body size, recorded status and duration, and the body as
+    a list of segments. Uploaded files are stored once per SHA-256 digest
+    under `blobs/`, zlib-compressed when that saves space, and referenced
+    as {"blob": digest}; the multipart framing and form fields around them
+    are kept inline as {"inline": text}. The same video uploaded many
+    times therefore costs its size once. Other bodies are stored whole as
+    a single blob.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Open or create a corpus.
+
+        Args:
+            directory: Corpus directory
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.jsonl")
+        self._lock = threading.Lock()
+        self._count: Optional[int] = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = sum(1 for _ in self.entries())
+        return self._count
+
+    def append(self, method: str, path: str, headers: Dict[str, str], body,
+               offset: float, status: Optional[int] = None, duration: Optional[float] = None):
+        """
+        Sanitize a request and add it to the corpus. Safe to call from several threads.
+
+        The multipart framing and form fields are sanitized with
+        sanitize_body(); uploads are hashed and written to their blobs in
+        chunks straight from `body`. Bodies of other types than
+        SANITIZED_TYPES are refused.
+
+        Args:
+            method: HTTP method
+            path: Request path including the query string
+            headers: Headers to keep
+            body: Raw request body as bytes or an mmap
+            offset: Seconds since the start of the recording
+            status: Response status seen while recording
+            duration: Response time seen while recording, in seconds
+
+        Raises:
+            ValueError: If the body is not empty and its content type cannot be sanitized
+        """
+        content_type = headers.get("content-type", "")
+        spans = split_uploads(content_type, body)
+        if not any(is_file for is_file, _, _ in spans):
+            if len(body):
+                body = sanitize_body(content_type, body[:])
+            spans = [(True, 0, len(body))]
+
+        with self._lock:
+            stored = []
+            size = 0
+            for is_file, start, end in spans:
+                if not is_file:
+                    data = sanitize_body(content_type, body[start:end])
+                    # latin-1 maps every byte to one character, so the framing round-trips exactly
+                    stored.append({"inline": data.decode("latin-1")})
+                    size += len(data)
+                    continue
+                stored.append({"blob": self._write_blob(body, start, end)})
+                size += end - start
+
+            entry = {
+                "offset": round(offset, 6),
+                "method": method,
+                "path": path,
+                "headers": headers,
+                "size": size,
+                "segments": stored,
+                "status": status,
+                "duration": round(duration, 6) if duration is not None else None
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self.index_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+            if self._count is not None:
+                self._count += 1
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the recorded requests in recording order.
+
+        Yields:
+            Index entries
+        """
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def load_segments(self, entry: Dict[str, Any], cache: Optional[Dict[str, bytes]] = None) -> List[bytes]:
+        """
+        Read the body of a recorded request as a list of segments.
+
+        Args:
+            entry: Index entry
+            cache: Optional dict of blobs already read, keyed by digest
+
+        Returns:
+            Segments whose concatenation is the request body
+        """
+        segments = []
+        for segment in entry["segments"]:
+            if "inline" in segment:
+                segments.append(segment["inline"].encode("latin-1"))
+                continue
+            digest = segment["blob"]
+            data = cache.get(digest) if cache is not None else None
+            if data is None:
+                data = self._read_blob(digest)
+                if cache is not None:
+                    cache[digest] = data
+            segments.append(data)
+        return segments
+
+    def load_body(self, entry: Dict[str, Any]) -> bytes:
+        """
+        Read the body of a recorded request.
+
+        Args:
+            entry: Index entry
+
+        Returns:
+            Request body
+        """
+        return b"".join(self.load_segments(entry))
+
+    def disk_bytes(self) -> int:
+        """
+        Get the size of the corpus on disk.
+
+        Returns:
+            Total size of the index and blobs in bytes
+        """
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _write_blob(self, body, start: int, end: int) -> str:
+        digest = hashlib.sha256()
+        for i in range(start, end, BLOB_CHUNK_BYTES):
+            digest.update(body[i:min(i + BLOB_CHUNK_BYTES, end)])
+        digest = digest.hexdigest()
+
+        path = self._blob_path(digest)
+        if os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressor = zlib.compressobj(6)
+        with open(path + ".tmp", "wb") as f:
+            f.write(b"z")
+            for i in range(start, end, BLOB_CHUNK_BYTES):
+                f.write(compressor.compress(body[i:min(i + BLOB_CHUNK_BYTES, end)]))
+            f.write(compressor.flush())
+            if f.tell() - 1 >= 0.9 * (end - start):
+                # Not worth compressing, store the raw bytes instead
+                f.seek(0)
+                f.truncate()
+                f.write(b"r")
+                for i in range(start, end, BLOB_CHUNK_BYTES):
+                    f.write(body[i:min(i + BLOB_CHUNK_BYTES, end)])
+        os.replace(path + ".tmp", path)
+        return digest
+
+    def _read_blob(self, digest: str) -> bytes:
+        with open(self._blob_path(digest), "rb") as f:
+            data = f.read()
+        return zlib.decompress(data[1:]) if data[:1] == b"z" else data[1:]
+
+
+class TrafficRecorderMiddleware:
+    """
+    ASGI middleware recording a sample of requests into a TrafficCorpus.
+
+    Only POST requests to the configured path suffixes are recorded, only
+    the Content-Type header is kept and bodies are sanitized with
+    sanitize_body(); requests with a body of any other type than
+    SANITIZED_TYPES are skipped. The body is copied to a SpooledTemporaryFile while
+    the application reads it: small bodies stay in memory, larger ones go
+    to disk and are memory-mapped when written to the corpus, so uploads
+    are never held in memory a second time. Requests larger than
+    `max_body_bytes` are not recorded. Recording stops once the corpus
+    holds `max_requests` requests.
+    """
+
+    def __init__(self, app, corpus_dir: str = "traffic", sample_rate: float = 1.0,
+                 max_requests: int = 10000, max_body_bytes: int = 100 * 1024 * 1024,
+                 paths: Tuple[str, ...] = RECORDED_PATHS):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            corpus_dir: Corpus directory
+            sample_rate: Fraction of matching requests recorded
+            max_requests: Corpus size at which recording stops
+            max_body_bytes: Largest body recorded
+            paths: Path suffixes of the recorded endpoints
+        """
+        self.app = app
+        self.corpus = TrafficCorpus(corpus_dir)
+        self.sample_rate = sample_rate
+        self.max_requests = max_requests
+        self.max_body_bytes = max_body_bytes
+        self.paths = tuple(paths)
+        self._started = time.monotonic()
+        self._full = False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._should_record(scope):
+            await self.app(scope, receive, send)
+            return
+
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        size = 0
+        status = None
+
+        async def recording_receive():
+            nonlocal size
+            message = await receive()
+            if message["type"] == "http.request" and size <= self.max_body_bytes:
+                body = message.get("body", b"")
+                size += len(body)
+                if size > self.max_body_bytes:
+                    spool.close()
+                elif size > SPOOL_BYTES:
+                    # Spooled to disk, keep the write off the event loop
+                    await asyncio.get_running_loop().run_in_executor(None, spool.write, body)
+                else:
+                    spool.write(body)
+            return message
+
+        async def recording_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            arrival = time.monotonic()
+            await self.app(scope, recording_receive, recording_send)
+            duration = time.monotonic() - arrival
+            headers = self._kept_headers(scope)
+            if size > self.max_body_bytes or (size and not can_sanitize(headers.get("content-type", ""))):
+                return
+
+            path = scope["path"] + (f"?{scope['query_string'].decode('latin-1')}" if scope.get("query_string") else "")
+
+            def write():
+                spool.seek(0)
+                if size <= SPOOL_BYTES:
+                    body = spool.read()
+                    self.corpus.append(scope["method"], path, headers, body,
+                                       arrival - self._started, status, duration)
+                    return
+                with mmap.mmap(spool.fileno(), 0, access=mmap.ACCESS_READ) as body:
+                    self.corpus.append(scope["method"], path, headers, body,
+                                       arrival - self._started, status, duration)
+
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, write)
+            except Exception as e:
+                logger.error(f"Error recording request to {path}: {str(e)}")
+        finally:
+            spool.close()
+
+    def _should_record(self, scope) -> bool:
+        """
+        Decide whether to record a request.
+
+        Args:
+            scope: ASGI connection scope
+
+        Returns:
+            True if the request should be recorded
+        """
+        if scope.get("method") != "POST" or not scope["path"].endswith(self.paths):
+            return False
+        content_type = self._kept_headers(scope).get("content-type")
+        if content_type is not None and not can_sanitize(content_type):
+            return False
+        if self._full or len(self.corpus) >= self.max_requests:
+            if not self._full:
+                logger.warning(f"Traffic corpus {self.corpus.directory} is full, recording stopped")
+            self._full = True
+            return False
+        return random.random() < self.sample_rate
+
+    @staticmethod
+    def _kept_headers(scope) -> Dict[str, str]:
+        return {
+            name.decode("latin-1").lower(): value.decode("latin-1")
+            for name, value in scope.get("headers") or []
+            if name.decode("latin-1").lower() in KEPT_HEADERS
+        }
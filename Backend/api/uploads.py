@@ -0,0 +1,123 @@
+"""
+Upload size enforcement for multipart requests.
+"""
+
+from typing import BinaryIO
+import asyncio
+import logging
+import shutil
+import tempfile
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+from helpers import get_file_size
+
+logger = logging.getLogger(__name__)
+
+class UploadTooLargeError(HTTPException):
+    """Raised when a request body or an uploaded file exceeds the size limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Upload exceeds the maximum size of {max_bytes // (1024 * 1024)} MB"
+        )
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that bounds the size of request bodies.
+
+    Requests that announce a larger Content-Length are rejected before any of
+    the body is read. Otherwise the body is counted as it arrives, so a
+    chunked or mislabelled upload is cut off as soon as it crosses the limit
+    instead of being spooled to the end first.
+    """
+
+    def __init__(self, app, max_body_size: int):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: Wrapped ASGI application
+            max_body_size: Maximum request body size in bytes
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() \
+                and int(content_length) > self.max_body_size:
+            error = UploadTooLargeError(self.max_body_size)
+            response = JSONResponse({"detail": error.detail}, status_code=error.status_code)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    logger.warning(f"Rejected request body over {self.max_body_size} bytes")
+                    raise UploadTooLargeError(self.max_body_size)
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+def open_upload(upload: UploadFile, max_bytes: int) -> BinaryIO:
+    """
+    Validate an uploaded file and return its spooled file handle.
+
+    The multipart parser already streams each part into a spooled temporary
+    file, so the handle can be passed on without copying the content.
+
+    Args:
+        upload: Uploaded file
+        max_bytes: Maximum allowed size in bytes
+
+    Returns:
+        File handle positioned at the start of the content
+    """
+    size = get_file_size(upload.file)
+    if size > max_bytes:
+        raise UploadTooLargeError(max_bytes)
+
+    upload.file.seek(0)
+    return upload.file
+
+
+async def copy_upload(upload: UploadFile, max_bytes: int) -> BinaryIO:
+    """
+    Validate an uploaded file and copy it to a temporary file owned by the caller.
+
+    Uploaded files are closed when the request ends, so background jobs that
+    outlive the request need their own copy. The caller must close it.
+
+    Args:
+        upload: Uploaded file
+        max_bytes: Maximum allowed size in bytes
+
+    Returns:
+        Temporary file handle positioned at the start of the content
+    """
+    source = open_upload(upload, max_bytes)
+
+    def copy() -> BinaryIO:
+        target = tempfile.TemporaryFile()
+        shutil.copyfileobj(source, target, 1024 * 1024)
+        target.seek(0)
+        return target
+
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, copy)
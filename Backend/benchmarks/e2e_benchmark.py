@@ -0,0 +1,420 @@
+"""
+Offline end-to-end benchmark of the /process and /tasks endpoints.
+
+Starts a fake Groq API (benchmarks.fakes.FakeGroqServer) with configurable
+latency and error injection, runs the real application in process against
+it with an in-memory Neo4j stand-in seeded with synthetic tasks, and
+measures throughput and p50/p95/p99 latency per endpoint, modality mix and
+concurrency level. Requests go through the full ASGI stack (middleware,
+multipart parsing, routes) without a network hop to the app itself.
+
+Results are written as JSON; --compare checks them against an earlier run
+and exits with status 1 when p95 latency or throughput regressed by more
+than --tolerance or the error rate grew by more than a percentage point.
+
+Usage (from the Backend directory):
+    python -m benchmarks.e2e_benchmark --concurrency 1,8,32 --requests 200 --output bench.json
+    python -m benchmarks.e2e_benchmark --groq-error-rate 0.05 --compare bench.json
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import argparse
+import asyncio
+import io
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.fakes import FakeGroqServer, InMemoryNeo4jClient
+from benchmarks.similar_tasks_benchmark import percentile
+from api.embedding_provider import HashedNgramEmbeddingProvider
+
+logger = logging.getLogger(__name__)
+
+# Share of requests with each kind of input per modality mix
+MIXES = {
+    "text": {"text": 1.0},
+    "image": {"image": 1.0},
+    "video": {"video": 1.0},
+    "mixed": {"text": 0.6, "image": 0.3, "video": 0.1}
+}
+
+WORDS = (
+    "robot arm pick place sort package warehouse shelf camera grasp object label "
+    "scan barcode inspect defect weld assemble screw bolt paint clean floor wipe "
+    "table fold laundry cook kitchen serve drink pour water open door drawer"
+).split()
+
+
+def synthetic_text(rng: random.Random) -> str:
+    """
+    Generate a unique task description.
+
+    Args:
+        rng: Random number generator
+
+    Returns:
+        Text made of domain words and a unique suffix, so caches do not hit
+    """
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 30)))
+    return f"{words} ({uuid.uuid4().hex[:8]})"
+
+
+def synthetic_image(rng: np.random.Generator, width: int = 640, height: int = 480) -> bytes:
+    """
+    Generate a noisy gradient image encoded as JPEG.
+
+    Args:
+        rng: Random number generator
+        width: Image width
+        height: Image height
+
+    Returns:
+        JPEG bytes
+    """
+    from PIL import Image
+
+    gradient = np.linspace(0, 255, width, dtype=np.float32)[None, :, None]
+    pixels = gradient + rng.normal(scale=40.0, size=(height, width, 3))
+    image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def synthetic_video(rng: np.random.Generator, seconds: int = 3, fps: int = 10,
+                    width: int = 320, height: int = 240) -> Optional[bytes]:
+    """
+    Generate a short MP4 video with moving content.
+
+    Args:
+        rng: Random number generator
+        seconds: Duration
+        fps: Frames per second
+        width: Frame width
+        height: Frame height
+
+    Returns:
+        MP4 bytes, or None if PyAV cannot encode video here
+    """
+    try:
+        import av
+
+        buffer = io.BytesIO()
+        with av.open(buffer, mode="w", format="mp4") as container:
+            stream = container.add_stream("mpeg4", rate=fps)
+            stream.width = width
+            stream.height = height
+            stream.pix_fmt = "yuv420p"
+            base = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+            for i in range(seconds * fps):
+                frame = av.VideoFrame.from_ndarray(np.roll(base, i * 8, axis=1), format="rgb24")
+                for packet in stream.encode(frame):
+                    container.mux(packet)
+            for packet in stream.encode():
+                container.mux(packet)
+        return buffer.getvalue()
+    except Exception as e:
+        logger.warning(f"Cannot generate a synthetic video, skipping video inputs: {str(e)}")
+        return None
+
+
+class Workload:
+    """
+    Builds the requests of a benchmark run from pre-generated media.
+    """
+
+    def __init__(self, seed: int, image_count: int = 8):
+        """
+        Pre-generate the media attached to requests.
+
+        Args:
+            seed: Random seed
+            image_count: Number of distinct images
+        """
+        self.rng = random.Random(seed)
+        np_rng = np.random.default_rng(seed)
+        self.images = [synthetic_image(np_rng) for _ in range(image_count)]
+        self.video = synthetic_video(np_rng)
+
+    def kinds(self, mix: str) -> Dict[str, float]:
+        """
+        Get the input kinds of a mix that can be generated here.
+
+        Args:
+            mix: Modality mix name
+
+        Returns:
+            Weights per input kind
+        """
+        weights = dict(MIXES[mix])
+        if self.video is None:
+            weights.pop("video", None)
+        return weights
+
+    def process_request(self, mix: str) -> Dict[str, Any]:
+        """
+        Build the keyword arguments of a /process request.
+
+        Args:
+            mix: Modality mix name
+
+        Returns:
+            httpx request arguments
+        """
+        weights = self.kinds(mix)
+        kind = self.rng.choices(list(weights), weights=list(weights.values()))[0]
+        files = []
+        if kind == "image":
+            files.append(("images", ("image.jpg", self.rng.choice(self.images), "image/jpeg")))
+        elif kind == "video":
+            files.append(("video", ("video.mp4", self.video, "video/mp4")))
+        return {"data": {"text": synthetic_text(self.rng)}, "files": files or None}
+
+    def task_request(self) -> Dict[str, Any]:
+        """
+        Build the keyword arguments of a /tasks request.
+
+        Returns:
+            httpx request arguments
+        """
+        return {"json": {
+            "title": " ".join(self.rng.choice(WORDS) for _ in range(4)).capitalize(),
+            "description": synthetic_text(self.rng),
+            "metadata": {"source": "benchmark"}
+        }}
+
+
+async def run_level(client: httpx.AsyncClient, path: str, build, concurrency: int,
+                    count: int) -> Dict[str, Any]:
+    """
+    Send `count` requests with `concurrency` requests in flight.
+
+    Args:
+        client: HTTP client bound to the application
+        path: Request path
+        build: Callable returning the request arguments
+        concurrency: Number of concurrent workers
+        count: Total number of requests
+
+    Returns:
+        Measurements of the level
+    """
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    remaining = count
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            request = build()
+            start = time.perf_counter()
+            try:
+                response = await client.post(path, **request)
+                status = str(response.status_code)
+                if response.status_code == 200 and response.json().get("degraded"):
+                    status = "200-degraded"
+            except Exception as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    ok = statuses.get("200", 0) + statuses.get("200-degraded", 0)
+    return {
+        "requests": count,
+        "statuses": statuses,
+        "error_rate": 1.0 - ok / count if count else 0.0,
+        "throughput_rps": count / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "mean": 1000.0 * sum(latencies) / len(latencies),
+            "p50": 1000.0 * percentile(latencies, 50),
+            "p95": 1000.0 * percentile(latencies, 95),
+            "p99": 1000.0 * percentile(latencies, 99),
+            "max": 1000.0 * max(latencies)
+        }
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Run the benchmark.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Report with the run configuration and one result per level
+    """
+    groq = FakeGroqServer(latency_ms=args.groq_latency_ms, jitter_ms=args.groq_jitter_ms,
+                          error_rate=args.groq_error_rate, throttle_rate=args.groq_throttle_rate,
+                          seed=args.seed)
+    base_url = await groq.start()
+
+    # Settings are read once, when the application is created
+    os.environ["GROQ_BASE_URL"] = base_url
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    import main
+    from api.routes import router
+    # The application configures INFO logging on import; keep the output readable
+    logging.getLogger().setLevel(args.log_level)
+
+    app = main.create_app()
+    prefix = main.get_settings().api_prefix + router.prefix
+
+    neo4j_client = InMemoryNeo4jClient(query_latency_ms=args.neo4j_latency_ms)
+    embedder = HashedNgramEmbeddingProvider()
+    seed_rng = random.Random(args.seed)
+    seed_texts = [synthetic_text(seed_rng) for _ in range(args.seed_tasks)]
+    await neo4j_client.create_tasks([
+        {"title": text[:40], "description": text, "embedding": embedder.embed_text(text), "metadata": {}}
+        for text in seed_texts
+    ])
+    app.state.neo4j_client = neo4j_client
+
+    workload = Workload(args.seed)
+    results = []
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark",
+                                         timeout=args.timeout) as client:
+                levels: List[Tuple[str, str, Any]] = []
+                if "process" in args.endpoints:
+                    for mix in args.mixes:
+                        if not workload.kinds(mix):
+                            print(f"Skipping mix {mix}: no inputs can be generated")
+                            continue
+                        levels.append(("process", mix, lambda mix=mix: workload.process_request(mix)))
+                if "tasks" in args.endpoints:
+                    levels.append(("tasks", "text", workload.task_request))
+
+                for endpoint, mix, build in levels:
+                    path = f"{prefix}/{endpoint}"
+                    if args.warmup > 0:
+                        await run_level(client, path, build, 1, args.warmup)
+                    for concurrency in args.concurrency:
+                        result = await run_level(client, path, build, concurrency, args.requests)
+                        result.update({"endpoint": endpoint, "mix": mix, "concurrency": concurrency})
+                        results.append(result)
+                        latency = result["latency_ms"]
+                        print(f"{endpoint:>7} {mix:>6} c={concurrency:<4} {result['throughput_rps']:>8.1f} req/s  "
+                              f"p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  p99 {latency['p99']:>8.1f} ms  "
+                              f"errors {result['error_rate']:.1%}")
+    finally:
+        await groq.close()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")}
+        },
+        "fake_groq": groq.counts,
+        "results": results
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Get the current commit hash, if the code runs from a git checkout."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Find levels that got slower than in a baseline run.
+
+    Args:
+        report: Current report
+        baseline: Earlier report
+        tolerance: Allowed relative change, e.g. 0.15 for 15%
+
+    Returns:
+        Description of every regression
+    """
+    def key(result):
+        return result["endpoint"], result["mix"], result["concurrency"]
+
+    previous = {key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        old = previous.get(key(result))
+        if old is None:
+            continue
+        name = "{} {} c={}".format(*key(result))
+        p95, old_p95 = result["latency_ms"]["p95"], old["latency_ms"]["p95"]
+        if p95 > old_p95 * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old_p95:.1f} -> {p95:.1f} ms")
+        rps, old_rps = result["throughput_rps"], old["throughput_rps"]
+        if rps < old_rps * (1 - tolerance):
+            regressions.append(f"{name}: throughput {old_rps:.1f} -> {rps:.1f} req/s")
+        if result["error_rate"] > old["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {old['error_rate']:.1%} -> {result['error_rate']:.1%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of /process and /tasks")
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--mixes", default="text,image,video,mixed", help="Comma-separated modality mixes")
+    parser.add_argument("--endpoints", default="process,tasks", help="Comma-separated endpoints")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each endpoint and mix")
+    parser.add_argument("--seed-tasks", type=int, default=1000, help="Synthetic tasks in the marketplace")
+    parser.add_argument("--groq-latency-ms", type=float, default=50.0, help="Mean fake Groq latency")
+    parser.add_argument("--groq-jitter-ms", type=float, default=15.0, help="Fake Groq latency deviation")
+    parser.add_argument("--groq-error-rate", type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument("--groq-throttle-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--neo4j-latency-ms", type=float, default=1.0, help="Simulated Neo4j round trip")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--log-level", default="WARNING", help="Log level of the application")
+    parser.add_argument("--output", help="Path to write the report as JSON")
+    parser.add_argument("--compare", help="Earlier report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    args.concurrency = [int(value) for value in args.concurrency.split(",")]
+    args.mixes = [mix for mix in args.mixes.split(",") if mix]
+    args.endpoints = [endpoint for endpoint in args.endpoints.split(",") if endpoint]
+    unknown = set(args.mixes) - set(MIXES)
+    if unknown:
+        parser.error(f"Unknown mixes: {', '.join(sorted(unknown))}")
+
+    report = asyncio.run(run(args))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
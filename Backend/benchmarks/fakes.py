@@ -0,0 +1,261 @@
+"""
+Local stand-ins for the Groq API and Neo4j used by the offline benchmarks.
+
+FakeGroqServer is a real HTTP server speaking the subset of the Groq API
+the backend uses, so the whole client stack (connection pool, rate
+limiting, retries, circuit breaker) is exercised. InMemoryNeo4jClient has
+the interface of Neo4jClient but keeps tasks in a LocalVectorIndex.
+"""
+
+from typing import Dict, List, Any, Optional, Callable
+import asyncio
+import json
+import logging
+import random
+import uuid
+
+from aiohttp import web
+
+from api.embedding_provider import HashedNgramEmbeddingProvider
+from database.vector_index import LocalVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class FakeGroqServer:
+    """
+    HTTP server answering /chat/completions and /embeddings like Groq.
+
+    Every response is delayed by a normally distributed latency, and a
+    configurable fraction of requests fails with 429 (with Retry-After) or
+    500. Embeddings are hashed n-gram vectors, so similar texts get
+    similar embeddings and similarity search behaves realistically.
+    """
+
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 15.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0,
+                 dimensions: int = 1536, host: str = "127.0.0.1", port: int = 0,
+                 seed: Optional[int] = None):
+        """
+        Initialize the server.
+
+        Args:
+            latency_ms: Mean response latency in milliseconds
+            jitter_ms: Standard deviation of the latency
+            error_rate: Fraction of requests answered with 500
+            throttle_rate: Fraction of requests answered with 429
+            dimensions: Embedding dimensionality
+            host: Interface to bind
+            port: Port to bind; 0 picks a free one
+            seed: Optional random seed for latency and error injection
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.host = host
+        self.port = port
+        self.embedder = HashedNgramEmbeddingProvider(dimensions=dimensions)
+        self.counts: Dict[str, int] = {"chat": 0, "embeddings": 0, "throttled": 0, "errors": 0}
+        self._rng = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    async def start(self) -> str:
+        """
+        Start serving.
+
+        Returns:
+            Base URL to configure as GROQ_BASE_URL
+        """
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/v1/chat/completions", self._chat)
+        app.router.add_post("/v1/embeddings", self._embeddings)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Fake Groq API listening on {self.base_url}")
+        return self.base_url
+
+    async def close(self):
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _delay_or_fail(self) -> Optional[web.Response]:
+        """
+        Wait for the simulated latency and decide whether to inject an error.
+
+        Returns:
+            Error response to send, or None to answer normally
+        """
+        await asyncio.sleep(max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000.0)
+        roll = self._rng.random()
+        if roll < self.throttle_rate:
+            self.counts["throttled"] += 1
+            return web.json_response({"error": {"message": "Rate limit reached"}}, status=429,
+                                     headers={"Retry-After": "0.1"})
+        if roll < self.throttle_rate + self.error_rate:
+            self.counts["errors"] += 1
+            return web.json_response({"error": {"message": "Injected server error"}}, status=500)
+        return None
+
+    async def _chat(self, request: web.Request) -> web.StreamResponse:
+        self.counts["chat"] += 1
+        payload = await request.json()
+        error = await self._delay_or_fail()
+        if error is not None:
+            return error
+
+        prompt = payload["messages"][-1]["content"]
+        if not isinstance(prompt, str):
+            prompt = " ".join(part.get("text", "") for part in prompt if isinstance(part, dict))
+        content = "Summary: " + " ".join(prompt.split()[:24])
+
+        if not payload.get("stream"):
+            return web.json_response({"choices": [{"message": {"role": "assistant", "content": content}}]})
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for word in content.split(" "):
+            chunk = {"choices": [{"delta": {"content": word + " "}}]}
+            await response.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def _embeddings(self, request: web.Request) -> web.Response:
+        self.counts["embeddings"] += 1
+        payload = await request.json()
+        error = await self._delay_or_fail()
+        if error is not None:
+            return error
+
+        texts = payload["input"]
+        if isinstance(texts, str):
+            texts = [texts]
+        return web.json_response({
+            "data": [
+                {"index": i, "embedding": self.embedder.embed_text(text)}
+                for i, text in enumerate(texts)
+            ]
+        })
+
+
+class InMemoryNeo4jClient:
+    """
+    Stand-in for Neo4jClient keeping tasks in process memory.
+
+    Searches go through the same LocalVectorIndex the real client uses;
+    `query_latency_ms` adds a simulated database round trip to every call
+    that would reach Neo4j.
+    """
+
+    def __init__(self, dimensions: int = 1536, query_latency_ms: float = 0.0):
+        """
+        Initialize an empty store.
+
+        Args:
+            dimensions: Embedding dimensionality
+            query_latency_ms: Simulated round trip per database call
+        """
+        self.local_index = LocalVectorIndex(dimensions=dimensions)
+        self.local_index.loaded = True
+        self.query_latency = query_latency_ms / 1000.0
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._task_listeners: List[Callable[[str, str, Optional[List[float]]], None]] = []
+
+    async def _round_trip(self):
+        if self.query_latency > 0:
+            await asyncio.sleep(self.query_latency)
+
+    def add_task_listener(self, listener: Callable[[str, str, Optional[List[float]]], None]):
+        self._task_listeners.append(listener)
+
+    def _notify_task_changed(self, event: str, task_id: str, embedding: Optional[List[float]] = None):
+        for listener in self._task_listeners:
+            listener(event, task_id, embedding)
+
+    async def setup_schema(self):
+        pass
+
+    async def load_local_index(self):
+        self.local_index.load(self._tasks.values())
+
+    def start_local_index_refresh(self):
+        pass
+
+    async def close(self):
+        pass
+
+    async def create_task(self, title: str, description: str,
+                          embedding: List[float], metadata: Dict[str, Any]) -> str:
+        await self._round_trip()
+        task_id = str(uuid.uuid4())
+        self._store(task_id, title, description, embedding, metadata)
+        return task_id
+
+    async def create_tasks(self, tasks: List[Dict[str, Any]], batch_size: int = 500,
+                           progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        created_ids = []
+        batches = []
+        for start in range(0, len(tasks), batch_size):
+            await self._round_trip()
+            chunk = tasks[start:start + batch_size]
+            for task in chunk:
+                task_id = str(uuid.uuid4())
+                self._store(task_id, task["title"], task["description"], task["embedding"], task.get("metadata"))
+                created_ids.append(task_id)
+            report = {"batch": start // batch_size, "size": len(chunk), "created": len(chunk), "error": None}
+            batches.append(report)
+            if progress is not None:
+                progress(report)
+        return {"created": len(created_ids), "failed": 0, "task_ids": created_ids, "batches": batches}
+
+    async def find_similar_tasks(self, embedding: List[float], limit: int = 5,
+                                 threshold: float = 0.7) -> List[Dict[str, Any]]:
+        return self.local_index.search(embedding, limit, threshold)
+
+    async def find_tasks_by_keywords(self, text: str, limit: int = 5,
+                                     threshold: float = 0.3) -> List[Dict[str, Any]]:
+        return self.local_index.keyword_search(text, limit, threshold)
+
+    async def get_task_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
+        await self._round_trip()
+        task = self._tasks.get(task_id)
+        if task is None:
+            return None
+        return {key: task[key] for key in ("id", "title", "description", "metadata")}
+
+    async def update_task(self, task_id: str, updates: Dict[str, Any]) -> bool:
+        await self._round_trip()
+        task = self._tasks.get(task_id)
+        if task is None:
+            return False
+        task.update({key: value for key, value in updates.items() if key not in ("id", "created_at")})
+        if "embedding" in updates:
+            self.local_index.upsert(task_id, updates["embedding"], task)
+        self.local_index.update_payload(task_id, updates)
+        self._notify_task_changed("updated", task_id, updates.get("embedding"))
+        return True
+
+    async def delete_task(self, task_id: str) -> bool:
+        await self._round_trip()
+        deleted = self._tasks.pop(task_id, None) is not None
+        self.local_index.remove(task_id)
+        self._notify_task_changed("deleted", task_id)
+        return deleted
+
+    def _store(self, task_id: str, title: str, description: str,
+               embedding: List[float], metadata: Optional[Dict[str, Any]]):
+        task = {"id": task_id, "title": title, "description": description,
+                "embedding": embedding, "metadata": metadata}
+        self._tasks[task_id] = task
+        self.local_index.upsert(task_id, embedding, task)
+        self._notify_task_changed("created", task_id, embedding)
@@ -0,0 +1,163 @@
+"""
+Fit the coarse projection of the local vector index and report its recall.
+
+Reads the existing Task embeddings from Neo4j (or generates synthetic ones),
+fits a PCA projection, or evaluates the prefix ("Matryoshka") projection,
+and compares coarse-then-rerank search against exact full-dimension search.
+A PCA projection is written to --output; point COARSE_PROJECTION_PATH at it
+and set COARSE_INDEX_MODE=pca. Running workers pick it up on restart, when
+the local index is rebuilt.
+
+Usage (from the Backend directory):
+    python -m benchmarks.fit_coarse_projection --dimensions 256 --output data/coarse_projection.npz
+    python -m benchmarks.fit_coarse_projection --synthetic 20000 --mode prefix
+"""
+
+from typing import Dict, List, Any, Tuple
+import argparse
+import asyncio
+import json
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database.coarse_index import CoarseProjection, PROJECTION_MODES
+from database.vector_index import LocalVectorIndex
+from benchmarks.quantization_report import synthetic_embeddings, recall
+
+
+async def load_task_embeddings() -> Tuple[List[str], np.ndarray]:
+    """
+    Read all Task embeddings from Neo4j.
+
+    Returns:
+        Tuple of (task IDs, array of shape (n, dimensions))
+    """
+    from config.settings import get_settings
+    from database.neo4j_client import Neo4jClient
+
+    config = get_settings().dict()["neo4j"]
+    client = Neo4jClient.from_config({**config, "local_index_enabled": False})
+    try:
+        async with client.driver.session() as session:
+            result = await session.run(
+                "MATCH (t:Task) WHERE t.embedding IS NOT NULL RETURN t.id AS id, t.embedding AS embedding"
+            )
+            records = [dict(record) async for record in result]
+    finally:
+        await client.close()
+
+    dimensions = config.get("embedding_dimensions", 1536)
+    records = [r for r in records if len(r["embedding"]) == dimensions]
+    ids = [r["id"] for r in records]
+    vectors = np.array([r["embedding"] for r in records], dtype=np.float32).reshape(-1, dimensions)
+    return ids, vectors
+
+
+def evaluate(ids: List[str], vectors: np.ndarray, projection: CoarseProjection, query_count: int,
+             k: int, oversample: int, seed: int) -> Dict[str, Any]:
+    """
+    Compare coarse-then-rerank search against exact search.
+
+    Args:
+        ids: Task IDs
+        vectors: Task embeddings
+        projection: Projection to evaluate
+        query_count: Number of queries, perturbed copies of stored embeddings
+        k: Results per query
+        oversample: Coarse candidates per result
+        seed: Random seed
+
+    Returns:
+        Report dictionary
+    """
+    rng = np.random.default_rng(seed)
+    size, dimensions = vectors.shape
+    scale = float(np.mean(np.linalg.norm(vectors, axis=1))) / np.sqrt(dimensions)
+    queries = vectors[rng.integers(0, size, size=query_count)] \
+        + rng.normal(scale=0.5 * scale, size=(query_count, dimensions)).astype(np.float32)
+
+    records = [{"id": task_id, "embedding": vector} for task_id, vector in zip(ids, vectors)]
+    exact_index = LocalVectorIndex(dimensions=dimensions)
+    exact_index.load(records)
+    coarse_index = LocalVectorIndex(dimensions=dimensions, projection=projection,
+                                    coarse_oversample=oversample)
+    coarse_index.load(records)
+
+    def timed(index: LocalVectorIndex) -> Tuple[List[List[str]], float]:
+        start = time.perf_counter()
+        found = [[r["id"] for r in index.search(q, k, -1.0)] for q in queries]
+        return found, (time.perf_counter() - start) * 1000.0 / query_count
+
+    exact, exact_ms = timed(exact_index)
+    coarse, coarse_ms = timed(coarse_index)
+    return {
+        "mode": projection.mode,
+        "tasks": size,
+        "dimensions": projection.dimensions,
+        "explained_variance": projection.explained_variance,
+        "recall_at_k": recall(exact, coarse),
+        "exact_ms": exact_ms,
+        "coarse_ms": coarse_ms,
+        "speedup": exact_ms / coarse_ms if coarse_ms > 0 else None,
+        "coarse_active": size >= LocalVectorIndex.COARSE_MIN_ROWS and k * oversample < size
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit and evaluate the coarse vector index projection")
+    parser.add_argument("--mode", choices=PROJECTION_MODES, default="pca", help="Projection mode")
+    parser.add_argument("--dimensions", type=int, default=256, help="Coarse dimensionality")
+    parser.add_argument("--output", default="data/coarse_projection.npz", help="Where to write a PCA projection")
+    parser.add_argument("--sample", type=int, default=20000, help="Maximum embeddings used for fitting")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Use this many synthetic embeddings instead of Neo4j")
+    parser.add_argument("--embedding-dimensions", type=int, default=1536,
+                        help="Dimensionality of synthetic embeddings")
+    parser.add_argument("--queries", type=int, default=200, help="Number of evaluation queries")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--oversample", type=int, default=10, help="Coarse candidates per result")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--json", dest="json_path", help="Optional path to write the report as JSON")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        rng = np.random.default_rng(args.seed)
+        vectors = synthetic_embeddings(args.synthetic, args.embedding_dimensions,
+                                       max(8, args.synthetic // 200), rng)
+        ids = [str(i) for i in range(args.synthetic)]
+    else:
+        ids, vectors = asyncio.run(load_task_embeddings())
+    if len(ids) == 0:
+        sys.exit("No task embeddings found")
+
+    if args.mode == "pca":
+        projection = CoarseProjection.fit_pca(vectors, args.dimensions, sample_size=args.sample, seed=args.seed)
+    else:
+        projection = CoarseProjection.prefix(vectors.shape[1], args.dimensions)
+
+    report = evaluate(ids, vectors, projection, args.queries, args.k, args.oversample, args.seed)
+    explained = report["explained_variance"]
+    print(f"{report['mode']} projection to {report['dimensions']} dimensions over {report['tasks']} tasks"
+          + (f", {explained:.1%} of the energy kept" if explained is not None else ""))
+    print(f"recall@{args.k}: {report['recall_at_k']:.3f}")
+    print(f"exact: {report['exact_ms']:.2f} ms/query, coarse + rerank: {report['coarse_ms']:.2f} ms/query "
+          f"({report['speedup']:.1f}x)")
+    if not report["coarse_active"]:
+        print(f"Note: indexes smaller than {LocalVectorIndex.COARSE_MIN_ROWS} tasks are always searched exactly")
+
+    if projection.mode == "pca" and not args.synthetic:
+        projection.save(args.output)
+        print(f"Projection written to {args.output}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
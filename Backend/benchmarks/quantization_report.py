@@ -0,0 +1,138 @@
+"""
+Recall-vs-memory report for compact embedding storage.
+
+Builds a LocalVectorIndex in each supported precision over synthetic,
+clustered embeddings and compares top-k results against exact float32
+search, both for the compact scores alone and after re-ranking the
+oversampled candidates with full-precision vectors.
+
+Usage (from the Backend directory):
+    python -m benchmarks.quantization_report --size 20000 --queries 200
+"""
+
+from typing import Dict, List, Any
+import argparse
+import json
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from database.quantization import PRECISIONS
+from database.vector_index import LocalVectorIndex
+
+
+def synthetic_embeddings(size: int, dimensions: int, clusters: int,
+                         rng: np.random.Generator) -> np.ndarray:
+    """
+    Generate clustered embeddings that resemble real topic structure.
+
+    Args:
+        size: Number of embeddings
+        dimensions: Embedding dimensionality
+        clusters: Number of topic clusters
+        rng: Random number generator
+
+    Returns:
+        Array of shape (size, dimensions)
+    """
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    assignment = rng.integers(0, clusters, size=size)
+    noise = rng.normal(scale=0.6, size=(size, dimensions)).astype(np.float32)
+    return centers[assignment] + noise
+
+
+def recall(expected: List[List[str]], actual: List[List[str]]) -> float:
+    """
+    Average fraction of the expected IDs that were returned.
+
+    Args:
+        expected: Exact top-k IDs per query
+        actual: Returned top-k IDs per query
+
+    Returns:
+        Mean recall
+    """
+    hits = [len(set(e) & set(a)) / len(e) for e, a in zip(expected, actual) if e]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def run(size: int, dimensions: int, query_count: int, k: int, oversample: int,
+        seed: int) -> List[Dict[str, Any]]:
+    """
+    Build one index per precision and measure recall, memory and latency.
+
+    Args:
+        size: Number of indexed embeddings
+        dimensions: Embedding dimensionality
+        query_count: Number of queries
+        k: Results per query
+        oversample: Candidates per result for re-ranking
+        seed: Random seed
+
+    Returns:
+        One report row per precision
+    """
+    rng = np.random.default_rng(seed)
+    vectors = synthetic_embeddings(size, dimensions, max(8, size // 200), rng)
+    ids = [str(i) for i in range(size)]
+    queries = vectors[rng.integers(0, size, size=query_count)] \
+        + rng.normal(scale=0.4, size=(query_count, dimensions)).astype(np.float32)
+
+    records = [{"id": task_id, "embedding": vector} for task_id, vector in zip(ids, vectors)]
+    exact_index = LocalVectorIndex(dimensions=dimensions, precision="float32")
+    exact_index.load(records)
+    exact = [[r["id"] for r in exact_index.search(q, k, -1.0)] for q in queries]
+
+    rows = []
+    for precision in PRECISIONS:
+        index = LocalVectorIndex(dimensions=dimensions, precision=precision, rescore_oversample=oversample)
+        index.load(records)
+
+        approximate = [index.search_candidates(q, k) for q in queries]
+
+        # Compact indexes re-rank from their memory-mapped float32 rows
+        start = time.perf_counter()
+        rescored = [[r["id"] for r in index.search(q, k, -1.0)] for q in queries]
+        search_ms = (time.perf_counter() - start) * 1000.0 / query_count
+
+        rows.append({
+            "precision": precision,
+            "memory_mb": index.memory_bytes() / (1024 * 1024),
+            "bytes_per_vector": index.memory_bytes() / size,
+            "recall_at_k": recall(exact, approximate),
+            "recall_at_k_rescored": recall(exact, rescored),
+            "search_ms": search_ms
+        })
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall vs memory for compact embedding storage")
+    parser.add_argument("--size", type=int, default=20000, help="Number of indexed embeddings")
+    parser.add_argument("--dimensions", type=int, default=1536, help="Embedding dimensionality")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries")
+    parser.add_argument("--k", type=int, default=5, help="Results per query")
+    parser.add_argument("--oversample", type=int, default=4, help="Candidates per result for re-ranking")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--json", dest="json_path", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    rows = run(args.size, args.dimensions, args.queries, args.k, args.oversample, args.seed)
+
+    print(f"{'precision':>9} | {'MB':>8} | {'B/vec':>7} | {'recall@k':>8} | {'rescored':>8} | {'ms/query':>8}")
+    for row in rows:
+        print(f"{row['precision']:>9} | {row['memory_mb']:>8.1f} | {row['bytes_per_vector']:>7.0f} | "
+              f"{row['recall_at_k']:>8.3f} | {row['recall_at_k_rescored']:>8.3f} | {row['search_ms']:>8.2f}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
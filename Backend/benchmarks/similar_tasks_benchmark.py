@@ -0,0 +1,244 @@
+"""
+Benchmark for Neo4jClient.find_similar_tasks.
+
+Seeds synthetic Task nodes into the configured Neo4j database and measures
+how lookup latency scales with marketplace size, comparing the native vector
+index against the full label scan. Seeded nodes are tagged and removed again
+when the run finishes.
+
+Usage (from the Backend directory):
+    python -m benchmarks.similar_tasks_benchmark --sizes 1000,5000,20000 --queries 50
+"""
+
+from typing import Dict, List, Any, Optional
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.settings import get_settings
+from database.neo4j_client import Neo4jClient
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = 1536
+SEED_BATCH_SIZE = 500
+
+
+def random_embedding(rng: random.Random) -> List[float]:
+    """
+    Generate a random unit-length embedding.
+
+    Args:
+        rng: Random number generator
+
+    Returns:
+        Embedding as list of floats
+    """
+    vector = [rng.gauss(0.0, 1.0) for _ in range(DIMENSIONS)]
+    norm = sum(v * v for v in vector) ** 0.5
+    return [v / norm for v in vector]
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """
+    Return the given percentile of a list of samples.
+
+    Args:
+        samples: Latency samples
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value
+    """
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+async def seed_tasks(client: Neo4jClient, count: int, rng: random.Random) -> None:
+    """
+    Create benchmark Task nodes in batches.
+
+    Args:
+        client: Neo4j client
+        count: Number of nodes to create
+        rng: Random number generator
+    """
+    query = """
+    UNWIND $rows AS row
+    CREATE (t:Task {
+        id: row.id,
+        title: row.title,
+        description: row.description,
+        embedding: row.embedding,
+        created_at: datetime(),
+        benchmark: true
+    })
+    """
+    created = 0
+    async with client.driver.session() as session:
+        while created < count:
+            batch = min(SEED_BATCH_SIZE, count - created)
+            rows = [
+                {
+                    "id": f"bench-{time.time_ns()}-{created + i}",
+                    "title": f"Benchmark task {created + i}",
+                    "description": "Synthetic task used by the similarity benchmark",
+                    "embedding": random_embedding(rng)
+                }
+                for i in range(batch)
+            ]
+            result = await session.run(query, rows=rows)
+            await result.consume()
+            created += batch
+        result = await session.run("CALL db.awaitIndexes(300)")
+        await result.consume()
+
+
+async def remove_seeded_tasks(client: Neo4jClient) -> None:
+    """Remove all Task nodes created by the benchmark."""
+    async with client.driver.session() as session:
+        result = await session.run("""
+        MATCH (t:Task {benchmark: true})
+        CALL { WITH t DETACH DELETE t } IN TRANSACTIONS OF 1000 ROWS
+        """)
+        await result.consume()
+
+
+async def time_lookups(client: Neo4jClient, method: str, queries: List[List[float]],
+                       limit: int, threshold: float) -> Optional[Dict[str, float]]:
+    """
+    Time a lookup strategy over a set of query embeddings.
+
+    Args:
+        client: Neo4j client
+        method: Name of the Neo4jClient lookup method to time
+        queries: Query embeddings
+        limit: Maximum number of results per lookup
+        threshold: Similarity threshold
+
+    Returns:
+        Latency statistics in milliseconds, or None if the strategy failed
+    """
+    lookup = getattr(client, method)
+    samples = []
+    async with client.driver.session() as session:
+        try:
+            # Warm up plan caches before measuring
+            await lookup(session, queries[0], limit, threshold)
+            for embedding in queries:
+                start = time.perf_counter()
+                await lookup(session, embedding, limit, threshold)
+                samples.append((time.perf_counter() - start) * 1000.0)
+        except Exception as e:
+            logger.warning(f"{method} failed: {str(e)}")
+            return None
+
+    return {
+        "mean_ms": statistics.mean(samples),
+        "p50_ms": percentile(samples, 50),
+        "p95_ms": percentile(samples, 95),
+        "p99_ms": percentile(samples, 99)
+    }
+
+
+async def run(sizes: List[int], query_count: int, limit: int, threshold: float,
+              seed: int) -> List[Dict[str, Any]]:
+    """
+    Run the benchmark for increasing marketplace sizes.
+
+    Args:
+        sizes: Marketplace sizes to measure, in ascending order
+        query_count: Number of lookups per strategy and size
+        limit: Maximum number of results per lookup
+        threshold: Similarity threshold
+        seed: Random seed
+
+    Returns:
+        One result row per size
+    """
+    settings = get_settings()
+    client = Neo4jClient(
+        uri=settings.neo4j_uri,
+        username=settings.neo4j_username,
+        password=settings.neo4j_password
+    )
+    rng = random.Random(seed)
+    queries = [random_embedding(rng) for _ in range(query_count)]
+    results = []
+    seeded = 0
+
+    try:
+        await client.setup_schema()
+        for size in sorted(sizes):
+            await seed_tasks(client, size - seeded, rng)
+            seeded = size
+
+            row = {
+                "size": size,
+                "vector_index": await time_lookups(client, "_query_vector_index", queries, limit, threshold),
+                "label_scan": await time_lookups(client, "_scan_similar_tasks", queries, limit, threshold)
+            }
+            results.append(row)
+            logger.info(f"Finished size {size}")
+    finally:
+        await remove_seeded_tasks(client)
+        await client.close()
+
+    return results
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """
+    Format benchmark results as a plain text table.
+
+    Args:
+        results: Benchmark result rows
+
+    Returns:
+        Table as string
+    """
+    def cell(stats: Optional[Dict[str, float]], key: str) -> str:
+        return f"{stats[key]:.2f}" if stats else "n/a"
+
+    lines = [f"{'size':>8} | {'index p50':>10} {'index p95':>10} | {'scan p50':>10} {'scan p95':>10}"]
+    for row in results:
+        lines.append(
+            f"{row['size']:>8} | "
+            f"{cell(row['vector_index'], 'p50_ms'):>10} {cell(row['vector_index'], 'p95_ms'):>10} | "
+            f"{cell(row['label_scan'], 'p50_ms'):>10} {cell(row['label_scan'], 'p95_ms'):>10}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark similar-task lookups against Neo4j")
+    parser.add_argument("--sizes", default="1000,5000,20000", help="Comma-separated marketplace sizes")
+    parser.add_argument("--queries", type=int, default=50, help="Lookups per strategy and size")
+    parser.add_argument("--limit", type=int, default=5, help="Results per lookup")
+    parser.add_argument("--threshold", type=float, default=0.7, help="Similarity threshold")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    parser.add_argument("--json", dest="json_path", help="Optional path to write results as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = asyncio.run(run(sizes, args.queries, args.limit, args.threshold, args.seed))
+
+    print(format_table(results))
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,502 @@
+"""
+Record production traffic and replay it against an instance.
+
+Requests are captured into a corpus (api.traffic_recorder.TrafficCorpus)
+either by the application itself, with TRAFFIC_RECORD_ENABLED=true, or by
+the `record` command, a reverse proxy placed in front of an instance. Only
+POST requests to /process and /tasks are recorded, sanitized: headers other
+than Content-Type are dropped, e-mail addresses and phone numbers are
+redacted from text and upload file names are replaced. Images and videos
+are kept as uploaded and stored once per distinct file.
+
+`replay` sends the corpus to a target instance. The default and --rate
+modes are open-loop: every request is sent at its scheduled time whether or
+not earlier ones have completed, and latency is measured from the
+scheduled time, so queueing in the target shows up in the percentiles
+instead of silently lowering the request rate (coordinated omission).
+--concurrency runs a closed loop with a fixed number of requests in flight
+instead, which measures capacity rather than latency under a given load.
+
+Usage (from the Backend directory):
+    python -m benchmarks.traffic_replay record --upstream http://localhost:8000 --port 9000 --corpus traffic
+    python -m benchmarks.traffic_replay info traffic
+    python -m benchmarks.traffic_replay replay traffic --target http://staging:8000 --speed 2
+    python -m benchmarks.traffic_replay replay traffic --target http://staging:8000 --rate 20 --requests 2000
+    python -m benchmarks.traffic_replay replay traffic --target http://staging:8000 --concurrency 16
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+
+import httpx
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.traffic_recorder import RECORDED_PATHS, TrafficCorpus, TrafficRecorderMiddleware
+from benchmarks.similar_tasks_benchmark import percentile
+
+logger = logging.getLogger(__name__)
+
+# Hop-by-hop headers a proxy must not forward
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "te", "trailer", "upgrade",
+               "proxy-authorization", "proxy-authenticate", "host", "content-length"}
+
+_PART_TYPE = re.compile(rb"content-type:\s*(image|video|audio)/", re.IGNORECASE)
+
+
+def request_kind(entry: Dict[str, Any]) -> str:
+    """
+    Describe the inputs of a recorded request.
+
+    Args:
+        entry: Index entry
+
+    Returns:
+        "json", or the media kinds of a multipart upload such as "text+video"
+    """
+    content_type = entry["headers"].get("content-type", "")
+    if not content_type.startswith("multipart/"):
+        return "json" if "json" in content_type else content_type or "empty"
+    if len(entry["segments"]) == 1:
+        # Stored whole, so the form has no uploads
+        return "text"
+    framing = b"".join(segment["inline"].encode("latin-1") for segment in entry["segments"] if "inline" in segment)
+    kinds = {match.group(1).decode().lower() for match in _PART_TYPE.finditer(framing)}
+    if b'name="text"' in framing:
+        kinds.add("text")
+    return "+".join(sorted(kinds)) or "form"
+
+
+class ProxyApp:
+    """
+    ASGI application forwarding every request to an upstream instance.
+
+    Request bodies are streamed upstream and responses are streamed back as
+    they arrive, so uploads are never collected in memory and streaming
+    endpoints keep working behind the proxy.
+    """
+
+    def __init__(self, upstream: str, timeout: float = 300.0):
+        self.upstream = upstream.rstrip("/")
+        self.timeout = timeout
+        self.client: Optional[httpx.AsyncClient] = None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    self.client = httpx.AsyncClient(base_url=self.upstream, timeout=self.timeout)
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.client.aclose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        async def body():
+            # Forward the upload chunk by chunk instead of collecting it first
+            while True:
+                message = await receive()
+                if message["type"] != "http.request":
+                    return
+                yield message.get("body", b"")
+                if not message.get("more_body"):
+                    return
+
+        # Content-Length is kept, so the streamed upload is not sent chunked
+        headers = [(name.decode("latin-1"), value.decode("latin-1"))
+                   for name, value in scope["headers"]
+                   if name.decode("latin-1").lower() not in HOP_HEADERS - {"content-length"}]
+        url = scope["path"] + (f"?{scope['query_string'].decode('latin-1')}" if scope.get("query_string") else "")
+        try:
+            request = self.client.build_request(scope["method"], url, headers=headers, content=body())
+            response = await self.client.send(request, stream=True)
+        except httpx.HTTPError as e:
+            logger.error(f"Error forwarding {scope['method']} {url}: {str(e)}")
+            await send({"type": "http.response.start", "status": 502,
+                        "headers": [(b"content-type", b"text/plain")]})
+            await send({"type": "http.response.body", "body": b"Bad gateway"})
+            return
+
+        try:
+            await send({
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [(name, value) for name, value in response.headers.raw
+                            if name.decode("latin-1").lower() not in HOP_HEADERS]
+            })
+            async for chunk in response.aiter_raw():
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            await response.aclose()
+
+
+def record(args: argparse.Namespace):
+    """
+    Run a recording reverse proxy until interrupted.
+
+    Args:
+        args: Parsed command line arguments
+    """
+    import uvicorn
+
+    app = TrafficRecorderMiddleware(
+        ProxyApp(args.upstream, timeout=args.timeout),
+        corpus_dir=args.corpus,
+        sample_rate=args.sample_rate,
+        max_requests=args.max_requests,
+        max_body_bytes=args.max_body_mb * 1024 * 1024
+    )
+    print(f"Recording {', '.join(RECORDED_PATHS)} requests to {args.corpus}, "
+          f"forwarding http://{args.host}:{args.port} to {args.upstream}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level=args.log_level.lower())
+
+
+def info(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Summarize a corpus.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Corpus summary
+    """
+    corpus = TrafficCorpus(args.corpus)
+    entries = list(corpus.entries())
+    summary: Dict[str, Any] = {
+        "requests": len(entries),
+        "unique_blobs": len({segment["blob"] for entry in entries for segment in entry["segments"] if "blob" in segment}),
+        "body_bytes": sum(entry["size"] for entry in entries),
+        "disk_bytes": corpus.disk_bytes(),
+        "span_seconds": entries[-1]["offset"] - entries[0]["offset"] if entries else 0.0,
+        "paths": {},
+        "kinds": {},
+        "recorded_statuses": {}
+    }
+    for entry in entries:
+        for field, value in (("paths", entry["path"].split("?")[0]), ("kinds", request_kind(entry)),
+                             ("recorded_statuses", str(entry["status"]))):
+            summary[field][value] = summary[field].get(value, 0) + 1
+
+    print(f"{summary['requests']} requests over {summary['span_seconds']:.0f}s, "
+          f"{summary['unique_blobs']} distinct stored bodies and uploads")
+    print(f"{summary['body_bytes'] / 1e6:.1f} MB of request bodies stored in {summary['disk_bytes'] / 1e6:.1f} MB")
+    for field in ("paths", "kinds", "recorded_statuses"):
+        print(f"{field}: " + ", ".join(f"{key} {count}" for key, count in sorted(summary[field].items())))
+    return summary
+
+
+def load_requests(corpus: TrafficCorpus, count: Optional[int],
+                  paths: Optional[List[str]]) -> List[Tuple[Dict[str, Any], List[bytes], str]]:
+    """
+    Read the requests to replay, repeating the corpus if more are asked for.
+
+    Bodies are read before the run so disk reads do not distort the timing.
+    Each upload is held in memory once however many requests carry it; the
+    segments of a body are joined when it is sent.
+
+    Args:
+        corpus: Corpus to read
+        count: Number of requests, or None for the whole corpus once
+        paths: Optional path suffixes to keep
+
+    Returns:
+        (entry, body segments, kind) tuples in replay order
+    """
+    entries = [entry for entry in corpus.entries()
+               if not paths or entry["path"].split("?")[0].endswith(tuple(paths))]
+    if not entries:
+        return []
+
+    blobs: Dict[str, bytes] = {}
+    loaded = [(corpus.load_segments(entry, blobs), request_kind(entry)) for entry in entries]
+
+    count = len(entries) if count is None else count
+    span = entries[-1]["offset"] - entries[0]["offset"]
+    requests = []
+    for i in range(count):
+        # Shift the offsets of every repetition past the end of the previous one
+        entry = dict(entries[i % len(entries)])
+        entry["offset"] = entry["offset"] - entries[0]["offset"] + (i // len(entries)) * (span + 1.0)
+        requests.append((entry, *loaded[i % len(entries)]))
+    return requests
+
+
+def schedule(requests: List[Tuple[Dict[str, Any], List[bytes], str]], rate: Optional[float],
+             speed: float, arrival: str, seed: int) -> List[float]:
+    """
+    Compute the send time of every request relative to the start of the run.
+
+    Args:
+        requests: Requests in replay order
+        rate: Requests per second, or None to follow the recorded timing
+        speed: Factor the recorded timing is sped up by
+        arrival: "poisson" or "uniform" gaps at a fixed rate
+        seed: Random seed for Poisson arrivals
+
+    Returns:
+        Send times in seconds
+    """
+    if rate is None:
+        return [entry["offset"] / speed for entry, _, _ in requests]
+    if arrival == "uniform":
+        return [i / rate for i in range(len(requests))]
+    rng = random.Random(seed)
+    times, at = [], 0.0
+    for _ in requests:
+        times.append(at)
+        at += rng.expovariate(rate)
+    return times
+
+
+class Recorder:
+    """Collects the outcome of replayed requests."""
+
+    def __init__(self):
+        self.samples: List[Dict[str, Any]] = []
+
+    def add(self, entry: Dict[str, Any], kind: str, status: str,
+            latency: Optional[float] = None, service: Optional[float] = None, lag: Optional[float] = None):
+        self.samples.append({"path": entry["path"].split("?")[0], "kind": kind, "status": status,
+                             "latency": latency, "service": service, "lag": lag})
+
+    def summarize(self, samples: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+        """
+        Summarize a group of samples.
+
+        Args:
+            samples: Samples of the group
+            elapsed: Duration of the run in seconds
+
+        Returns:
+            Counts, error rate, throughput and latency percentiles
+        """
+        statuses: Dict[str, int] = {}
+        for sample in samples:
+            statuses[sample["status"]] = statuses.get(sample["status"], 0) + 1
+        ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+        result = {
+            "requests": len(samples),
+            "statuses": dict(sorted(statuses.items())),
+            "errors": {status: count for status, count in sorted(statuses.items()) if not status.startswith("2")},
+            "error_rate": 1.0 - ok / len(samples) if samples else 0.0,
+            "throughput_rps": ok / elapsed if elapsed > 0 else 0.0
+        }
+        for field, name in (("latency", "latency_ms"), ("service", "service_ms"), ("lag", "send_lag_ms")):
+            values = [sample[field] for sample in samples if sample[field] is not None]
+            if values:
+                result[name] = {
+                    "mean": 1000.0 * sum(values) / len(values),
+                    "p50": 1000.0 * percentile(values, 50),
+                    "p90": 1000.0 * percentile(values, 90),
+                    "p95": 1000.0 * percentile(values, 95),
+                    "p99": 1000.0 * percentile(values, 99),
+                    "p999": 1000.0 * percentile(values, 99.9),
+                    "max": 1000.0 * max(values)
+                }
+        return result
+
+
+async def send_request(client: httpx.AsyncClient, recorder: Recorder, entry: Dict[str, Any],
+                       segments: List[bytes], kind: str, intended: float):
+    """
+    Send one recorded request and record its outcome.
+
+    Args:
+        client: HTTP client bound to the target
+        recorder: Outcome collector
+        entry: Index entry
+        segments: Request body segments
+        kind: Request kind
+        intended: Scheduled send time on the event loop clock
+    """
+    loop = asyncio.get_running_loop()
+    sent = loop.time()
+    try:
+        response = await client.request(entry["method"], entry["path"], content=b"".join(segments),
+                                        headers=entry["headers"])
+        status = str(response.status_code)
+        if response.status_code == 200 and response.headers.get("content-type", "").startswith("application/json"):
+            payload = response.json()
+            if isinstance(payload, dict) and payload.get("degraded"):
+                status = "200-degraded"
+    except Exception as e:
+        status = type(e).__name__
+    done = loop.time()
+    recorder.add(entry, kind, status, latency=done - intended, service=done - sent, lag=sent - intended)
+
+
+async def replay_open_loop(client: httpx.AsyncClient, recorder: Recorder,
+                           requests: List[Tuple[Dict[str, Any], List[bytes], str]],
+                           send_times: List[float], max_in_flight: int):
+    """
+    Send every request at its scheduled time.
+
+    Requests due while `max_in_flight` requests are outstanding are not
+    sent and count as "dropped", so an overloaded target cannot stall the
+    schedule.
+
+    Args:
+        client: HTTP client bound to the target
+        recorder: Outcome collector
+        requests: Requests in replay order
+        send_times: Send time of every request relative to the start
+        max_in_flight: Limit of outstanding requests
+    """
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+    start = loop.time()
+    for (entry, segments, kind), at in zip(requests, send_times):
+        delay = start + at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(in_flight) >= max_in_flight:
+            recorder.add(entry, kind, "dropped")
+            continue
+        task = asyncio.create_task(send_request(client, recorder, entry, segments, kind, start + at))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def replay_closed_loop(client: httpx.AsyncClient, recorder: Recorder,
+                             requests: List[Tuple[Dict[str, Any], List[bytes], str]], concurrency: int):
+    """
+    Send the requests with a fixed number in flight.
+
+    Args:
+        client: HTTP client bound to the target
+        recorder: Outcome collector
+        requests: Requests in replay order
+        concurrency: Number of concurrent workers
+    """
+    queue = iter(requests)
+
+    async def worker():
+        loop = asyncio.get_running_loop()
+        for entry, segments, kind in queue:
+            await send_request(client, recorder, entry, segments, kind, loop.time())
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+
+async def replay(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Replay a corpus against the target.
+
+    Args:
+        args: Parsed command line arguments
+
+    Returns:
+        Report with the run configuration, overall results and results per
+        path and request kind
+    """
+    corpus = TrafficCorpus(args.corpus)
+    requests = load_requests(corpus, args.requests, args.paths)
+    if not requests:
+        raise SystemExit(f"No requests to replay in {args.corpus}")
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        if args.concurrency:
+            mode = f"closed loop, concurrency {args.concurrency}"
+            print(f"Replaying {len(requests)} requests ({mode})")
+            await replay_closed_loop(client, recorder, requests, args.concurrency)
+        else:
+            send_times = schedule(requests, args.rate, args.speed, args.arrival, args.seed)
+            mode = f"open loop, {args.rate} req/s {args.arrival}" if args.rate else f"open loop, {args.speed}x recorded timing"
+            print(f"Replaying {len(requests)} requests over {send_times[-1]:.0f}s ({mode})")
+            await replay_open_loop(client, recorder, requests, send_times, args.max_in_flight)
+        elapsed = time.perf_counter() - start
+
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for sample in recorder.samples:
+        groups.setdefault(f"{sample['path']} [{sample['kind']}]", []).append(sample)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "mode": mode,
+            "elapsed_seconds": elapsed,
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "func")}
+        },
+        "overall": recorder.summarize(recorder.samples, elapsed),
+        "groups": {name: recorder.summarize(samples, elapsed) for name, samples in sorted(groups.items())}
+    }
+
+    for name, result in [("overall", report["overall"])] + list(report["groups"].items()):
+        latency = result.get("latency_ms")
+        timing = (f"p50 {latency['p50']:>8.1f}  p95 {latency['p95']:>8.1f}  p99 {latency['p99']:>8.1f}  "
+                  f"max {latency['max']:>8.1f} ms") if latency else "no responses"
+        print(f"{name:<40} n={result['requests']:<6} {timing}  errors {result['error_rate']:.1%}")
+        if result["errors"]:
+            print(" " * 41 + ", ".join(f"{status} {count}" for status, count in result["errors"].items()))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay /process and /tasks traffic")
+    parser.add_argument("--log-level", default="WARNING", help="Log level")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="Run a recording reverse proxy")
+    record_parser.add_argument("--upstream", required=True, help="Base URL of the instance to forward to")
+    record_parser.add_argument("--corpus", default="traffic", help="Corpus directory")
+    record_parser.add_argument("--host", default="0.0.0.0", help="Interface to listen on")
+    record_parser.add_argument("--port", type=int, default=9000, help="Port to listen on")
+    record_parser.add_argument("--sample-rate", type=float, default=1.0, help="Fraction of requests recorded")
+    record_parser.add_argument("--max-requests", type=int, default=10000, help="Corpus size at which recording stops")
+    record_parser.add_argument("--max-body-mb", type=int, default=50, help="Largest request body recorded")
+    record_parser.add_argument("--timeout", type=float, default=300.0, help="Upstream timeout in seconds")
+    record_parser.set_defaults(func=record)
+
+    info_parser = commands.add_parser("info", help="Summarize a corpus")
+    info_parser.add_argument("corpus", help="Corpus directory")
+    info_parser.set_defaults(func=info)
+
+    replay_parser = commands.add_parser("replay", help="Replay a corpus against an instance")
+    replay_parser.add_argument("corpus", help="Corpus directory")
+    replay_parser.add_argument("--target", required=True, help="Base URL of the instance to test")
+    mode = replay_parser.add_mutually_exclusive_group()
+    mode.add_argument("--speed", type=float, default=1.0, help="Open loop at the recorded timing sped up by this factor")
+    mode.add_argument("--rate", type=float, help="Open loop at a fixed rate in requests per second")
+    mode.add_argument("--concurrency", type=int, help="Closed loop with this many requests in flight")
+    replay_parser.add_argument("--arrival", choices=("poisson", "uniform"), default="poisson",
+                               help="Gaps between requests with --rate")
+    replay_parser.add_argument("--requests", type=int, help="Requests to send; the corpus repeats if needed")
+    replay_parser.add_argument("--paths", help="Comma-separated path suffixes to replay, e.g. /process")
+    replay_parser.add_argument("--max-in-flight", type=int, default=1024,
+                               help="Outstanding requests beyond which open-loop requests are dropped")
+    replay_parser.add_argument("--timeout", type=float, default=120.0, help="Request timeout in seconds")
+    replay_parser.add_argument("--seed", type=int, default=42, help="Random seed for Poisson arrivals")
+    replay_parser.add_argument("--output", help="Path to write the report as JSON")
+    replay_parser.set_defaults(func=lambda args: asyncio.run(replay(args)))
+
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level)
+    if getattr(args, "paths", None):
+        args.paths = [path for path in args.paths.split(",") if path]
+
+    result = args.func(args)
+
+    if getattr(args, "output", None):
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ Configuration settings for the application.
 """
 
 from typing import Dict, Any, Optional
+from functools import lru_cache
 from pydantic import BaseSettings, Field, validator
 import os
 import json
@@ -21,14 +22,131 @@ class Settings(BaseSettings):
     neo4j_uri: str = os.getenv("neo4j")
     neo4j_username: str = os.getenv("DATABASE_USER")
     neo4j_password: str = os.getenv("DATABASE_PASSWORD")
+    neo4j_max_connection_pool_size: int = Field(50, env="NEO4J_MAX_CONNECTION_POOL_SIZE")
+    neo4j_connection_acquisition_timeout: float = Field(30.0, env="NEO4J_CONNECTION_ACQUISITION_TIMEOUT")
+    neo4j_max_connection_lifetime: int = Field(3600, env="NEO4J_MAX_CONNECTION_LIFETIME")
+    local_index_enabled: bool = Field(True, env="LOCAL_INDEX_ENABLED")
+    # Other workers and replicas write to Neo4j directly; the local index
+    # picks up their task writes every this many seconds (0 disables)
+    local_index_refresh_seconds: float = Field(30.0, env="LOCAL_INDEX_REFRESH_SECONDS")
+    embedding_precision: str = Field("float32", env="EMBEDDING_PRECISION")
+    # Compact storage writes embeddings as float32 vector properties: 6144
+    # instead of 12288 bytes per 1536-d Task in Neo4j (needs Neo4j 5.13+)
+    store_compact_embeddings: bool = Field(False, env="STORE_COMPACT_EMBEDDINGS")
+    # A float16/int8 local index keeps 3072/1540 instead of 6144 bytes per
+    # vector in memory and re-ranks from a memory-mapped float32 file in
+    # RESCORE_DIR (system temporary directory by default)
+    rescore_oversample: int = Field(4, env="RESCORE_OVERSAMPLE")
+    rescore_dir: Optional[str] = Field(None, env="RESCORE_DIR")
+    coarse_index_mode: str = Field("off", env="COARSE_INDEX_MODE")
+    coarse_dimensions: int = Field(256, env="COARSE_DIMENSIONS")
+    coarse_projection_path: Optional[str] = Field(None, env="COARSE_PROJECTION_PATH")
+    coarse_oversample: int = Field(10, env="COARSE_OVERSAMPLE")
+    # Query profiling: result summary metrics, sampled PROFILE plans and a
+    # slow-query log of queries over the threshold (0 disables the log)
+    neo4j_query_stats_enabled: bool = Field(False, env="NEO4J_QUERY_STATS_ENABLED")
+    neo4j_profile_sample_rate: float = Field(0.0, env="NEO4J_PROFILE_SAMPLE_RATE")
+    neo4j_slow_query_ms: float = Field(500.0, env="NEO4J_SLOW_QUERY_MS")
     
     # Groq API settings
     groq_api_key: str = os.getenv("GROQ_API_KEY")
+    groq_base_url: str = Field("https://api.groq.com/v1", env="GROQ_BASE_URL")
+    groq_max_connections: int = Field(100, env="GROQ_MAX_CONNECTIONS")
+    groq_max_connections_per_host: int = Field(50, env="GROQ_MAX_CONNECTIONS_PER_HOST")
+    groq_keepalive_timeout: float = Field(30.0, env="GROQ_KEEPALIVE_TIMEOUT")
+    groq_connect_timeout: float = Field(10.0, env="GROQ_CONNECT_TIMEOUT")
+    groq_request_timeout: float = Field(60.0, env="GROQ_REQUEST_TIMEOUT")
+    
+    # Groq rate limiting and retry settings
+    groq_requests_per_second: float = Field(0.0, env="GROQ_REQUESTS_PER_SECOND")
+    groq_burst: int = Field(20, env="GROQ_BURST")
+    groq_adaptive_concurrency: bool = Field(True, env="GROQ_ADAPTIVE_CONCURRENCY")
+    groq_initial_concurrency: int = Field(16, env="GROQ_INITIAL_CONCURRENCY")
+    groq_min_concurrency: int = Field(1, env="GROQ_MIN_CONCURRENCY")
+    groq_max_concurrency: int = Field(64, env="GROQ_MAX_CONCURRENCY")
+    groq_max_retries: int = Field(3, env="GROQ_MAX_RETRIES")
+    groq_backoff_base: float = Field(0.5, env="GROQ_BACKOFF_BASE")
+    groq_backoff_max: float = Field(20.0, env="GROQ_BACKOFF_MAX")
+    groq_hedge_delay_ms: float = Field(0.0, env="GROQ_HEDGE_DELAY_MS")
+    
+    # Groq circuit breaker settings
+    groq_breaker_enabled: bool = Field(True, env="GROQ_BREAKER_ENABLED")
+    groq_breaker_failure_rate: float = Field(0.5, env="GROQ_BREAKER_FAILURE_RATE")
+    groq_breaker_slow_call_seconds: float = Field(3.0, env="GROQ_BREAKER_SLOW_CALL_SECONDS")
+    groq_breaker_slow_call_rate: float = Field(0.8, env="GROQ_BREAKER_SLOW_CALL_RATE")
+    groq_breaker_window: int = Field(20, env="GROQ_BREAKER_WINDOW")
+    groq_breaker_min_calls: int = Field(10, env="GROQ_BREAKER_MIN_CALLS")
+    groq_breaker_open_seconds: float = Field(30.0, env="GROQ_BREAKER_OPEN_SECONDS")
+    groq_latency_budget_seconds: float = Field(5.0, env="GROQ_LATENCY_BUDGET_SECONDS")
+    
+    # Embedding provider settings ("groq" or "local"); the dimensions size the
+    # Neo4j vector index and the local index. The groq provider only produces
+    # 1536-dimension embeddings, startup fails for any other value
+    # Each Task records its provider; after switching providers the Tasks
+    # embedded by the other one are skipped until they are re-embedded
+    embedding_provider: str = Field("groq", env="EMBEDDING_PROVIDER")
+    embedding_dimensions: int = Field(1536, env="EMBEDDING_DIMENSIONS")
+    local_embedding_ngram_min: int = Field(3, env="LOCAL_EMBEDDING_NGRAM_MIN")
+    local_embedding_ngram_max: int = Field(5, env="LOCAL_EMBEDDING_NGRAM_MAX")
+    
+    # Embedding cache settings
+    embedding_cache_enabled: bool = Field(True, env="EMBEDDING_CACHE_ENABLED")
+    embedding_cache_max_memory_mb: float = Field(64, env="EMBEDDING_CACHE_MAX_MEMORY_MB")
+    embedding_cache_path: Optional[str] = Field(None, env="EMBEDDING_CACHE_PATH")
+    embedding_cache_max_disk_mb: float = Field(512, env="EMBEDDING_CACHE_MAX_DISK_MB")
+    
+    # Embedding micro-batching settings
+    embedding_batch_size: int = Field(64, env="EMBEDDING_BATCH_SIZE")
+    embedding_batch_window_ms: float = Field(5.0, env="EMBEDDING_BATCH_WINDOW_MS")
+    
+    # Video frame analysis settings
+    video_frame_concurrency: int = Field(4, env="VIDEO_FRAME_CONCURRENCY")
+    video_frame_timeout: float = Field(30.0, env="VIDEO_FRAME_TIMEOUT")
+    
+    # Multimodal processing settings; with text_llm_analysis off the LLM only
+    # summarises text for /process/stream, which streams its tokens
+    text_llm_analysis: bool = Field(False, env="TEXT_LLM_ANALYSIS")
+    text_timeout: float = Field(20.0, env="TEXT_TIMEOUT")
+    image_timeout: float = Field(30.0, env="IMAGE_TIMEOUT")
+    video_timeout: float = Field(120.0, env="VIDEO_TIMEOUT")
+    image_max_side: int = Field(1024, env="IMAGE_MAX_SIDE")
+    image_output_format: str = Field("JPEG", env="IMAGE_OUTPUT_FORMAT")
+    image_quality: int = Field(85, env="IMAGE_QUALITY")
+    image_phash_distance: int = Field(4, env="IMAGE_PHASH_DISTANCE")
+    video_max_key_frames: int = Field(12, env="VIDEO_MAX_KEY_FRAMES")
+    
+    # Result cache settings
+    result_cache_enabled: bool = Field(True, env="RESULT_CACHE_ENABLED")
+    result_cache_ttl_seconds: float = Field(300.0, env="RESULT_CACHE_TTL_SECONDS")
+    result_cache_max_entries: int = Field(256, env="RESULT_CACHE_MAX_ENTRIES")
+    
+    # Background job settings
+    job_workers: int = Field(2, env="JOB_WORKERS")
+    job_queue_size: int = Field(100, env="JOB_QUEUE_SIZE")
+    job_result_ttl_seconds: float = Field(3600.0, env="JOB_RESULT_TTL_SECONDS")
+    
+    # Request profiling settings; the header only triggers a profile when a
+    # token is set and the header carries it
+    profiling_enabled: bool = Field(False, env="PROFILING_ENABLED")
+    profiling_sample_rate: float = Field(0.0, env="PROFILING_SAMPLE_RATE")
+    profiling_header: str = Field("X-Profile", env="PROFILING_HEADER")
+    profiling_token: Optional[str] = Field(None, env="PROFILING_TOKEN")
+    profiling_dir: str = Field("profiles", env="PROFILING_DIR")
+    profiling_max_profiles: int = Field(50, env="PROFILING_MAX_PROFILES")
+    profiling_engine: str = Field("auto", env="PROFILING_ENGINE")
+    
+    # Traffic recording settings; see benchmarks/traffic_replay.py
+    traffic_record_enabled: bool = Field(False, env="TRAFFIC_RECORD_ENABLED")
+    traffic_record_dir: str = Field("traffic", env="TRAFFIC_RECORD_DIR")
+    traffic_record_sample_rate: float = Field(1.0, env="TRAFFIC_RECORD_SAMPLE_RATE")
+    traffic_record_max_requests: int = Field(10000, env="TRAFFIC_RECORD_MAX_REQUESTS")
     
     # Application settings
     app_name: str = Field("Multimodal Instructor", env="APP_NAME")
     debug: bool = Field(False, env="DEBUG")
     log_level: str = Field("INFO", env="LOG_LEVEL")
+    # Number of server worker processes, as read by uvicorn and gunicorn
+    web_concurrency: int = Field(1, env="WEB_CONCURRENCY")
     
     # File upload settings
     max_upload_size_mb: int = Field(50, env="MAX_UPLOAD_SIZE_MB")
@@ -53,20 +171,108 @@ class Settings(BaseSettings):
             "neo4j": {
                 "uri": self.neo4j_uri,
                 "username": self.neo4j_username,
-                "password": self.neo4j_password
+                "password": self.neo4j_password,
+                "max_connection_pool_size": self.neo4j_max_connection_pool_size,
+                "connection_acquisition_timeout": self.neo4j_connection_acquisition_timeout,
+                "max_connection_lifetime": self.neo4j_max_connection_lifetime,
+                "local_index_enabled": self.local_index_enabled,
+                "local_index_refresh_seconds": self.local_index_refresh_seconds,
+                "embedding_precision": self.embedding_precision,
+                "store_compact_embeddings": self.store_compact_embeddings,
+                "rescore_oversample": self.rescore_oversample,
+                "rescore_dir": self.rescore_dir,
+                "coarse_index": {
+                    "mode": self.coarse_index_mode,
+                    "dimensions": self.coarse_dimensions,
+                    "projection_path": self.coarse_projection_path,
+                    "oversample": self.coarse_oversample
+                },
+                "query_profiling": {
+                    "stats_enabled": self.neo4j_query_stats_enabled,
+                    "profile_sample_rate": self.neo4j_profile_sample_rate,
+                    "slow_query_ms": self.neo4j_slow_query_ms
+                },
+                "embedding_dimensions": self.embedding_dimensions,
+                "embedding_provider": self.embedding_provider
             },
             "groq": {
-                "api_key": self.groq_api_key
+                "api_key": self.groq_api_key,
+                "base_url": self.groq_base_url,
+                "max_connections": self.groq_max_connections,
+                "max_connections_per_host": self.groq_max_connections_per_host,
+                "keepalive_timeout": self.groq_keepalive_timeout,
+                "connect_timeout": self.groq_connect_timeout,
+                "request_timeout": self.groq_request_timeout,
+                "requests_per_second": self.groq_requests_per_second,
+                "burst": self.groq_burst,
+                "adaptive_concurrency": self.groq_adaptive_concurrency,
+                "initial_concurrency": self.groq_initial_concurrency,
+                "min_concurrency": self.groq_min_concurrency,
+                "max_concurrency": self.groq_max_concurrency,
+                "max_retries": self.groq_max_retries,
+                "backoff_base": self.groq_backoff_base,
+                "backoff_max": self.groq_backoff_max,
+                "hedge_delay_ms": self.groq_hedge_delay_ms,
+                "latency_budget_seconds": self.groq_latency_budget_seconds,
+                "circuit_breaker": {
+                    "enabled": self.groq_breaker_enabled,
+                    "failure_rate_threshold": self.groq_breaker_failure_rate,
+                    "slow_call_seconds": self.groq_breaker_slow_call_seconds,
+                    "slow_call_rate_threshold": self.groq_breaker_slow_call_rate,
+                    "window_size": self.groq_breaker_window,
+                    "minimum_calls": self.groq_breaker_min_calls,
+                    "open_seconds": self.groq_breaker_open_seconds
+                },
+                "embedding_batch_size": self.embedding_batch_size,
+                "embedding_batch_window_ms": self.embedding_batch_window_ms,
+                "frame_concurrency": self.video_frame_concurrency,
+                "frame_timeout": self.video_frame_timeout,
+                "embedding_cache": {
+                    "enabled": self.embedding_cache_enabled,
+                    "max_memory_mb": self.embedding_cache_max_memory_mb,
+                    "disk_path": self.embedding_cache_path,
+                    "max_disk_mb": self.embedding_cache_max_disk_mb
+                }
+            },
+            "embeddings": {
+                "provider": self.embedding_provider,
+                "dimensions": self.embedding_dimensions,
+                "ngram_min": self.local_embedding_ngram_min,
+                "ngram_max": self.local_embedding_ngram_max
+            },
+            "multimodal": {
+                "text_llm_analysis": self.text_llm_analysis,
+                "text_timeout": self.text_timeout,
+                "image_timeout": self.image_timeout,
+                "video_timeout": self.video_timeout,
+                "image_max_side": self.image_max_side,
+                "image_output_format": self.image_output_format,
+                "image_quality": self.image_quality,
+                "image_phash_distance": self.image_phash_distance,
+                "video_max_key_frames": self.video_max_key_frames,
+                "frame_concurrency": self.video_frame_concurrency,
+                "frame_timeout": self.video_frame_timeout
             },
             "app": {
                 "name": self.app_name,
                 "debug": self.debug,
                 "log_level": self.log_level,
+                "web_concurrency": self.web_concurrency,
                 "max_upload_size_mb": self.max_upload_size_mb,
                 "allowed_image_types": self.allowed_image_types.split(","),
                 "allowed_video_types": self.allowed_video_types.split(","),
                 "api_prefix": self.api_prefix,
-                "cors_origins": self.cors_origins if isinstance(self.cors_origins, list) else self.cors_origins.split(",")
+                "cors_origins": self.cors_origins if isinstance(self.cors_origins, list) else self.cors_origins.split(","),
+                "result_cache": {
+                    "enabled": self.result_cache_enabled,
+                    "ttl_seconds": self.result_cache_ttl_seconds,
+                    "max_entries": self.result_cache_max_entries
+                },
+                "jobs": {
+                    "max_workers": self.job_workers,
+                    "max_queue_size": self.job_queue_size,
+                    "result_ttl_seconds": self.job_result_ttl_seconds
+                }
             }
         }
         
@@ -76,9 +282,13 @@ class Settings(BaseSettings):
         env_file_encoding = "utf-8"
         
 
+@lru_cache()
 def get_settings() -> Settings:
     """
     Get application settings.
+
+    Settings are parsed once per process and cached, so callers can use
+    this freely on hot paths.
     
     Returns:
         Settings object
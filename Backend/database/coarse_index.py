@@ -0,0 +1,199 @@
+"""
+Reduced-dimension projections used for coarse candidate search.
+"""
+
+from typing import Any, Dict, Optional
+import logging
+import os
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Supported projection modes
+PROJECTION_MODES = ("pca", "prefix")
+
+# Values accepted by the COARSE_INDEX_MODE setting
+COARSE_INDEX_MODES = ("off",) + PROJECTION_MODES
+
+class CoarseProjection:
+    """
+    Linear map from full embeddings to a few coarse dimensions.
+
+    "pca" uses the top right-singular vectors of the (uncentred) embedding
+    matrix, which best preserve inner products between unit vectors.
+    "prefix" keeps the first dimensions, for Matryoshka-style models whose
+    leading dimensions already form a usable embedding.
+
+    Coarse vectors are not re-normalised: their dot product approximates the
+    full cosine similarity and is only used to pick candidates for an exact
+    re-rank.
+    """
+
+    def __init__(self, input_dimensions: int, dimensions: int, mode: str = "prefix",
+                 components: Optional["np.ndarray"] = None,
+                 explained_variance: Optional[float] = None):
+        """
+        Initialize a projection.
+
+        Args:
+            input_dimensions: Dimensionality of the full embeddings
+            dimensions: Dimensionality of the coarse vectors
+            mode: "pca" or "prefix"
+            components: Projection matrix of shape (input_dimensions, dimensions),
+                required for "pca"
+            explained_variance: Fraction of the energy kept by a PCA projection
+        """
+        if mode not in PROJECTION_MODES:
+            raise ValueError(f"Unsupported projection mode: {mode}")
+        if not 0 < dimensions <= input_dimensions:
+            raise ValueError(f"Coarse dimensions must be in 1..{input_dimensions}, got {dimensions}")
+        if mode == "pca" and (components is None or components.shape != (input_dimensions, dimensions)):
+            raise ValueError("A PCA projection needs a components matrix")
+
+        self.input_dimensions = input_dimensions
+        self.dimensions = dimensions
+        self.mode = mode
+        self.components = components.astype(np.float32) if components is not None else None
+        self.explained_variance = explained_variance
+
+    @classmethod
+    def prefix(cls, input_dimensions: int, dimensions: int) -> "CoarseProjection":
+        """
+        Create a projection keeping the leading dimensions.
+
+        Args:
+            input_dimensions: Dimensionality of the full embeddings
+            dimensions: Number of leading dimensions kept
+
+        Returns:
+            Prefix projection
+        """
+        return cls(input_dimensions, dimensions, mode="prefix")
+
+    @classmethod
+    def fit_pca(cls, embeddings: "np.ndarray", dimensions: int, sample_size: int = 20000,
+                seed: int = 0) -> "CoarseProjection":
+        """
+        Fit a PCA projection on existing embeddings.
+
+        Args:
+            embeddings: Array of shape (n, input_dimensions)
+            dimensions: Dimensionality of the coarse vectors
+            sample_size: Maximum number of rows used for fitting
+            seed: Random seed for sampling
+
+        Returns:
+            Fitted projection
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if embeddings.ndim != 2 or embeddings.shape[0] < dimensions:
+            raise ValueError(f"Need at least {dimensions} embeddings to fit {dimensions} components")
+
+        if embeddings.shape[0] > sample_size:
+            rows = np.random.default_rng(seed).choice(embeddings.shape[0], sample_size, replace=False)
+            embeddings = embeddings[rows]
+
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        sample = embeddings / np.where(norms > 0, norms, 1.0)
+
+        # Eigen-decomposition of the Gram matrix is much cheaper than a full SVD
+        gram = (sample.T @ sample).astype(np.float64)
+        eigenvalues, eigenvectors = np.linalg.eigh(gram)
+        order = np.argsort(eigenvalues)[::-1][:dimensions]
+        explained = float(eigenvalues[order].sum() / max(eigenvalues.sum(), 1e-12))
+
+        logger.info(f"Fitted {dimensions}-dimension PCA projection on {sample.shape[0]} embeddings, "
+                    f"{explained:.1%} of the energy kept")
+        return cls(embeddings.shape[1], dimensions, mode="pca",
+                   components=eigenvectors[:, order], explained_variance=explained)
+
+    def transform(self, vectors: "np.ndarray") -> "np.ndarray":
+        """
+        Project vectors to the coarse space.
+
+        Args:
+            vectors: Array of shape (..., input_dimensions)
+
+        Returns:
+            float32 array of shape (..., dimensions)
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.mode == "prefix":
+            return np.ascontiguousarray(vectors[..., :self.dimensions])
+        return vectors @ self.components
+
+    def save(self, path: str):
+        """
+        Save the projection to an .npz file.
+
+        Args:
+            path: Destination path
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            path,
+            input_dimensions=self.input_dimensions,
+            dimensions=self.dimensions,
+            mode=self.mode,
+            components=self.components if self.components is not None else np.empty(0, dtype=np.float32),
+            explained_variance=np.nan if self.explained_variance is None else self.explained_variance
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "CoarseProjection":
+        """
+        Load a projection saved with save().
+
+        Args:
+            path: Path of the .npz file
+
+        Returns:
+            Loaded projection
+        """
+        with np.load(path) as data:
+            mode = str(data["mode"])
+            explained = float(data["explained_variance"])
+            return cls(
+                input_dimensions=int(data["input_dimensions"]),
+                dimensions=int(data["dimensions"]),
+                mode=mode,
+                components=data["components"] if mode == "pca" else None,
+                explained_variance=None if np.isnan(explained) else explained
+            )
+
+
+def projection_from_config(config: Dict[str, Any], input_dimensions: int) -> Optional[CoarseProjection]:
+    """
+    Create the coarse projection selected in the "coarse_index" config section.
+
+    A missing or mismatched PCA projection file disables the coarse index
+    rather than failing startup; fit one with benchmarks/fit_coarse_projection.py.
+
+    Args:
+        config: Coarse index configuration dictionary
+        input_dimensions: Dimensionality of the full embeddings
+
+    Returns:
+        Projection, or None if the coarse index is off or unavailable
+    """
+    mode = config.get("mode", "off")
+    if mode not in COARSE_INDEX_MODES:
+        raise ValueError(f"Unknown coarse index mode: {mode} (expected one of {', '.join(COARSE_INDEX_MODES)})")
+    if mode == "off":
+        return None
+    if mode == "prefix":
+        return CoarseProjection.prefix(input_dimensions, config.get("dimensions", 256))
+
+    path = config.get("projection_path")
+    if not path or not os.path.exists(path):
+        logger.warning(f"Coarse PCA projection {path!r} not found, searching full vectors only")
+        return None
+    projection = CoarseProjection.load(path)
+    if projection.input_dimensions != input_dimensions:
+        logger.warning(f"Coarse projection {path} expects {projection.input_dimensions} dimensions "
+                       f"instead of {input_dimensions}, searching full vectors only")
+        return None
+    return projection
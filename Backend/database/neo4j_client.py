@@ -2,37 +2,370 @@
 Neo4j client for vector database operations.
 """
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
+import asyncio
 import logging
 import uuid
+import time
 from neo4j import GraphDatabase, AsyncGraphDatabase
+from neo4j.exceptions import ClientError
+
+from database.vector_index import LocalVectorIndex
+from database.coarse_index import projection_from_config
+from database.query_profiler import QueryProfiler
+from helpers import extract_keywords
+from metrics import track_upstream
 
 logger = logging.getLogger(__name__)
 
+# Name of the native vector index created in setup_schema
+VECTOR_INDEX_NAME = "task_embedding_index"
+
+# How long to use the label scan before trying a missing vector index again
+VECTOR_INDEX_RETRY_SECONDS = 60.0
+
+# Each local index refresh fetches the task writes stamped this long before
+# the newest one seen again, covering transactions that commit late
+INDEX_REFRESH_OVERLAP_SECONDS = 60
+
+# Provider of the Task embeddings written before the provider was recorded
+LEGACY_EMBEDDING_PROVIDER = "groq"
+
+# Matches the Task nodes `t` embedded by the provider in $embedding_provider
+SAME_PROVIDER = f"coalesce(t.embedding_provider, '{LEGACY_EMBEDDING_PROVIDER}') = $embedding_provider"
+
 class Neo4jClient:
     """
     Client for interacting with Neo4j vector database.
     Handles vector similarity searches and CRUD operations for tasks.
     """
     
-    def __init__(self, uri: str, username: str, password: str):
+    def __init__(self, uri: str, username: str, password: str,
+                 max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 30.0,
+                 max_connection_lifetime: int = 3600,
+                 local_index: Optional[LocalVectorIndex] = None,
+                 local_index_refresh_seconds: float = 0.0,
+                 store_compact_embeddings: bool = False,
+                 embedding_dimensions: int = 1536,
+                 embedding_provider: str = LEGACY_EMBEDDING_PROVIDER,
+                 query_profiler: Optional[QueryProfiler] = None):
         """
         Initialize Neo4j client.
         
+        The underlying driver owns a connection pool, so a single client
+        should be created per process and shared between requests.
+        
         Args:
             uri: Neo4j database URI
             username: Neo4j username
             password: Neo4j password
+            max_connection_pool_size: Maximum number of pooled Bolt connections
+            connection_acquisition_timeout: Seconds to wait for a free pooled connection
+            max_connection_lifetime: Seconds before a pooled connection is recycled
+            local_index: Optional in-process index that serves similarity searches
+                once loaded with load_local_index()
+            local_index_refresh_seconds: Interval of the background refresh
+                applying task writes of other processes to the local index;
+                0 disables it
+            store_compact_embeddings: Store embeddings as float32 vector
+                properties (half the size of a list of doubles) with
+                db.create.setNodeVectorProperty, which needs Neo4j 5.13+
+            embedding_dimensions: Dimensionality of the Task embeddings, used
+                when creating the vector index
+            embedding_provider: Name of the provider embedding new Tasks.
+                It is stored on every Task, and searches and the local index
+                skip Tasks embedded by another provider, whose vectors live
+                in an incompatible space
+            query_profiler: Optional observer receiving the result summary of
+                every query, which may also run queries with PROFILE
         """
         self.uri = uri
         self.username = username
         self.password = password
-        self.driver = AsyncGraphDatabase.driver(uri, auth=(username, password))
+        self.driver = AsyncGraphDatabase.driver(
+            uri,
+            auth=(username, password),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+            max_connection_lifetime=max_connection_lifetime
+        )
+        self._vector_index_retry_at = 0.0
+        self.local_index = local_index
+        self.local_index_refresh_seconds = local_index_refresh_seconds
+        self._index_watermark = 0
+        self._recent_changes: Dict[str, int] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.store_compact_embeddings = store_compact_embeddings
+        self.embedding_dimensions = embedding_dimensions
+        self.embedding_provider = embedding_provider
+        self.query_profiler = query_profiler
+        self._task_listeners: List[Callable[[str, str, Optional[List[float]]], None]] = []
+        
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "Neo4jClient":
+        """
+        Create a client from the "neo4j" section of the application config.
+        
+        Args:
+            config: Neo4j configuration dictionary
+            
+        Returns:
+            Configured Neo4jClient
+        """
+        local_index = None
+        if config.get("local_index_enabled"):
+            dimensions = config.get("embedding_dimensions", 1536)
+            coarse_config = config.get("coarse_index", {})
+            local_index = LocalVectorIndex(
+                dimensions=dimensions,
+                precision=config.get("embedding_precision", "float32"),
+                projection=projection_from_config(coarse_config, dimensions),
+                coarse_oversample=coarse_config.get("oversample", 10),
+                rescore_oversample=config.get("rescore_oversample", 4),
+                rescore_dir=config.get("rescore_dir")
+            )
+            
+        return cls(
+            uri=config["uri"],
+            username=config["username"],
+            password=config["password"],
+            max_connection_pool_size=config.get("max_connection_pool_size", 50),
+            connection_acquisition_timeout=config.get("connection_acquisition_timeout", 30.0),
+            max_connection_lifetime=config.get("max_connection_lifetime", 3600),
+            local_index=local_index,
+            local_index_refresh_seconds=config.get("local_index_refresh_seconds", 0.0),
+            store_compact_embeddings=config.get("store_compact_embeddings", False),
+            embedding_dimensions=config.get("embedding_dimensions", 1536),
+            embedding_provider=config.get("embedding_provider", LEGACY_EMBEDDING_PROVIDER),
+            query_profiler=QueryProfiler.from_config(config.get("query_profiling", {}))
+        )
         
     async def close(self):
-        """Close the Neo4j connection."""
+        """Stop the local index refresh and close the Neo4j connection."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
         await self.driver.close()
         
+    async def _run(self, runner, operation: str, query: str,
+                   params: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Run a query and fetch all of its records.
+        
+        The call is timed as a Neo4j upstream operation. With a query
+        profiler, a sample of queries runs with PROFILE and the result
+        summary is handed to the profiler once all records are fetched.
+        
+        Args:
+            runner: Open session or transaction
+            operation: Operation label for metrics and the slow-query log
+            query: Cypher query
+            params: Query parameters
+            
+        Returns:
+            Records of the result
+        """
+        params = params or {}
+        profiler = self.query_profiler
+        profiled = profiler is not None and profiler.should_profile()
+        
+        start = time.perf_counter()
+        with track_upstream("neo4j", operation):
+            result = await runner.run(f"PROFILE {query}" if profiled else query, params)
+            records = [record async for record in result]
+            summary = await result.consume() if profiler is not None else None
+        elapsed = time.perf_counter() - start
+        
+        if profiler is not None:
+            try:
+                profiler.observe(operation, query, params, summary, elapsed, len(records), profiled)
+            except Exception as e:
+                logger.error(f"Error observing {operation} query: {str(e)}")
+        return records
+        
+    def add_task_listener(self, listener: Callable[[str, str, Optional[List[float]]], None]):
+        """
+        Register a callback for task writes made through this client.
+        
+        The callback receives the event ("created", "updated" or "deleted"),
+        the task ID and the new embedding when one was written.
+        
+        Args:
+            listener: Callback to register
+        """
+        self._task_listeners.append(listener)
+        
+    def _notify_task_changed(self, event: str, task_id: str, embedding: Optional[List[float]] = None):
+        """
+        Call the registered task listeners.
+        
+        Args:
+            event: Kind of change
+            task_id: ID of the changed task
+            embedding: New embedding, if one was written
+        """
+        for listener in self._task_listeners:
+            try:
+                listener(event, task_id, embedding)
+            except Exception as e:
+                logger.error(f"Task listener failed for {event} {task_id}: {str(e)}")
+        
+    async def load_local_index(self):
+        """
+        Load the Task embeddings of the configured provider into the
+        in-process vector index.
+        
+        Tasks embedded by another provider are skipped with a warning; they
+        need to be re-embedded before they can be found again.
+        """
+        if self.local_index is None:
+            return
+            
+        async with self.driver.session() as session:
+            query = f"""
+            MATCH (t:Task)
+            WHERE t.embedding IS NOT NULL AND {SAME_PROVIDER}
+            RETURN t.id AS id, t.title AS title, t.description AS description,
+                   t.metadata AS metadata, t.embedding AS embedding,
+                   coalesce(t.updated_at, t.created_at).epochMillis AS changed_at
+            """
+            params = {"embedding_provider": self.embedding_provider}
+            records = [dict(record) for record in await self._run(session, "load_index", query, params)]
+            
+            query = f"""
+            MATCH (t:Task)
+            WHERE t.embedding IS NOT NULL AND NOT {SAME_PROVIDER}
+            RETURN count(t) AS skipped
+            """
+            skipped = (await self._run(session, "load_index", query, params))[0]["skipped"]
+            
+        if skipped:
+            logger.warning(f"Skipped {skipped} tasks embedded by another provider than "
+                           f"{self.embedding_provider}; re-embed them to make them searchable")
+        self.local_index.load(records)
+        
+        self._recent_changes = {}
+        self._index_watermark = max((r["changed_at"] or 0 for r in records), default=0)
+        self._remember_changes(records)
+        
+    def _remember_changes(self, records: List[Dict[str, Any]]):
+        """
+        Track the write times of tasks inside the refresh overlap window, so
+        that a refresh skips the writes it has already applied.
+        
+        Args:
+            records: Task records with id and changed_at (epoch milliseconds)
+        """
+        horizon = self._index_watermark - INDEX_REFRESH_OVERLAP_SECONDS * 1000
+        for record in records:
+            if record["changed_at"] is not None and record["changed_at"] >= horizon:
+                self._recent_changes[record["id"]] = record["changed_at"]
+        self._recent_changes = {
+            task_id: changed_at for task_id, changed_at in self._recent_changes.items()
+            if changed_at >= horizon
+        }
+        
+    async def refresh_local_index(self) -> int:
+        """
+        Apply task writes made by other processes to the local index.
+        
+        Tasks created or updated since the newest write seen (minus an
+        overlap for late commits) are upserted and reported to the task
+        listeners. Deletions are detected by comparing the number of Tasks
+        with the index size; on a mismatch the indexed IDs missing from
+        Neo4j are removed. An index that failed to load is loaded instead.
+        
+        Returns:
+            Number of tasks added, updated or removed
+        """
+        if self.local_index is None:
+            return 0
+        if not self.local_index.loaded:
+            await self.load_local_index()
+            return len(self.local_index)
+            
+        indexed = set(self.local_index.task_ids())
+        params = {
+            "embedding_provider": self.embedding_provider,
+            "since": self._index_watermark - INDEX_REFRESH_OVERLAP_SECONDS * 1000
+        }
+        async with self.driver.session() as session:
+            query = f"""
+            MATCH (t:Task)
+            WHERE t.embedding IS NOT NULL AND {SAME_PROVIDER}
+            WITH t, coalesce(t.updated_at, t.created_at).epochMillis AS changed_at
+            WHERE changed_at >= $since
+            RETURN t.id AS id, t.title AS title, t.description AS description,
+                   t.metadata AS metadata, t.embedding AS embedding, changed_at
+            """
+            records = [dict(record) for record in await self._run(session, "refresh_index", query, params)]
+            
+            query = f"""
+            MATCH (t:Task)
+            WHERE t.embedding IS NOT NULL AND {SAME_PROVIDER}
+            RETURN count(t) AS tasks
+            """
+            tasks = (await self._run(session, "refresh_index", query, params))[0]["tasks"]
+            
+            changed = [r for r in records if self._recent_changes.get(r["id"]) != r["changed_at"]]
+            for record in changed:
+                self.local_index.upsert(record["id"], record["embedding"], record)
+                
+            removed: List[str] = []
+            if tasks != len(self.local_index):
+                query = f"""
+                MATCH (t:Task)
+                WHERE t.embedding IS NOT NULL AND {SAME_PROVIDER}
+                RETURN t.id AS id
+                """
+                existing = {r["id"] for r in await self._run(session, "refresh_index", query, params)}
+                # Tasks written by this process after the snapshot are kept
+                removed = [task_id for task_id in indexed - existing if task_id in self.local_index]
+                for task_id in removed:
+                    self.local_index.remove(task_id)
+                    
+        self._index_watermark = max([self._index_watermark] + [r["changed_at"] for r in records])
+        self._remember_changes(records)
+        for record in changed:
+            self._notify_task_changed("updated", record["id"], record["embedding"])
+        for task_id in removed:
+            self._notify_task_changed("deleted", task_id)
+        return len(changed) + len(removed)
+        
+    def _written_here(self, records: List[Dict[str, Any]]):
+        """
+        Remember task writes made through this client, which the next
+        refresh would otherwise apply again.
+        
+        Args:
+            records: Written task records with id and changed_at
+        """
+        if self._refresh_task is not None:
+            self._remember_changes(records)
+        
+    def start_local_index_refresh(self):
+        """Start refreshing the local index every local_index_refresh_seconds."""
+        if (self.local_index is None or self.local_index_refresh_seconds <= 0
+                or self._refresh_task is not None):
+            return
+        self._refresh_task = asyncio.create_task(self._refresh_periodically())
+        
+    async def _refresh_periodically(self):
+        """Run refresh_local_index until cancelled, logging failures."""
+        while True:
+            await asyncio.sleep(self.local_index_refresh_seconds)
+            try:
+                changed = await self.refresh_local_index()
+                if changed:
+                    logger.info(f"Applied {changed} task changes from other processes to the local vector index")
+            except Exception as e:
+                logger.error(f"Error refreshing local vector index: {str(e)}")
+        
     async def create_task(self, title: str, description: str, 
                      embedding: List[float], metadata: Dict[str, Any]) -> str:
         """
@@ -51,35 +384,145 @@ class Neo4jClient:
         
         async with self.driver.session() as session:
             # Create task node with vector embedding
-            query = """
-            CREATE (t:Task {
+            query = f"""
+            CREATE (t:Task {{
                 id: $id,
                 title: $title,
                 description: $description,
-                embedding: $embedding,
                 created_at: datetime(),
                 metadata: $metadata
-            })
-            RETURN t.id as id
+            }})
+            {self._set_embedding("$embedding")}
+            RETURN t.id as id, t.created_at.epochMillis AS changed_at
             """
             
-            result = await session.run(
-                query,
-                id=task_id,
-                title=title,
-                description=description,
-                embedding=embedding,
-                metadata=metadata
-            )
+            records = await self._run(session, "create_task", query, {
+                "id": task_id,
+                "title": title,
+                "description": description,
+                "embedding": embedding,
+                "embedding_provider": self.embedding_provider,
+                "metadata": metadata
+            })
+            
+            record = records[0]
+            
+        self._written_here([dict(record)])
+        if self.local_index is not None:
+            self.local_index.upsert(record["id"], embedding, {
+                "title": title,
+                "description": description,
+                "metadata": metadata
+            })
+        self._notify_task_changed("created", record["id"], embedding)
+        return record["id"]
             
-            record = await result.single()
-            return record["id"]
+    async def create_tasks(self, tasks: List[Dict[str, Any]], batch_size: int = 500,
+                           progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Create many tasks with batched UNWIND writes.
+        
+        Each batch is written in its own managed (retried) write transaction;
+        a failed batch is reported and the remaining batches still run.
+        
+        Args:
+            tasks: Task dictionaries with title, description, embedding and metadata
+            batch_size: Number of tasks written per transaction
+            progress: Optional callback invoked with the report of each batch
+            
+        Returns:
+            Summary with the created task IDs and a report per batch
+        """
+        query = f"""
+        UNWIND $rows AS row
+        CREATE (t:Task {{
+            id: row.id,
+            title: row.title,
+            description: row.description,
+            created_at: datetime(),
+            metadata: row.metadata
+        }})
+        {self._set_embedding("row.embedding", carried="t, row")}
+        RETURN t.id AS id, t.created_at.epochMillis AS changed_at
+        """
+        
+        async def write_batch(tx, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            return [dict(record) for record in await self._run(tx, "create_tasks", query, {
+                "rows": rows,
+                "embedding_provider": self.embedding_provider
+            })]
+            
+        created_ids: List[str] = []
+        batches: List[Dict[str, Any]] = []
+        
+        async with self.driver.session() as session:
+            for start in range(0, len(tasks), batch_size):
+                chunk = tasks[start:start + batch_size]
+                rows = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "title": task["title"],
+                        "description": task["description"],
+                        "embedding": task["embedding"],
+                        "metadata": task.get("metadata")
+                    }
+                    for task in chunk
+                ]
+                
+                report = {"batch": start // batch_size, "size": len(rows), "created": 0, "error": None}
+                try:
+                    written = await session.execute_write(write_batch, rows)
+                    report["created"] = len(written)
+                    created_ids.extend(record["id"] for record in written)
+                    
+                    self._written_here(written)
+                    for row in rows:
+                        if self.local_index is not None:
+                            self.local_index.upsert(row["id"], row["embedding"], row)
+                        self._notify_task_changed("created", row["id"], row["embedding"])
+                except Exception as e:
+                    logger.error(f"Bulk task batch {report['batch']} failed: {str(e)}")
+                    report["error"] = str(e)
+                    
+                batches.append(report)
+                if progress is not None:
+                    progress(report)
+                    
+        return {
+            "created": len(created_ids),
+            "failed": len(tasks) - len(created_ids),
+            "task_ids": created_ids,
+            "batches": batches
+        }
+        
+    def _set_embedding(self, value: str, carried: str = "t") -> str:
+        """
+        Build the Cypher clauses writing the embedding of the Task node `t`
+        and the provider that produced it, taken from $embedding_provider.
+        
+        Args:
+            value: Cypher expression of the embedding
+            carried: Variables kept in scope after the clause
             
+        Returns:
+            A SET clause, followed by a call storing a float32 vector
+            property when compact storage is on
+        """
+        if self.store_compact_embeddings:
+            return (f"SET t.embedding_provider = $embedding_provider "
+                    f"WITH {carried} CALL db.create.setNodeVectorProperty(t, 'embedding', {value})")
+        return f"SET t.embedding = {value}, t.embedding_provider = $embedding_provider"
+        
     async def find_similar_tasks(self, embedding: List[float], 
                            limit: int = 5, threshold: float = 0.7) -> List[Dict[str, Any]]:
         """
         Find similar tasks using vector similarity search.
         
+        Served from the in-process index when it is loaded. Otherwise uses the
+        native `task_embedding_index` for an approximate top-k lookup and
+        applies the similarity threshold afterwards. If the index or the
+        vector procedures are unavailable, falls back to a full label scan.
+        
         Args:
             embedding: Vector embedding to search with
             limit: Maximum number of results to return
@@ -88,29 +531,168 @@ class Neo4jClient:
         Returns:
             List of similar tasks with similarity scores
         """
+        if self.local_index is not None and self.local_index.loaded:
+            return self.local_index.search(embedding, limit, threshold)
+            
+        async with self.driver.session() as session:
+            if self._vector_index_enabled():
+                try:
+                    return await self._query_vector_index(session, embedding, limit, threshold)
+                except ClientError as e:
+                    if not self._is_missing_index_error(e):
+                        raise
+                    logger.warning(f"Vector index unavailable, falling back to label scan: {str(e)}")
+                    self._vector_index_retry_at = time.monotonic() + VECTOR_INDEX_RETRY_SECONDS
+                    
+            return await self._scan_similar_tasks(session, embedding, limit, threshold)
+            
+    async def find_tasks_by_keywords(self, text: str, limit: int = 5,
+                                     threshold: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Find tasks sharing keywords with a text.
+        
+        A cheap fallback for when no embedding can be computed, e.g. while the
+        embedding API is unavailable. Served from the in-process index when it
+        is loaded, otherwise by substring matching in Neo4j.
+        
+        Args:
+            text: Query text
+            limit: Maximum number of results to return
+            threshold: Minimum fraction of keywords matched
+            
+        Returns:
+            List of matching tasks with the match score as similarity
+        """
+        if self.local_index is not None and self.local_index.loaded:
+            return self.local_index.keyword_search(text, limit, threshold)
+            
+        keywords = extract_keywords(text)
+        if not keywords:
+            return []
+            
         async with self.driver.session() as session:
-            # Use vector similarity search
-            # Note: This assumes Neo4j with vector index capabilities is set up
             query = """
             MATCH (t:Task)
-            WHERE EXISTS(t.embedding)
-            WITH t, gds.similarity.cosine(t.embedding, $embedding) AS similarity
-            WHERE similarity >= $threshold
-            RETURN t.id AS id, t.title AS title, t.description AS description, 
-                   similarity, t.metadata AS metadata
+            WITH t, [word IN $keywords WHERE toLower(t.title) CONTAINS word
+                     OR toLower(t.description) CONTAINS word] AS matched
+            WITH t, toFloat(size(matched)) / size($keywords) AS score
+            WHERE score >= $threshold
+            RETURN t.id as id, t.title as title, t.description as description,
+                   score as similarity, t.metadata as metadata
             ORDER BY similarity DESC
             LIMIT $limit
             """
             
-            result = await session.run(
-                query,
-                embedding=embedding,
-                threshold=threshold,
-                limit=limit
-            )
+            records = await self._run(session, "keyword_search", query, {
+                "keywords": keywords,
+                "threshold": threshold,
+                "limit": limit
+            })
+            return [dict(record) for record in records]
+            
+    def _vector_index_enabled(self) -> bool:
+        """Whether the vector index should be tried for the next lookup."""
+        return time.monotonic() >= self._vector_index_retry_at
+        
+    @staticmethod
+    def _is_missing_index_error(error: ClientError) -> bool:
+        """
+        Check whether an error means the vector index cannot be used.
+        
+        Args:
+            error: Error raised by the driver
             
-            tasks = [dict(record) async for record in result]
-            return tasks
+        Returns:
+            True if the index or the vector procedures are missing
+        """
+        if error.code in ("Neo.ClientError.Procedure.ProcedureNotFound",
+                          "Neo.ClientError.Schema.IndexNotFound"):
+            return True
+        message = (error.message or "").lower()
+        return "index" in message and ("no such" in message or "not found" in message
+                                       or "does not exist" in message)
+        
+    async def _query_vector_index(self, session, embedding: List[float],
+                                  limit: int, threshold: float) -> List[Dict[str, Any]]:
+        """
+        Run an approximate top-k lookup against the native vector index.
+        
+        Args:
+            session: Open Neo4j session
+            embedding: Vector embedding to search with
+            limit: Maximum number of results to return
+            threshold: Minimum cosine similarity
+            
+        Returns:
+            List of similar tasks with similarity scores
+        """
+        # Cosine vector indexes report a score normalised to (1 + cosine) / 2,
+        # so convert back before comparing against the cosine threshold.
+        # Tasks of another embedding provider are dropped after the top-k
+        # lookup, so a database mixing providers may return fewer results.
+        query = f"""
+        CALL db.index.vector.queryNodes($index_name, $limit, $embedding)
+        YIELD node AS t, score
+        WITH t, 2 * score - 1 AS similarity
+        WHERE similarity >= $threshold AND {SAME_PROVIDER}
+        RETURN t.id AS id, t.title AS title, t.description AS description, 
+               similarity, t.metadata AS metadata
+        ORDER BY similarity DESC
+        """
+        
+        records = await self._run(session, "vector_index", query, {
+            "index_name": VECTOR_INDEX_NAME,
+            "embedding": embedding,
+            "embedding_provider": self.embedding_provider,
+            "threshold": threshold,
+            "limit": limit
+        })
+        
+        return [dict(record) for record in records]
+        
+    async def _scan_similar_tasks(self, session, embedding: List[float],
+                                  limit: int, threshold: float) -> List[Dict[str, Any]]:
+        """
+        Compare the embedding against every Task node.
+        
+        Uses the built-in vector.similarity.cosine (Neo4j 5.18+). On older
+        servers without it the scan logs a warning and finds nothing.
+        
+        Args:
+            session: Open Neo4j session
+            embedding: Vector embedding to search with
+            limit: Maximum number of results to return
+            threshold: Minimum cosine similarity
+            
+        Returns:
+            List of similar tasks with similarity scores
+        """
+        # Like the vector index, the function scores (1 + cosine) / 2
+        query = f"""
+        MATCH (t:Task)
+        WHERE t.embedding IS NOT NULL AND {SAME_PROVIDER}
+        WITH t, 2 * vector.similarity.cosine(t.embedding, $embedding) - 1 AS similarity
+        WHERE similarity >= $threshold
+        RETURN t.id AS id, t.title AS title, t.description AS description, 
+               similarity, t.metadata AS metadata
+        ORDER BY similarity DESC
+        LIMIT $limit
+        """
+        
+        try:
+            records = await self._run(session, "label_scan", query, {
+                "embedding": embedding,
+                "embedding_provider": self.embedding_provider,
+                "threshold": threshold,
+                "limit": limit
+            })
+        except ClientError as e:
+            if "vector.similarity.cosine" not in (e.message or ""):
+                raise
+            logger.warning(f"vector.similarity.cosine is unavailable, similar task scan skipped: {str(e)}")
+            return []
+            
+        return [dict(record) for record in records]
             
     async def get_task_by_id(self, task_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -129,13 +711,12 @@ class Neo4jClient:
                    t.metadata AS metadata, t.created_at AS created_at
             """
             
-            result = await session.run(query, id=task_id)
-            record = await result.single()
+            records = await self._run(session, "get_task", query, {"id": task_id})
             
-            if not record:
+            if not records:
                 return None
                 
-            return dict(record)
+            return dict(records[0])
             
     async def update_task(self, task_id: str, updates: Dict[str, Any]) -> bool:
         """
@@ -155,22 +736,40 @@ class Neo4jClient:
             
             for key, value in updates.items():
                 if key not in ["id", "created_at"]:  # Don't allow updating these fields
-                    set_clauses.append(f"t.{key} = ${key}")
                     params[key] = value
+                    if key != "embedding":
+                        set_clauses.append(f"t.{key} = ${key}")
                     
-            if not set_clauses:
+            if len(params) == 1:
                 return False
                 
+            set_clauses.append("t.updated_at = datetime()")
+            embedding_clause = self._set_embedding("$embedding") if "embedding" in params else ""
             query = f"""
             MATCH (t:Task {{id: $id}})
-            SET {', '.join(set_clauses)}, t.updated_at = datetime()
-            RETURN t.id as id
+            SET {', '.join(set_clauses)}
+            {embedding_clause}
+            RETURN t.id as id, t.updated_at.epochMillis AS changed_at
             """
             
-            result = await session.run(query, **params)
-            record = await result.single()
+            records = await self._run(session, "update_task", query, {
+                **params,
+                "embedding_provider": self.embedding_provider
+            })
+            record = records[0] if records else None
             
-            return record is not None
+        if record is not None:
+            self._written_here([dict(record)])
+        if record is not None and self.local_index is not None:
+            if "embedding" in params:
+                payload = None
+                if task_id not in self.local_index:
+                    payload = await self.get_task_by_id(task_id) or {}
+                self.local_index.upsert(task_id, params["embedding"], payload)
+            self.local_index.update_payload(task_id, params)
+        if record is not None:
+            self._notify_task_changed("updated", task_id, params.get("embedding"))
+        return record is not None
             
     async def delete_task(self, task_id: str) -> bool:
         """
@@ -189,10 +788,13 @@ class Neo4jClient:
             RETURN count(*) as deleted
             """
             
-            result = await session.run(query, id=task_id)
-            record = await result.single()
+            records = await self._run(session, "delete_task", query, {"id": task_id})
+            record = records[0] if records else None
             
-            return record and record["deleted"] > 0
+        if self.local_index is not None:
+            self.local_index.remove(task_id)
+        self._notify_task_changed("deleted", task_id)
+        return record and record["deleted"] > 0
             
     async def setup_schema(self):
         """Set up database schema including indices and constraints."""
@@ -205,12 +807,12 @@ class Neo4jClient:
             try:
                 await session.run("""
                 CALL db.index.vector.createNodeIndex(
-                    'task_embedding_index',
+                    $index_name,
                     'Task',
                     'embedding',
-                    1536,
+                    $dimensions,
                     'cosine'
                 )
-                """)
+                """, index_name=VECTOR_INDEX_NAME, dimensions=self.embedding_dimensions)
             except Exception as e:
                 logger.warning(f"Could not create vector index: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Compact embedding encodings used for candidate search.
+"""
+
+from typing import Tuple
+import numpy as np
+
+# Supported embedding precisions and their bytes per dimension
+PRECISIONS = {
+    "float32": 4,
+    "float16": 2,
+    "int8": 1
+}
+
+def validate_precision(precision: str) -> str:
+    """
+    Validate an embedding precision name.
+
+    Args:
+        precision: Precision name
+
+    Returns:
+        The precision name
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported embedding precision: {precision}")
+    return precision
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-vector int8 quantization.
+
+    Each row is scaled so that its largest absolute component maps to 127.
+
+    Args:
+        vectors: Array of shape (n, dimensions) or (dimensions,)
+
+    Returns:
+        Tuple of (int8 codes, float32 scales) where vector ~= codes * scale
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    peaks = np.abs(vectors).max(axis=-1, keepdims=True)
+    scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, np.squeeze(scales, axis=-1)
+
+def dequantize_int8(codes: np.ndarray, scales: np.ndarray) -> np.ndarray:
+    """
+    Reverse quantize_int8.
+
+    Args:
+        codes: int8 codes
+        scales: Per-vector scales
+
+    Returns:
+        Approximate float32 vectors
+    """
+    return codes.astype(np.float32) * np.asarray(scales, dtype=np.float32)[..., None]
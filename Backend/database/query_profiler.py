@@ -0,0 +1,174 @@
+"""
+Result summary metrics, sampled PROFILE plans and slow-query logging for Neo4j.
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+import logging
+import random
+import re
+
+from helpers import format_timestamp
+from metrics import NEO4J_DB_HITS, NEO4J_ROWS, NEO4J_SERVER_TIME, NEO4J_SLOW_QUERIES
+
+logger = logging.getLogger(__name__)
+
+# Slow queries are logged as one JSON object per line on their own logger,
+# so they can be routed to a separate handler
+slow_query_logger = logging.getLogger("database.slow_queries")
+
+# Plan operators listed in a slow-query entry, by database hits
+PLAN_OPERATORS = 10
+
+def describe_parameters(value: Any) -> Any:
+    """
+    Describe the shape of query parameters without their contents.
+
+    Numbers and booleans are kept since limits and thresholds explain query
+    cost; strings and lists are reduced to their type and length, so
+    neither task texts nor embedding values end up in the log.
+
+    Args:
+        value: Parameter value or dictionary of parameters
+
+    Returns:
+        JSON-serializable description of the value
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, str):
+        return f"str[{len(value)}]"
+    if isinstance(value, (bytes, bytearray)):
+        return f"bytes[{len(value)}]"
+    if isinstance(value, dict):
+        return {str(key): describe_parameters(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return "list[0]"
+        first = value[0]
+        if isinstance(first, (bool, int, float, str)):
+            return f"list[{len(value)}] of {type(first).__name__}"
+        return {"list": len(value), "of": describe_parameters(first)}
+    return type(value).__name__
+
+def plan_operators(profile: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Flatten a PROFILE plan into its operators.
+
+    Args:
+        profile: Profiled plan from a result summary
+
+    Returns:
+        Operators with their database hits and rows, most hits first
+    """
+    operators = []
+    pending = [profile]
+    while pending:
+        plan = pending.pop()
+        operators.append({
+            "operator": plan.get("operatorType"),
+            "db_hits": plan.get("dbHits", 0),
+            "rows": plan.get("rows", 0),
+            "details": (plan.get("args") or {}).get("Details")
+        })
+        pending.extend(plan.get("children") or [])
+    return sorted(operators, key=lambda operator: operator["db_hits"], reverse=True)
+
+
+class QueryProfiler:
+    """
+    Observer of the queries run by Neo4jClient.
+
+    With stats enabled, every query's result summary feeds the Neo4j
+    metrics (server time, rows). A sample of queries is run with PROFILE,
+    adding database hits and the executed plan. Queries slower than
+    `slow_query_ms`, measured by the client, are written to the slow-query
+    log with the summary, the plan if profiled and the shapes of their
+    parameters.
+    """
+
+    def __init__(self, stats_enabled: bool = False, profile_sample_rate: float = 0.0,
+                 slow_query_ms: float = 500.0):
+        """
+        Initialize the profiler.
+
+        Args:
+            stats_enabled: Record result summary metrics for every query
+            profile_sample_rate: Fraction of queries run with PROFILE
+            slow_query_ms: Threshold of the slow-query log; 0 disables it
+        """
+        self.stats_enabled = stats_enabled
+        self.profile_sample_rate = profile_sample_rate
+        self.slow_query_ms = slow_query_ms
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional["QueryProfiler"]:
+        """
+        Create a profiler from the "query_profiling" section of the Neo4j config.
+
+        Args:
+            config: Query profiling configuration dictionary
+
+        Returns:
+            Configured QueryProfiler, or None if everything is disabled
+        """
+        profiler = cls(
+            stats_enabled=config.get("stats_enabled", False),
+            profile_sample_rate=config.get("profile_sample_rate", 0.0),
+            slow_query_ms=config.get("slow_query_ms", 500.0)
+        )
+        return profiler if profiler.enabled else None
+
+    @property
+    def enabled(self) -> bool:
+        return self.stats_enabled or self.profile_sample_rate > 0 or self.slow_query_ms > 0
+
+    def should_profile(self) -> bool:
+        """Decide whether to run the next query with PROFILE."""
+        return self.profile_sample_rate > 0 and random.random() < self.profile_sample_rate
+
+    def observe(self, operation: str, query: str, params: Dict[str, Any], summary,
+                elapsed: float, rows: int, profiled: bool):
+        """
+        Record a completed query.
+
+        Args:
+            operation: Operation label of the query
+            query: Cypher query, without the PROFILE prefix
+            params: Query parameters
+            summary: Result summary from the driver
+            elapsed: Client-side duration in seconds, including fetching records
+            rows: Number of records returned
+            profiled: Whether the query ran with PROFILE
+        """
+        server_ms = None
+        if summary.result_available_after is not None:
+            server_ms = summary.result_available_after + (summary.result_consumed_after or 0)
+        profile = summary.profile if profiled else None
+        db_hits = sum(operator["db_hits"] for operator in plan_operators(profile)) if profile else None
+
+        if self.stats_enabled:
+            if server_ms is not None:
+                NEO4J_SERVER_TIME.observe(server_ms / 1000.0, operation=operation)
+            NEO4J_ROWS.observe(rows, operation=operation)
+        if db_hits is not None:
+            NEO4J_DB_HITS.observe(db_hits, operation=operation)
+            logger.debug(f"Profiled {operation}: {db_hits} db hits, {rows} rows, {elapsed * 1000:.1f} ms")
+
+        if self.slow_query_ms <= 0 or elapsed * 1000.0 < self.slow_query_ms:
+            return
+        NEO4J_SLOW_QUERIES.inc(operation=operation)
+        entry = {
+            "timestamp": format_timestamp(),
+            "operation": operation,
+            "elapsed_ms": round(elapsed * 1000.0, 3),
+            "server_ms": server_ms,
+            "rows": rows,
+            "query_type": summary.query_type,
+            "counters": summary.metadata.get("stats", {}),
+            "db_hits": db_hits,
+            "plan": plan_operators(profile)[:PLAN_OPERATORS] if profile else None,
+            "query": re.sub(r"\s+", " ", query).strip(),
+            "parameters": describe_parameters(params)
+        }
+        slow_query_logger.warning(json.dumps(entry, default=str))
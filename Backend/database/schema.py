@@ -18,7 +18,8 @@ class Schema:
                 "id": "Unique identifier (UUID)",
                 "title": "Task title",
                 "description": "Task description",
-                "embedding": "Vector embedding (List of floats)",
+                "embedding": "Vector embedding (List of floats, float32 vector property with compact storage)",
+                "embedding_provider": "Name of the embedding provider that produced the embedding",
                 "created_at": "Creation timestamp",
                 "updated_at": "Last update timestamp",
                 "metadata": "JSON object with additional properties"
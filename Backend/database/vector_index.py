@@ -0,0 +1,564 @@
+"""
+In-process vector index mirroring the Task embeddings stored in Neo4j.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import logging
+import tempfile
+
+import numpy as np
+
+from database.quantization import PRECISIONS, validate_precision, quantize_int8
+from database.coarse_index import CoarseProjection
+from helpers import extract_keywords
+
+logger = logging.getLogger(__name__)
+
+class LocalVectorIndex:
+    """
+    L2-normalised embedding matrix of all Task nodes kept in memory.
+
+    A lookup is a single matrix-vector product followed by an argpartition
+    top-k, which avoids a database round trip for every similarity search.
+    Rows are kept dense: removing a task moves the last row into its slot.
+
+    With a float16 or int8 precision the matrix is stored compactly (2x or
+    4x smaller). The float32 rows are then kept in a memory-mapped
+    temporary file instead of memory; searches take `rescore_oversample`
+    times as many candidates from the compact matrix and re-rank them with
+    their float32 rows, so results stay exact without a database round
+    trip. If the file cannot be created, compact scores are returned.
+
+    With a coarse projection, each row is also kept as a short projected
+    vector. Searches first score these coarse vectors to pick
+    `coarse_oversample` times as many candidates as requested, then re-rank
+    only those candidates with the stored full-dimension rows.
+
+    The index only sees writes made through this process by itself;
+    Neo4jClient.refresh_local_index applies the writes of other workers and
+    replicas.
+    """
+
+    # Rows scored per block when the matrix is not float32
+    SCORE_BLOCK_ROWS = 4096
+
+    # Weight of a keyword found only in the description rather than the title
+    DESCRIPTION_KEYWORD_WEIGHT = 0.7
+
+    # Below this many rows a full scan is cheap enough to skip the coarse pass
+    COARSE_MIN_ROWS = 2048
+
+    def __init__(self, dimensions: int = 1536, initial_capacity: int = 1024,
+                 precision: str = "float32", projection: Optional[CoarseProjection] = None,
+                 coarse_oversample: int = 10, rescore_oversample: int = 4,
+                 rescore_dir: Optional[str] = None):
+        """
+        Initialize an empty index.
+
+        Args:
+            dimensions: Embedding dimensionality
+            initial_capacity: Number of rows allocated up front
+            precision: Storage precision, "float32", "float16" or "int8"
+            projection: Optional coarse projection used for candidate generation
+            coarse_oversample: Coarse candidates per requested result
+            rescore_oversample: Compact candidates per requested result that
+                are re-ranked with float32 rows
+            rescore_dir: Directory of the float32 rows file of a compact
+                index; None uses the system temporary directory
+        """
+        self.dimensions = dimensions
+        self.precision = validate_precision(precision)
+        self._dtype = {"float32": np.float32, "float16": np.float16, "int8": np.int8}[precision]
+        self._matrix = np.zeros((initial_capacity, dimensions), dtype=self._dtype)
+        self._scales = np.ones(initial_capacity, dtype=np.float32)
+        self.rescore_oversample = max(1, rescore_oversample)
+        self.rescore_dir = rescore_dir
+        self._exact = self._allocate_exact(initial_capacity)
+        self.coarse_oversample = max(1, coarse_oversample)
+        self.projection = None
+        self._coarse: Optional["np.ndarray"] = None
+        self._ids: List[str] = []
+        self._payloads: List[Dict[str, Any]] = []
+        self._keywords: List[Tuple[frozenset, frozenset]] = []
+        self._rows: Dict[str, int] = {}
+        self.loaded = False
+        if projection is not None:
+            self.set_projection(projection)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._rows
+
+    def task_ids(self) -> List[str]:
+        """Return the IDs of the indexed tasks."""
+        return list(self._ids)
+
+    def load(self, records: Iterable[Dict[str, Any]]):
+        """
+        Replace the index contents with the given task records.
+
+        Args:
+            records: Dictionaries with id, embedding, title, description and metadata
+        """
+        self._ids = []
+        self._payloads = []
+        self._keywords = []
+        self._rows = {}
+        capacity = max(1024, self._matrix.shape[0])
+        self._matrix = np.zeros((capacity, self.dimensions), dtype=self._dtype)
+        self._scales = np.ones(capacity, dtype=np.float32)
+        self._exact = self._allocate_exact(capacity)
+        if self.projection is not None:
+            self._coarse = np.zeros((capacity, self.projection.dimensions), dtype=np.float32)
+
+        for record in records:
+            embedding = record.get("embedding")
+            if embedding is None:
+                continue
+            self.upsert(record["id"], embedding, self._payload_from(record))
+
+        self.loaded = True
+        logger.info(f"Loaded {len(self)} task embeddings into the local vector index")
+
+    def upsert(self, task_id: str, embedding: List[float],
+               payload: Optional[Dict[str, Any]] = None):
+        """
+        Insert or replace a task.
+
+        Args:
+            task_id: Task ID
+            embedding: Task embedding
+            payload: Task fields returned with search results; None keeps
+                the fields already stored for the task
+        """
+        vector = self._normalize(embedding)
+        if vector is None:
+            logger.warning(f"Ignoring task {task_id} with invalid embedding")
+            return
+
+        row = self._rows.get(task_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_capacity(row + 1)
+            self._ids.append(task_id)
+            self._payloads.append({})
+            self._keywords.append((frozenset(), frozenset()))
+            self._rows[task_id] = row
+
+        self._store_row(row, vector)
+        if payload is not None:
+            self._payloads[row] = self._payload_from(payload)
+            self._keywords[row] = self._keywords_from(self._payloads[row])
+
+    def update_payload(self, task_id: str, fields: Dict[str, Any]):
+        """
+        Update the stored fields of a task without touching its embedding.
+
+        Args:
+            task_id: Task ID
+            fields: Fields to update
+        """
+        row = self._rows.get(task_id)
+        if row is None:
+            return
+        self._payloads[row].update(self._payload_from(fields, partial=True))
+        self._keywords[row] = self._keywords_from(self._payloads[row])
+
+    def remove(self, task_id: str):
+        """
+        Remove a task from the index.
+
+        Args:
+            task_id: Task ID
+        """
+        row = self._rows.pop(task_id, None)
+        if row is None:
+            return
+
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._matrix[row] = self._matrix[last]
+            self._scales[row] = self._scales[last]
+            if self._exact is not None:
+                self._exact[row] = self._exact[last]
+            if self._coarse is not None:
+                self._coarse[row] = self._coarse[last]
+            self._ids[row] = moved_id
+            self._payloads[row] = self._payloads[last]
+            self._keywords[row] = self._keywords[last]
+            self._rows[moved_id] = row
+
+        self._ids.pop()
+        self._payloads.pop()
+        self._keywords.pop()
+
+    def search(self, embedding: List[float], limit: int = 5,
+               threshold: float = 0.7) -> List[Dict[str, Any]]:
+        """
+        Find the most similar tasks by cosine similarity.
+
+        Scores are exact, also for compact storage as long as its float32
+        rows file exists. Tasks the compact or coarse pass ranks too low can
+        be missed even though they would pass the threshold.
+
+        Args:
+            embedding: Vector embedding to search with
+            limit: Maximum number of results to return
+            threshold: Minimum similarity threshold
+
+        Returns:
+            List of similar tasks with similarity scores, best first
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return []
+
+        if self._exact is None:
+            ranked = self._ranked(query, limit)
+        else:
+            ranked = self._rescored(query, self._ranked(query, limit * self.rescore_oversample), limit)
+
+        results = []
+        for row, similarity in ranked:
+            if similarity < threshold:
+                break
+            results.append(self._result(row, similarity))
+        return results
+
+    def search_candidates(self, embedding: List[float], count: int) -> List[str]:
+        """
+        Get the IDs of the best candidates according to the stored vectors,
+        without re-ranking compact rows.
+
+        Args:
+            embedding: Vector embedding to search with
+            count: Number of candidates
+
+        Returns:
+            Candidate task IDs, best first
+        """
+        query = self._normalize(embedding)
+        if query is None:
+            return []
+        return [self._ids[row] for row, _ in self._ranked(query, count)]
+
+    def keyword_search(self, text: str, limit: int = 5,
+                       threshold: float = 0.3) -> List[Dict[str, Any]]:
+        """
+        Find tasks sharing keywords with a text, without any embedding.
+
+        The score is the weighted fraction of the text's keywords that
+        appear in a task's title or, with a lower weight, its description.
+        Used as a cheap fallback when embeddings cannot be computed.
+
+        Args:
+            text: Query text
+            limit: Maximum number of results to return
+            threshold: Minimum score
+
+        Returns:
+            List of matching tasks with scores as similarity, best first
+        """
+        keywords = extract_keywords(text)
+        if not keywords:
+            return []
+
+        scored = []
+        for row, (title_words, description_words) in enumerate(self._keywords):
+            score = 0.0
+            for keyword in keywords:
+                if keyword in title_words:
+                    score += 1.0
+                elif keyword in description_words:
+                    score += self.DESCRIPTION_KEYWORD_WEIGHT
+            score /= len(keywords)
+            if score >= threshold:
+                scored.append((score, row))
+
+        scored.sort(key=lambda item: -item[0])
+        return [self._result(row, score) for score, row in scored[:limit]]
+
+    def set_projection(self, projection: Optional[CoarseProjection]):
+        """
+        Replace the coarse projection and rebuild the coarse vectors of all rows.
+
+        Args:
+            projection: New projection, or None to search the full vectors only
+        """
+        if projection is not None and projection.input_dimensions != self.dimensions:
+            raise ValueError(f"Projection expects {projection.input_dimensions} dimensions, "
+                             f"the index has {self.dimensions}")
+
+        self.projection = projection
+        if projection is None:
+            self._coarse = None
+            return
+
+        count = len(self._ids)
+        self._coarse = np.zeros((self._matrix.shape[0], projection.dimensions), dtype=np.float32)
+        for start in range(0, count, self.SCORE_BLOCK_ROWS):
+            end = min(count, start + self.SCORE_BLOCK_ROWS)
+            self._coarse[start:end] = projection.transform(self._full_rows(np.arange(start, end)))
+        logger.info(f"Built {projection.dimensions}-dimension {projection.mode} coarse index "
+                    f"for {count} task embeddings")
+
+    def memory_bytes(self) -> int:
+        """
+        Get the memory used by the stored vectors.
+
+        The float32 rows file of a compact index is not included; the
+        operating system pages it in and out as needed.
+
+        Returns:
+            Size in bytes of the rows in use, including coarse vectors
+        """
+        per_row = self.dimensions * PRECISIONS[self.precision]
+        if self.precision == "int8":
+            per_row += self._scales.itemsize
+        if self._coarse is not None:
+            per_row += self._coarse.shape[1] * self._coarse.itemsize
+        return per_row * len(self._ids)
+
+    def _ranked(self, query: "np.ndarray", limit: int) -> List[Tuple[int, float]]:
+        """
+        Get the best rows for a normalised query with their scores.
+
+        Uses the coarse vectors to select candidates when a projection is
+        set and the index is large enough, and the stored rows otherwise.
+
+        Args:
+            query: Unit-length float32 query vector
+            limit: Number of rows
+
+        Returns:
+            List of (row, similarity) tuples, best first
+        """
+        count = len(self._ids)
+        candidates = limit * self.coarse_oversample
+        if self._coarse is None or count < self.COARSE_MIN_ROWS or candidates >= count:
+            scores = self._scores(query)
+            return [(int(row), float(scores[row])) for row in self._top_rows(scores, limit)]
+
+        coarse_scores = self._coarse[:count] @ self.projection.transform(query)
+        rows = self._top_rows(coarse_scores, candidates)
+        scores = self._full_rows(rows) @ query
+        return [(int(rows[i]), float(scores[i])) for i in self._top_rows(scores, limit)]
+
+    def _rescored(self, query: "np.ndarray", ranked: List[Tuple[int, float]],
+                  limit: int) -> List[Tuple[int, float]]:
+        """
+        Re-rank candidate rows with their float32 rows.
+
+        Args:
+            query: Unit-length float32 query vector
+            ranked: Candidate (row, similarity) tuples from the compact matrix
+            limit: Number of rows
+
+        Returns:
+            List of (row, exact similarity) tuples, best first
+        """
+        if not ranked:
+            return []
+        rows = np.array([row for row, _ in ranked], dtype=np.int64)
+        scores = self._exact[rows] @ query
+        return [(int(rows[i]), float(scores[i])) for i in self._top_rows(scores, limit)]
+
+    def _allocate_exact(self, capacity: int) -> Optional["np.ndarray"]:
+        """
+        Create the memory-mapped float32 rows of a compact index.
+
+        Args:
+            capacity: Number of rows
+
+        Returns:
+            Zeroed float32 array backed by an anonymous temporary file, or
+            None for float32 storage or if the file cannot be created
+        """
+        if self.precision == "float32":
+            return None
+        try:
+            with tempfile.TemporaryFile(prefix="task-embeddings-", dir=self.rescore_dir) as handle:
+                # The mapping keeps the deleted file alive after the handle is closed
+                return np.memmap(handle, dtype=np.float32, mode="w+", shape=(capacity, self.dimensions))
+        except OSError as e:
+            logger.warning(f"Cannot create the float32 rows file, searches use {self.precision} scores: {str(e)}")
+            return None
+
+    def _full_rows(self, rows: "np.ndarray") -> "np.ndarray":
+        """
+        Get stored rows widened to float32.
+
+        Args:
+            rows: Row indices
+
+        Returns:
+            float32 array of shape (len(rows), dimensions)
+        """
+        vectors = self._matrix[rows].astype(np.float32)
+        if self.precision == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _scores(self, query: "np.ndarray") -> "np.ndarray":
+        """
+        Score all rows against a normalised query.
+
+        Args:
+            query: Unit-length float32 query vector
+
+        Returns:
+            Cosine similarity per row
+        """
+        count = len(self._ids)
+        if self.precision == "float32":
+            return self._matrix[:count] @ query
+
+        # Widen compact rows block by block so no full float32 copy is made
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, self.SCORE_BLOCK_ROWS):
+            end = min(count, start + self.SCORE_BLOCK_ROWS)
+            scores[start:end] = self._matrix[start:end].astype(np.float32) @ query
+        if self.precision == "int8":
+            scores *= self._scales[:count]
+        return scores
+
+    @staticmethod
+    def _top_rows(scores: "np.ndarray", limit: int) -> "np.ndarray":
+        """
+        Get the rows with the highest scores, best first.
+
+        Args:
+            scores: Score per row
+            limit: Number of rows
+
+        Returns:
+            Row indices
+        """
+        count = scores.shape[0]
+        if count == 0 or limit <= 0:
+            return np.empty(0, dtype=np.int64)
+        if count > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(count)
+        return top[np.argsort(-scores[top], kind="stable")]
+
+    def _result(self, row: int, similarity: float) -> Dict[str, Any]:
+        """
+        Build a search result for a row.
+
+        Args:
+            row: Row index
+            similarity: Similarity score
+
+        Returns:
+            Task dictionary with similarity score
+        """
+        payload = self._payloads[row]
+        return {
+            "id": self._ids[row],
+            "title": payload.get("title"),
+            "description": payload.get("description"),
+            "similarity": similarity,
+            "metadata": payload.get("metadata")
+        }
+
+    def _store_row(self, row: int, vector: "np.ndarray"):
+        """
+        Write a normalised vector into a row in the storage precision.
+
+        Args:
+            row: Row index
+            vector: Unit-length float32 vector
+        """
+        if self.precision == "int8":
+            codes, scale = quantize_int8(vector)
+            self._matrix[row] = codes
+            self._scales[row] = scale
+        else:
+            self._matrix[row] = vector
+        if self._exact is not None:
+            self._exact[row] = vector
+        if self._coarse is not None:
+            self._coarse[row] = self.projection.transform(vector)
+
+    def _normalize(self, embedding) -> Optional["np.ndarray"]:
+        """
+        Convert an embedding to a unit-length float32 vector.
+
+        Args:
+            embedding: Embedding as list of floats
+
+        Returns:
+            Normalised vector, or None if the embedding is unusable
+        """
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            return None
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0 or not np.isfinite(norm):
+            return None
+        return vector / norm
+
+    def _ensure_capacity(self, rows: int):
+        """
+        Grow the matrix geometrically so appends stay amortised O(1).
+
+        Args:
+            rows: Number of rows that must fit
+        """
+        capacity = self._matrix.shape[0]
+        if rows <= capacity:
+            return
+        new_capacity = max(rows, capacity * 2)
+        matrix = np.zeros((new_capacity, self.dimensions), dtype=self._dtype)
+        matrix[:len(self._ids)] = self._matrix[:len(self._ids)]
+        scales = np.ones(new_capacity, dtype=np.float32)
+        scales[:len(self._ids)] = self._scales[:len(self._ids)]
+        self._matrix = matrix
+        self._scales = scales
+        if self._exact is not None:
+            exact = self._allocate_exact(new_capacity)
+            if exact is not None:
+                exact[:len(self._ids)] = self._exact[:len(self._ids)]
+            self._exact = exact
+        if self._coarse is not None:
+            coarse = np.zeros((new_capacity, self._coarse.shape[1]), dtype=np.float32)
+            coarse[:len(self._ids)] = self._coarse[:len(self._ids)]
+            self._coarse = coarse
+
+    @staticmethod
+    def _keywords_from(payload: Dict[str, Any]) -> Tuple[frozenset, frozenset]:
+        """
+        Extract the title and description keywords of a task.
+
+        Args:
+            payload: Task payload
+
+        Returns:
+            Tuple of (title keywords, description keywords)
+        """
+        return (
+            frozenset(extract_keywords(payload.get("title") or "")),
+            frozenset(extract_keywords(payload.get("description") or ""))
+        )
+
+    @staticmethod
+    def _payload_from(record: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """
+        Extract the fields returned with search results.
+
+        Args:
+            record: Task record or update dictionary
+            partial: Only include fields present in the record
+
+        Returns:
+            Payload dictionary
+        """
+        keys = ("title", "description", "metadata")
+        if partial:
+            return {key: record[key] for key in keys if key in record}
+        return {key: record.get(key) for key in keys}
@@ -2,11 +2,14 @@
 Helper functions for the application.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Sequence, Union, BinaryIO
+import asyncio
+import io
 import logging
 import base64
 import json
 import hashlib
+import re
 import time
 from datetime import datetime
 
@@ -54,6 +57,40 @@ def calculate_hash(data: bytes) -> str:
     """
     return hashlib.sha256(data).hexdigest()
 
+def as_binary_file(data: Union[bytes, BinaryIO]) -> BinaryIO:
+    """
+    Return a binary file handle for raw bytes or an existing handle.
+    
+    Existing handles are rewound to the start; bytes are wrapped without
+    being copied into a temporary file.
+    
+    Args:
+        data: Raw bytes or a seekable binary file handle
+        
+    Returns:
+        Binary file handle positioned at the start
+    """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return io.BytesIO(data)
+    data.seek(0)
+    return data
+
+def get_file_size(file: BinaryIO) -> int:
+    """
+    Get the size of a seekable file handle without reading it.
+    
+    Args:
+        file: Seekable binary file handle
+        
+    Returns:
+        Size in bytes
+    """
+    position = file.tell()
+    file.seek(0, io.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
 def format_timestamp(timestamp: Optional[float] = None) -> str:
     """
     Format a timestamp as ISO format string.
@@ -116,6 +153,32 @@ def truncate_text(text: str, max_length: int = 100) -> str:
         return text
     return text[:max_length] + "..."
 
+# Common words ignored when matching keywords
+STOP_WORDS = frozenset("""
+a an and are as at be but by can do for from has have how i in into is it its me my
+of on or our please so that the their them then there these this to us want was we
+what when where which who will with would you your
+""".split())
+
+def extract_keywords(text: str, min_length: int = 3) -> List[str]:
+    """
+    Extract distinct lowercase keywords from text for cheap keyword matching.
+    
+    Args:
+        text: Input text
+        min_length: Minimum keyword length
+        
+    Returns:
+        Keywords in order of first appearance
+    """
+    keywords = []
+    seen = set()
+    for word in re.findall(r"[a-z0-9]+", (text or "").lower()):
+        if len(word) >= min_length and word not in STOP_WORDS and word not in seen:
+            seen.add(word)
+            keywords.append(word)
+    return keywords
+
 def merge_dictionaries(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str, Any]:
     """
     Merge two dictionaries recursively.
@@ -135,4 +198,35 @@ def merge_dictionaries(dict1: Dict[str, Any], dict2: Dict[str, Any]) -> Dict[str
         else:
             result[key] = value
             
-    return result
\ No newline at end of file
+    return result
+
+async def gather_bounded(func: Callable[[Any], Awaitable[Any]], items: Sequence[Any],
+                         concurrency: int, timeout: Optional[float] = None) -> List[Optional[Any]]:
+    """
+    Run a coroutine function over items concurrently with a bounded fan-out.
+    
+    Results keep the order of the input items. An item that fails or exceeds
+    the timeout yields None instead of failing the whole batch.
+    
+    Args:
+        func: Coroutine function applied to each item
+        items: Items to process
+        concurrency: Maximum number of items processed at the same time
+        timeout: Optional per-item timeout in seconds
+        
+    Returns:
+        List of results (None for failed items) in input order
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    
+    async def run(index: int, item: Any) -> Optional[Any]:
+        async with semaphore:
+            try:
+                return await asyncio.wait_for(func(item), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Item {index} timed out after {timeout}s")
+            except Exception as e:
+                logger.warning(f"Item {index} failed: {str(e)}")
+            return None
+            
+    return await asyncio.gather(*(run(i, item) for i, item in enumerate(items)))
@@ -5,6 +5,7 @@ Main application entry point.
 import logging
 import asyncio
 from fastapi import FastAPI, Depends
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
@@ -12,23 +13,71 @@ from api.routes import router as api_router
 from config.settings import get_settings
 from helpers import setup_logging
 from database.neo4j_client import Neo4jClient
+from Instructor.instructor import Instructor
+from api.groq_client import GroqClient
+from api.uploads import UploadSizeLimitMiddleware
+from api.jobs import JobManager
+from api.profiling import ProfilingMiddleware
+from api.traffic_recorder import TrafficRecorderMiddleware
+from metrics import REGISTRY, stats_families
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Monotonic keys of the component stats exported on /metrics
+COUNTER_STATS = (
+    "requests", "successes", "failures", "throttled", "server_errors", "connection_errors",
+    "retries", "hedged", "hedge_wins", "circuit_rejected", "rate_limit_wait_seconds",
+    "backoff_seconds", "times_opened", "hits", "misses", "shared", "invalidations",
+    "memory_hits", "disk_hits", "memory_evictions", "disk_evictions"
+)
+
+def collect_component_metrics(app: FastAPI):
+    """
+    Export the statistics kept by the shared components.
+    
+    Args:
+        app: Application whose state holds the components
+        
+    Returns:
+        List of metric families
+    """
+    families = []
+    instructor = getattr(app.state, "instructor", None)
+    if instructor is not None:
+        groq_client = instructor.groq_client
+        families += stats_families("tuner_groq", "Groq client statistics",
+                                   groq_client.rate_limit_stats(), COUNTER_STATS)
+        if groq_client.embedding_cache is not None:
+            families += stats_families("tuner_embedding_cache", "Embedding cache statistics",
+                                       groq_client.embedding_cache.stats(), COUNTER_STATS)
+        if instructor.result_cache is not None:
+            families += stats_families("tuner_result_cache", "Result cache statistics",
+                                       instructor.result_cache.stats(), COUNTER_STATS)
+            
+    job_manager = getattr(app.state, "job_manager", None)
+    if job_manager is not None:
+        families += stats_families("tuner_jobs", "Background jobs by status", job_manager.stats())
+        
+    neo4j_client = getattr(app.state, "neo4j_client", None)
+    if neo4j_client is not None and neo4j_client.local_index is not None:
+        families += stats_families("tuner_local_index", "Local vector index size", {
+            "tasks": len(neo4j_client.local_index),
+            "memory_bytes": neo4j_client.local_index.memory_bytes()
+        })
+    return families
+
 # Async context manager for startup/shutdown events
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Setup database and other resources
     settings = get_settings()
+    config = settings.dict()
     
-    # Initialize Neo4j client and set up schema
-    neo4j_client = Neo4jClient(
-        uri=settings.neo4j_uri,
-        username=settings.neo4j_username,
-        password=settings.neo4j_password
-    )
+    # Initialize Neo4j client and set up schema; a client already placed in
+    # app.state (e.g. the in-memory stand-in of the benchmarks) is used as is
+    neo4j_client = getattr(app.state, "neo4j_client", None) or Neo4jClient.from_config(config["neo4j"])
 
     try:
         await neo4j_client.setup_schema()
@@ -36,14 +85,77 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error setting up database schema: {str(e)}")
     
+    # Mirror Task embeddings in memory; searches fall back to Neo4j if this fails
+    try:
+        await neo4j_client.load_local_index()
+    except Exception as e:
+        logger.error(f"Error loading local vector index: {str(e)}")
+    
+    # Task writes of other workers and replicas only reach the local index
+    # through the periodic refresh, which also retries a failed load
+    neo4j_client.start_local_index_refresh()
+    refresh_seconds = config["neo4j"]["local_index_refresh_seconds"]
+    workers = config["app"]["web_concurrency"]
+    if workers > 1 and neo4j_client.local_index is not None:
+        if refresh_seconds > 0:
+            logger.warning(f"Running {workers} workers: tasks written by other workers reach "
+                           f"this worker's local vector index up to {refresh_seconds}s late")
+        else:
+            logger.warning(f"Running {workers} workers with LOCAL_INDEX_REFRESH_SECONDS=0: searches "
+                           f"miss tasks written by other workers until this worker restarts")
+    
+    # Shared Groq client with a pooled keep-alive HTTP session
+    groq_client = GroqClient.from_config(config["groq"])
+    
+    # Build the shared instructor once; every route reuses it
+    instructor = None
+    try:
+        instructor = Instructor(config, neo4j_client=neo4j_client, groq_client=groq_client)
+    except ValueError:
+        # Misconfiguration such as embedding dimensions the provider cannot
+        # produce; refuse to start rather than serve mismatched searches
+        await groq_client.close()
+        await neo4j_client.close()
+        raise
+    except Exception as e:
+        logger.error(f"Error initializing instructor: {str(e)}")
+    
+    # Bounded worker pool for requests run as background jobs
+    job_manager = JobManager.from_config(config["app"]["jobs"])
+    await job_manager.start()
+    
     # Store clients in app state
     app.state.neo4j_client = neo4j_client
+    app.state.instructor = instructor
+    app.state.job_manager = job_manager
+    REGISTRY.add_collector(lambda: collect_component_metrics(app))
     
     logger.info("Application startup complete")
     
     yield
     
     # Shutdown: Clean up resources
+    REGISTRY.clear_collectors()
+    
+    try:
+        await job_manager.close()
+        logger.info("Background job workers stopped")
+    except Exception as e:
+        logger.error(f"Error stopping background job workers: {str(e)}")
+    
+    if instructor is not None:
+        try:
+            await instructor.close()
+            logger.info("Instructor clients closed")
+        except Exception as e:
+            logger.error(f"Error closing instructor clients: {str(e)}")
+    
+    try:
+        await groq_client.close()
+        logger.info("Groq HTTP session closed")
+    except Exception as e:
+        logger.error(f"Error closing Groq HTTP session: {str(e)}")
+    
     try:
         await neo4j_client.close()
         logger.info("Neo4j connection closed")
@@ -69,6 +181,34 @@ def create_app() -> FastAPI:
         lifespan=lifespan
     )
     
+    # Reject oversized uploads as the body arrives
+    app.add_middleware(
+        UploadSizeLimitMiddleware,
+        max_body_size=settings.max_upload_size_mb * 1024 * 1024
+    )
+    
+    # Record sanitized /process and /tasks requests for replay
+    if settings.traffic_record_enabled:
+        app.add_middleware(
+            TrafficRecorderMiddleware,
+            corpus_dir=settings.traffic_record_dir,
+            sample_rate=settings.traffic_record_sample_rate,
+            max_requests=settings.traffic_record_max_requests,
+            max_body_bytes=settings.max_upload_size_mb * 1024 * 1024
+        )
+    
+    # Profile sampled or explicitly requested requests
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            output_dir=settings.profiling_dir,
+            sample_rate=settings.profiling_sample_rate,
+            header=settings.profiling_header,
+            token=settings.profiling_token,
+            max_profiles=settings.profiling_max_profiles,
+            engine=settings.profiling_engine
+        )
+    
     # Add CORS middleware
     app.add_middleware(
         CORSMiddleware,
@@ -86,6 +226,11 @@ def create_app() -> FastAPI:
         """Root endpoint for basic health check."""
         return {"message": "Welcome to the Multimodal Instructor API", "status": "online"}
     
+    @app.get("/metrics", response_class=PlainTextResponse)
+    async def metrics():
+        """Pipeline, upstream and component metrics in the Prometheus text format."""
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+    
     return app
 
 # Create the application instance
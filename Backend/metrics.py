@@ -0,0 +1,382 @@
+"""
+In-process metrics exposed in the Prometheus text format.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from contextlib import contextmanager
+from contextvars import ContextVar
+import bisect
+import math
+import time
+
+# Latency buckets in seconds, from cache hits to slow video processing
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# Payload size buckets in bytes, 1 KB to 256 MB
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))
+
+# Count buckets for rows returned and database hits of a query
+COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+# A metric family: (name, type, help text, [(labels, value), ...]); families
+# with an empty type continue the previous one, like a histogram's _sum
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+# Histogram observations of the current request, while one is being recorded
+_observations: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("metric_observations", default=None)
+
+class Counter:
+    """
+    Monotonically increasing value per label combination.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        """
+        Initialize the counter.
+
+        Args:
+            name: Metric name, exported with a `_total` suffix
+            documentation: Help text
+            labelnames: Names of the labels every sample must carry
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any):
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values
+        """
+        key = _label_key(self.labelnames, labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def collect(self) -> List[Family]:
+        samples = [(dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+        return [(f"{self.name}_total", "counter", self.documentation, samples)]
+
+
+class Histogram:
+    """
+    Distribution of observed values in cumulative buckets per label combination.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Names of the labels every observation must carry
+            buckets: Upper bounds of the buckets; +Inf is added automatically
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label combination: [per-bucket counts (non-cumulative) + overflow, sum]
+        self._values: Dict[Tuple[str, ...], List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any):
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values
+        """
+        key = _label_key(self.labelnames, labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+        observations = _observations.get()
+        if observations is not None:
+            observations.append({"metric": self.name, "labels": dict(zip(self.labelnames, key)), "value": value})
+
+    @contextmanager
+    def time(self, **labels: Any):
+        """Observe the duration of the block in seconds, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self) -> List[Family]:
+        buckets, sums, counts = [], [], []
+        for key, (bucket_counts, total) in self._values.items():
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), bucket_counts):
+                cumulative += count
+                buckets.append(({**labels, "le": _format_value(bound)}, cumulative))
+            sums.append((labels, total))
+            counts.append((labels, cumulative))
+        return [
+            (f"{self.name}_bucket", "histogram", self.documentation, buckets),
+            (f"{self.name}_sum", "", "", sums),
+            (f"{self.name}_count", "", "", counts)
+        ]
+
+
+class MetricsRegistry:
+    """
+    Set of metrics rendered together on the /metrics endpoint.
+
+    Besides counters and histograms updated in the code paths, collectors
+    are called at scrape time to export the state of components that keep
+    their own statistics (caches, circuit breaker, job queue).
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._collectors: List[Callable[[], List[Family]]] = []
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        """
+        Get or create a counter.
+
+        Args:
+            name: Metric name without the `_total` suffix
+            documentation: Help text
+            labelnames: Label names
+
+        Returns:
+            Registered counter
+        """
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        """
+        Get or create a histogram.
+
+        Args:
+            name: Metric name
+            documentation: Help text
+            labelnames: Label names
+            buckets: Bucket upper bounds
+
+        Returns:
+            Registered histogram
+        """
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], List[Family]]):
+        """
+        Register a callable producing metric families at scrape time.
+
+        Args:
+            collector: Callable returning a list of metric families
+        """
+        self._collectors.append(collector)
+
+    def clear_collectors(self):
+        """Remove all collectors, e.g. when the application shuts down."""
+        self._collectors.clear()
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text
+        """
+        families: List[Family] = []
+        for metric in self._metrics.values():
+            families.extend(metric.collect())
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                # A broken collector must not take the whole endpoint down
+                families.append(("tuner_metrics_collector_errors", "gauge",
+                                 "Collectors that failed during this scrape",
+                                 [({"error": type(e).__name__}, 1)]))
+
+        lines = []
+        for name, kind, documentation, samples in families:
+            if kind:
+                lines.append(f"# HELP {_type_name(name, kind)} {documentation}")
+                lines.append(f"# TYPE {_type_name(name, kind)} {kind}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+
+def stats_families(prefix: str, documentation: str, stats: Dict[str, Any],
+                   counters: Iterable[str] = (), labels: Optional[Dict[str, str]] = None) -> List[Family]:
+    """
+    Convert a component's stats() dictionary to metric families.
+
+    Numeric values become gauges, or counters for the keys listed in
+    `counters`; nested dictionaries are flattened with an underscore and
+    string values become a `<key>` gauge labelled with the value.
+
+    Args:
+        prefix: Metric name prefix, e.g. "tuner_groq"
+        documentation: Help text shared by the exported metrics
+        stats: Statistics dictionary
+        counters: Keys of monotonically increasing values
+        labels: Labels added to every sample
+
+    Returns:
+        List of metric families
+    """
+    counters = set(counters)
+    labels = labels or {}
+    families: List[Family] = []
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            families.extend(stats_families(name, documentation, value, counters, labels))
+        elif isinstance(value, bool) or value is None:
+            families.append((name, "gauge", documentation, [(labels, float(bool(value)))]))
+        elif isinstance(value, (int, float)):
+            if key in counters:
+                families.append((f"{name}_total", "counter", documentation, [(labels, value)]))
+            else:
+                families.append((name, "gauge", documentation, [(labels, value)]))
+        elif isinstance(value, str):
+            families.append((name, "gauge", documentation, [({**labels, key: value}, 1)]))
+    return families
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, Any]) -> Tuple[str, ...]:
+    if set(labels) != set(labelnames):
+        raise ValueError(f"Expected labels {labelnames}, got {tuple(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _type_name(name: str, kind: str) -> str:
+    # Counters and histograms are declared under their base name
+    suffix = {"counter": "_total", "histogram": "_bucket"}.get(kind)
+    if suffix and name.endswith(suffix):
+        return name[:-len(suffix)]
+    return name
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+@contextmanager
+def record_observations():
+    """
+    Collect the histogram observations made in the current context.
+
+    Tasks started inside the block inherit the context, so observations
+    made by concurrent sub-tasks of a request are collected as well.
+
+    Yields:
+        List receiving one dictionary per observation with the metric
+        name, its labels and the observed value
+    """
+    observations: List[Dict[str, Any]] = []
+    token = _observations.set(observations)
+    try:
+        yield observations
+    finally:
+        _observations.reset(token)
+
+
+@contextmanager
+def track_upstream(service: str, operation: str):
+    """
+    Record the duration of an upstream call and count it as an error if it raises.
+
+    Args:
+        service: Upstream service, e.g. "neo4j"
+        operation: Operation label
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        UPSTREAM_ERRORS.inc(service=service, operation=operation, kind=type(e).__name__)
+        raise
+    finally:
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, service=service, operation=operation)
+
+
+# Registry served on /metrics
+REGISTRY = MetricsRegistry()
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "tuner_pipeline_stage_duration_seconds",
+    "Duration of each stage of the /process pipeline",
+    ("stage",)
+)
+MODALITY_LATENCY = REGISTRY.histogram(
+    "tuner_modality_duration_seconds",
+    "Duration of processing one modality of a request",
+    ("modality", "status")
+)
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "tuner_upstream_request_duration_seconds",
+    "Duration of calls to upstream services",
+    ("service", "operation")
+)
+UPSTREAM_ERRORS = REGISTRY.counter(
+    "tuner_upstream_errors",
+    "Failed calls to upstream services by error kind",
+    ("service", "operation", "kind")
+)
+PAYLOAD_BYTES = REGISTRY.histogram(
+    "tuner_request_payload_bytes",
+    "Size of the inputs of processed requests",
+    ("kind",),
+    buckets=SIZE_BUCKETS
+)
+NEO4J_SERVER_TIME = REGISTRY.histogram(
+    "tuner_neo4j_query_server_duration_seconds",
+    "Server-side time of Neo4j queries until the last record, from the result summary",
+    ("operation",)
+)
+NEO4J_ROWS = REGISTRY.histogram(
+    "tuner_neo4j_query_rows",
+    "Records returned by Neo4j queries",
+    ("operation",),
+    buckets=COUNT_BUCKETS
+)
+NEO4J_DB_HITS = REGISTRY.histogram(
+    "tuner_neo4j_query_db_hits",
+    "Database hits of Neo4j queries run with PROFILE",
+    ("operation",),
+    buckets=COUNT_BUCKETS
+)
+NEO4J_SLOW_QUERIES = REGISTRY.counter(
+    "tuner_neo4j_slow_queries",
+    "Neo4j queries slower than the slow-query threshold",
+    ("operation",)
+)
@@ -0,0 +1,243 @@
+"""
+Image pre-processing applied before images are sent to vision models.
+"""
+
+from typing import Dict, Any, List, Optional, Union, BinaryIO
+import hashlib
+import io
+import logging
+
+try:
+    from PIL import Image, ImageOps
+    import numpy as np
+except ImportError:  # pragma: no cover - optional image dependencies
+    Image = None
+    ImageOps = None
+    np = None
+
+from helpers import as_binary_file, get_file_size
+
+logger = logging.getLogger(__name__)
+
+# Output formats supported for re-encoding, with their MIME types
+OUTPUT_FORMATS = {
+    "JPEG": "image/jpeg",
+    "WEBP": "image/webp"
+}
+
+# Source formats that vision models accept as-is
+PASSTHROUGH_FORMATS = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp"
+}
+
+class ImagePreprocessor:
+    """
+    Decodes, downsizes and re-encodes uploaded images, and removes duplicates.
+
+    Vision models gain nothing from pixels beyond their input resolution, so
+    images are shrunk to `max_side` and re-encoded as compact JPEG or WebP.
+    Within one request, byte-identical images and images whose perceptual
+    hashes are within `phash_distance` bits of each other are sent only once.
+    """
+
+    def __init__(self, max_side: int = 1024, output_format: str = "JPEG",
+                 quality: int = 85, phash_distance: int = 4):
+        """
+        Initialize the image preprocessor.
+
+        Args:
+            max_side: Longest side in pixels after downscaling
+            output_format: Re-encoding format, "JPEG" or "WEBP"
+            quality: Encoder quality (1-100)
+            phash_distance: Maximum Hamming distance between perceptual hashes
+                for two images to count as duplicates; negative disables it
+        """
+        output_format = output_format.upper()
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported image output format: {output_format}")
+
+        self.max_side = max_side
+        self.output_format = output_format
+        self.quality = quality
+        self.phash_distance = phash_distance
+
+    def prepare(self, image: Union[bytes, BinaryIO]) -> Dict[str, Any]:
+        """
+        Prepare a single image for a vision call.
+
+        Args:
+            image: Raw image data in bytes or a binary file handle
+
+        Returns:
+            Dictionary with the encoded image data, MIME type, dimensions,
+            original and new sizes, content hash and perceptual hash
+        """
+        image_file = as_binary_file(image)
+        original_size = get_file_size(image_file)
+        sha256 = self._hash_file(image_file)
+
+        if Image is None:
+            # Without Pillow the image is passed through unchanged
+            image_file.seek(0)
+            data = image_file.read()
+            return {
+                "data": data,
+                "mime_type": "image/jpeg",
+                "width": None,
+                "height": None,
+                "original_size": original_size,
+                "size": len(data),
+                "sha256": sha256,
+                "phash": None
+            }
+
+        image_file.seek(0)
+        with Image.open(image_file) as decoded:
+            source_format = decoded.format
+            decoded.seek(0)  # first frame of animated images
+            picture = ImageOps.exif_transpose(decoded)
+            picture.load()
+
+        phash = self._difference_hash(picture)
+        decoded_size = picture.size
+
+        mime_type = OUTPUT_FORMATS[self.output_format]
+        if max(picture.size) <= self.max_side and source_format == self.output_format:
+            # Already small and in the target format; avoid a lossy re-encode
+            image_file.seek(0)
+            data = image_file.read()
+        else:
+            picture.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+            data = self._encode(picture)
+
+            if len(data) >= original_size and source_format in PASSTHROUGH_FORMATS \
+                    and picture.size == decoded_size:
+                # Re-encoding did not help (e.g. small flat PNGs); keep the original
+                image_file.seek(0)
+                data = image_file.read()
+                mime_type = PASSTHROUGH_FORMATS[source_format]
+
+        return {
+            "data": data,
+            "mime_type": mime_type,
+            "width": picture.size[0],
+            "height": picture.size[1],
+            "original_size": original_size,
+            "size": len(data),
+            "sha256": sha256,
+            "phash": phash
+        }
+
+    def prepare_batch(self, images: List[Union[bytes, BinaryIO]]) -> List[Dict[str, Any]]:
+        """
+        Prepare the images of one request and drop duplicates.
+
+        Args:
+            images: Raw image data or binary file handles
+
+        Returns:
+            Prepared images in input order, without duplicates
+        """
+        prepared: List[Dict[str, Any]] = []
+        seen_hashes = set()
+
+        for index, image in enumerate(images):
+            try:
+                item = self.prepare(image)
+            except Exception as e:
+                logger.warning(f"Skipping image {index} that could not be decoded: {str(e)}")
+                continue
+
+            if item["sha256"] in seen_hashes:
+                logger.info(f"Dropping image {index}: exact duplicate")
+                continue
+            if self._is_near_duplicate(item, prepared):
+                logger.info(f"Dropping image {index}: perceptual duplicate")
+                continue
+
+            seen_hashes.add(item["sha256"])
+            item["index"] = index
+            prepared.append(item)
+
+        return prepared
+
+    def _encode(self, picture) -> bytes:
+        """
+        Encode a decoded image in the configured output format.
+
+        Args:
+            picture: Decoded PIL image
+
+        Returns:
+            Encoded image bytes
+        """
+        if self.output_format == "JPEG" and picture.mode != "RGB":
+            if picture.mode in ("RGBA", "LA", "P"):
+                # Flatten transparency onto white rather than black
+                background = Image.new("RGB", picture.size, (255, 255, 255))
+                rgba = picture.convert("RGBA")
+                background.paste(rgba, mask=rgba.getchannel("A"))
+                picture = background
+            else:
+                picture = picture.convert("RGB")
+
+        buffer = io.BytesIO()
+        picture.save(buffer, format=self.output_format, quality=self.quality, optimize=True)
+        return buffer.getvalue()
+
+    def _is_near_duplicate(self, item: Dict[str, Any], prepared: List[Dict[str, Any]]) -> bool:
+        """
+        Check whether an image is perceptually close to an already kept one.
+
+        Args:
+            item: Prepared image to check
+            prepared: Images kept so far
+
+        Returns:
+            True if the image is a perceptual duplicate
+        """
+        if self.phash_distance < 0 or item["phash"] is None:
+            return False
+
+        for other in prepared:
+            if other["phash"] is not None \
+                    and bin(item["phash"] ^ other["phash"]).count("1") <= self.phash_distance:
+                return True
+        return False
+
+    @staticmethod
+    def _difference_hash(picture) -> int:
+        """
+        Compute a 64-bit difference hash (dHash) of an image.
+
+        Args:
+            picture: Decoded PIL image
+
+        Returns:
+            Perceptual hash as integer
+        """
+        thumbnail = picture.convert("L").resize((9, 8), Image.BILINEAR)
+        pixels = np.asarray(thumbnail, dtype=np.int16)
+        bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+        return int("".join("1" if bit else "0" for bit in bits), 2)
+
+    @staticmethod
+    def _hash_file(image_file: BinaryIO, chunk_size: int = 1024 * 1024) -> str:
+        """
+        Calculate the SHA-256 of a file handle in chunks.
+
+        Args:
+            image_file: Binary file handle
+            chunk_size: Bytes read per chunk
+
+        Returns:
+            Hex digest of the hash
+        """
+        digest = hashlib.sha256()
+        image_file.seek(0)
+        for chunk in iter(lambda: image_file.read(chunk_size), b""):
+            digest.update(chunk)
+        image_file.seek(0)
+        return digest.hexdigest()
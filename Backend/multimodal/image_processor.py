@@ -2,70 +2,145 @@
 Image processor module for handling image data.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Union, BinaryIO
+import asyncio
 import logging
 import base64
 
+from helpers import as_binary_file, get_file_size
+from multimodal.image_preprocessor import ImagePreprocessor
+
 logger = logging.getLogger(__name__)
 
 class ImageProcessor:
     """
     Processes image data to extract features and descriptions.
+    
+    Images are downscaled and re-encoded by an ImagePreprocessor before they
+    are sent to the Groq vision model, so the request payload and the
+    model's input stay small.
     """
     
-    def __init__(self):
-        """Initialize the image processor."""
-        pass
+    def __init__(self, preprocessor: Optional[ImagePreprocessor] = None, groq_client=None):
+        """
+        Initialize the image processor.
+        
+        Args:
+            preprocessor: Optional preprocessor, a default one is used if omitted
+            groq_client: Optional GroqClient used to describe the images; without
+                one a placeholder description is returned
+        """
+        self.preprocessor = preprocessor or ImagePreprocessor()
+        self.groq_client = groq_client
         
-    async def process(self, image_data: bytes) -> Dict[str, Any]:
+    async def process(self, image: Union[bytes, BinaryIO]) -> Dict[str, Any]:
         """
         Process an image to extract features and generate a description.
         
         Args:
-            image_data: Raw image data in bytes
+            image: Raw image data in bytes or a binary file handle
+            
+        Returns:
+            Dictionary containing image features and description
+        """
+        image_file = as_binary_file(image)
+        size = get_file_size(image_file)
+        
+        try:
+            # Decoding and re-encoding are CPU bound, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            prepared = await loop.run_in_executor(None, self.preprocessor.prepare, image_file)
+        except Exception as e:
+            logger.error(f"Error preparing image: {str(e)}")
+            return self._failed_result(size, e)
+            
+        return await self._process_prepared(prepared)
+        
+    async def process_batch(self, images: List[Union[bytes, BinaryIO]]) -> List[Dict[str, Any]]:
+        """
+        Process all images of one request, skipping duplicates.
+        
+        Args:
+            images: Raw image data or binary file handles
+            
+        Returns:
+            List of image results for the distinct images, in input order
+        """
+        loop = asyncio.get_running_loop()
+        prepared = await loop.run_in_executor(None, self.preprocessor.prepare_batch, images)
+        
+        dropped = len(images) - len(prepared)
+        if dropped:
+            logger.info(f"Skipped {dropped} duplicate or unreadable image(s)")
+            
+        return list(await asyncio.gather(*(self._process_prepared(item) for item in prepared)))
+        
+    async def _process_prepared(self, prepared: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Analyse an image that has been through the preprocessor.
+        
+        Args:
+            prepared: Output of ImagePreprocessor.prepare
             
         Returns:
             Dictionary containing image features and description
         """
         try:
             # Convert image to base64 for API requests
-            base64_image = base64.b64encode(image_data).decode('utf-8')
+            base64_image = base64.b64encode(prepared["data"]).decode('utf-8')
             
-            # Get image features from Groq API (will be implemented in groq_client.py)
-            # This is a placeholder - the actual implementation will depend on the Groq API
-            features, description, objects = await self._get_image_features_from_groq(base64_image)
+            features, description, objects = await self._get_image_features_from_groq(
+                base64_image, prepared["mime_type"]
+            )
             
             return {
                 "features": features,
                 "description": description,
                 "objects": objects,
-                "size": len(image_data),
+                "size": prepared["size"],
+                "original_size": prepared["original_size"],
+                "mime_type": prepared["mime_type"],
                 "base64": base64_image
             }
             
         except Exception as e:
             logger.error(f"Error processing image: {str(e)}")
-            return {
-                "features": [],
-                "description": "Failed to process image",
-                "objects": "",
-                "size": len(image_data) if image_data else 0,
-                "error": str(e)
-            }
+            return self._failed_result(prepared["original_size"], e)
+            
+    def _failed_result(self, size: int, error: Exception) -> Dict[str, Any]:
+        """
+        Build the result returned for an image that could not be processed.
+        
+        Args:
+            size: Size of the uploaded image in bytes
+            error: Error that occurred
+            
+        Returns:
+            Dictionary describing the failure
+        """
+        return {
+            "features": [],
+            "description": "Failed to process image",
+            "objects": "",
+            "size": size,
+            "error": str(error)
+        }
     
-    async def _get_image_features_from_groq(self, base64_image: str) -> tuple:
+    async def _get_image_features_from_groq(self, base64_image: str, mime_type: str) -> tuple:
         """
         Get image features from Groq API.
         
         Args:
             base64_image: Base64 encoded image
+            mime_type: MIME type of the encoded image
             
         Returns:
             Tuple of (features, description, objects)
         """
-        # This is a placeholder - actual implementation will use the Groq API
-        # This would be implemented in groq_client.py and called from here
-        
+        if self.groq_client is not None:
+            analysis = await self.groq_client.process_image(base64_image, mime_type=mime_type)
+            return [], analysis["description"], analysis["objects"]
+            
         # Placeholder return
         return (
             [0.1, 0.2, 0.3],  # Vector representation
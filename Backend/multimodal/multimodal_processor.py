@@ -0,0 +1,234 @@
+"""
+Multimodal processor combining the text, image and video processors.
+"""
+
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, List, Optional, Union
+import asyncio
+import logging
+import time
+
+from multimodal.text_processor import TextProcessor
+from multimodal.image_processor import ImageProcessor
+from multimodal.image_preprocessor import ImagePreprocessor
+from multimodal.video_processor import VideoProcessor
+from metrics import MODALITY_LATENCY
+
+logger = logging.getLogger(__name__)
+
+class MultimodalProcessor:
+    """
+    Runs the processors of all modalities in a request concurrently.
+
+    Each modality has its own timeout. A modality that fails or times out is
+    reported in `modalities`/`errors` and left out of the combined
+    representation, so one slow or broken input does not fail the request
+    and the request takes as long as its slowest modality rather than the
+    sum of all of them.
+    """
+
+    def __init__(self, text_processor: Optional[TextProcessor] = None,
+                 image_processor: Optional[ImageProcessor] = None,
+                 video_processor: Optional[VideoProcessor] = None,
+                 text_timeout: Optional[float] = 20.0,
+                 image_timeout: Optional[float] = 30.0,
+                 video_timeout: Optional[float] = 120.0):
+        """
+        Initialize the multimodal processor.
+
+        Args:
+            text_processor: Optional text processor, a default one is used if omitted
+            image_processor: Optional image processor, a default one is used if omitted
+            video_processor: Optional video processor, a default one is used if omitted
+            text_timeout: Seconds allowed for text processing; None waits indefinitely
+            image_timeout: Seconds allowed for processing all images of a request
+            video_timeout: Seconds allowed for video processing
+        """
+        self.text_processor = text_processor or TextProcessor()
+        self.image_processor = image_processor or ImageProcessor()
+        self.video_processor = video_processor or VideoProcessor()
+        self.timeouts = {
+            "text": text_timeout,
+            "images": image_timeout,
+            "video": video_timeout
+        }
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], groq_client=None) -> "MultimodalProcessor":
+        """
+        Create a multimodal processor from the "multimodal" section of the
+        application config.
+
+        Args:
+            config: Multimodal configuration dictionary
+            groq_client: Optional shared GroqClient for LLM text analysis and
+                image and video key frame descriptions
+
+        Returns:
+            Configured MultimodalProcessor instance
+        """
+        preprocessor = ImagePreprocessor(
+            max_side=config.get("image_max_side", 1024),
+            output_format=config.get("image_output_format", "JPEG"),
+            quality=config.get("image_quality", 85),
+            phash_distance=config.get("image_phash_distance", 4)
+        )
+        video_processor = VideoProcessor(
+            frame_concurrency=config.get("frame_concurrency", 4),
+            frame_timeout=config.get("frame_timeout", 30.0),
+            max_key_frames=config.get("video_max_key_frames", 12),
+            groq_client=groq_client
+        )
+        return cls(
+            text_processor=TextProcessor(
+                groq_client=groq_client,
+                llm_analysis=config.get("text_llm_analysis", False)
+            ),
+            image_processor=ImageProcessor(preprocessor=preprocessor, groq_client=groq_client),
+            video_processor=video_processor,
+            text_timeout=config.get("text_timeout", 20.0),
+            image_timeout=config.get("image_timeout", 30.0),
+            video_timeout=config.get("video_timeout", 120.0)
+        )
+
+    async def process(self, text: Optional[str] = None,
+                      images: Optional[List[Union[bytes, BinaryIO]]] = None,
+                      video: Optional[Union[bytes, BinaryIO]] = None,
+                      on_token: Optional[Callable[[str, str], None]] = None,
+                      progress: Optional[Callable[[str, float], None]] = None) -> Dict[str, Any]:
+        """
+        Process all inputs of a request concurrently.
+
+        Args:
+            text: Optional text input
+            images: Optional list of image data or file handles
+            video: Optional video data or file handle
+            on_token: Optional callback receiving (modality, token) as the text
+                and video summaries are generated
+            progress: Optional callback receiving (stage, fraction of modalities done)
+
+        Returns:
+            Dictionary with the raw text, the per-modality results, the status,
+            error and duration of each modality, and the combined representation
+        """
+        def tokens_of(modality: str) -> Optional[Callable[[str], None]]:
+            # Text and video stream concurrently, so each token carries its modality
+            if on_token is None:
+                return None
+            return lambda token: on_token(modality, token)
+
+        jobs: Dict[str, Awaitable[Any]] = {}
+        if text:
+            jobs["text"] = self.text_processor.process(text, on_token=tokens_of("text"))
+        if images:
+            jobs["images"] = self.image_processor.process_batch(images)
+        if video is not None:
+            jobs["video"] = self.video_processor.process(video, on_token=tokens_of("video"))
+
+        finished = 0
+
+        async def run(modality: str, job: Awaitable[Any]) -> Dict[str, Any]:
+            nonlocal finished
+            outcome = await self._run_modality(modality, job)
+            finished += 1
+            if progress is not None:
+                progress(f"{modality}_{outcome['status']}", finished / len(jobs))
+            return outcome
+
+        outcomes = await asyncio.gather(*(run(modality, job) for modality, job in jobs.items()))
+        outcomes = dict(zip(jobs, outcomes))
+
+        result: Dict[str, Any] = {
+            "text": text or "",
+            "text_analysis": None,
+            "images": [],
+            "video": None,
+            "modalities": {},
+            "errors": {},
+            "timings": {}
+        }
+        for modality, outcome in outcomes.items():
+            result["modalities"][modality] = outcome["status"]
+            result["timings"][modality] = outcome["duration"]
+            if outcome["error"]:
+                result["errors"][modality] = outcome["error"]
+
+        if outcomes.get("text", {}).get("result") is not None:
+            result["text_analysis"] = outcomes["text"]["result"]
+        if outcomes.get("images", {}).get("result") is not None:
+            result["images"] = outcomes["images"]["result"]
+        if outcomes.get("video", {}).get("result") is not None:
+            result["video"] = outcomes["video"]["result"]
+
+        result["combined_representation"] = self._combine(result)
+        if not result["combined_representation"]:
+            raise ValueError(f"No input could be processed: {result['errors'] or 'empty request'}")
+
+        return result
+
+    async def _run_modality(self, modality: str, job: Awaitable[Any]) -> Dict[str, Any]:
+        """
+        Run one modality with its timeout, capturing failures.
+
+        Args:
+            modality: "text", "images" or "video"
+            job: Processor coroutine
+
+        Returns:
+            Dictionary with the result (None on failure), status, error and
+            duration in seconds
+        """
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = await asyncio.wait_for(job, self.timeouts[modality])
+            status = "ok"
+            # The processors report their own failures in the result
+            if isinstance(result, dict) and result.get("error"):
+                status = "failed"
+                error = result["error"]
+        except asyncio.TimeoutError:
+            status = "timeout"
+            error = f"{modality} processing timed out after {self.timeouts[modality]}s"
+        except Exception as e:
+            status = "failed"
+            error = str(e)
+
+        MODALITY_LATENCY.observe(time.perf_counter() - start, modality=modality, status=status)
+        duration = round(time.perf_counter() - start, 3)
+        if error:
+            logger.warning(f"Modality {modality} {status} after {duration}s: {error}")
+        return {"result": result, "status": status, "error": error, "duration": duration}
+
+    @staticmethod
+    def _combine(result: Dict[str, Any]) -> str:
+        """
+        Build the text used for embedding from the modalities that finished.
+
+        The text summary is left out: the raw text is already included, and
+        an LLM summary would make the embedding (and so the embedding cache
+        and classification) depend on non-deterministic output.
+
+        Args:
+            result: Partially assembled processing result
+
+        Returns:
+            Combined text representation
+        """
+        parts = []
+        if result["text"]:
+            parts.append(result["text"])
+
+        for image in result["images"]:
+            if not image.get("error"):
+                parts.append(f"Image: {image['description']}")
+                if image.get("objects"):
+                    parts.append(f"Objects: {image['objects']}")
+
+        video = result["video"]
+        if video and not video.get("error"):
+            parts.append(f"Video: {video.get('summary') or video.get('description')}")
+            for frame in video.get("frame_descriptions", []):
+                parts.append(f"Frame: {frame['description']}")
+
+        return "\n".join(parts)
@@ -2,7 +2,7 @@
 Text processor module for handling text data.
 """
 
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,16 +12,26 @@ class TextProcessor:
     Processes text data to extract features and generate summaries.
     """
     
-    def __init__(self):
-        """Initialize the text processor."""
-        pass
+    def __init__(self, groq_client=None, llm_analysis: bool = False):
+        """
+        Initialize the text processor.
+        
+        Args:
+            groq_client: Optional GroqClient used to summarise the text with an LLM
+            llm_analysis: Summarise every text with the LLM; otherwise the LLM
+                is only called when a caller streams its tokens
+        """
+        self.groq_client = groq_client
+        self.llm_analysis = llm_analysis
         
-    async def process(self, text: str) -> Dict[str, Any]:
+    async def process(self, text: str,
+                      on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Process text to extract features and generate a summary.
         
         Args:
             text: Input text to process
+            on_token: Optional callback receiving summary tokens as they are generated
             
         Returns:
             Dictionary containing text features and summary
@@ -31,7 +41,11 @@ class TextProcessor:
             entities = self._extract_entities(text)
             
             # Generate a summary of the text
-            summary = self._generate_summary(text)
+            if self.groq_client is not None and (self.llm_analysis or on_token is not None):
+                analysis = await self.groq_client.process_text(text, on_token=on_token)
+                summary = analysis.get("summary") or self._generate_summary(text)
+            else:
+                summary = self._generate_summary(text)
             
             # Generate features (will be implemented via Groq API in actual code)
             features = await self._get_text_features_from_groq(text)
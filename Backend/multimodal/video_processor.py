@@ -2,68 +2,122 @@
 Video processor module for handling video data.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Callable, List, Optional, Tuple, Union, BinaryIO
+import asyncio
+import heapq
+import io
 import logging
-import base64
-import tempfile
-import os
+import math
+
+try:
+    import av
+    import numpy as np
+except ImportError:  # pragma: no cover - optional video dependencies
+    av = None
+    np = None
+
+from helpers import gather_bounded, as_binary_file, get_file_size
 
 logger = logging.getLogger(__name__)
 
 class VideoProcessor:
     """
     Processes video data to extract features, frames, and descriptions.
+
+    Videos are decoded once as a stream with PyAV straight from the uploaded
+    file handle. Key frames are chosen by scene-change scoring on small
+    grayscale thumbnails, so only frames that add new visual content are
+    analysed; the best-scoring frames are kept as candidates while decoding.
+    With a Groq client the key frames are described concurrently by the
+    vision model and summarised; without one placeholders are returned.
     """
-    
-    def __init__(self):
-        """Initialize the video processor."""
-        pass
-        
-    async def process(self, video_data: bytes) -> Dict[str, Any]:
+
+    # Decoded candidate frames kept per allowed key frame; spares are needed
+    # because frames too close to a chosen one are skipped
+    KEY_FRAME_CANDIDATES = 4
+
+    def __init__(self, frame_concurrency: int = 4, frame_timeout: Optional[float] = 30.0,
+                 sample_fps: float = 2.0, max_samples: int = 1200,
+                 seconds_per_key_frame: float = 5.0, max_key_frames: int = 12,
+                 scene_threshold: float = 0.3, key_frame_max_side: int = 768,
+                 groq_client=None):
+        """
+        Initialize the video processor.
+
+        Args:
+            frame_concurrency: Maximum number of key frames processed at once
+            frame_timeout: Seconds allowed for processing a single key frame
+            sample_fps: Rate at which decoded frames are scored for scene changes
+            max_samples: Upper bound on scored frames, lowers the rate for long videos
+            seconds_per_key_frame: Video seconds per allowed key frame
+            max_key_frames: Hard cap on key frames per video
+            scene_threshold: Minimum scene-change score (0-1) for a new key frame
+            key_frame_max_side: Longest side in pixels of the encoded key frames
+            groq_client: Optional GroqClient used to describe the key frames,
+                which bounds their concurrency with its own frame settings
+        """
+        self.frame_concurrency = frame_concurrency
+        self.frame_timeout = frame_timeout
+        self.sample_fps = sample_fps
+        self.max_samples = max_samples
+        self.seconds_per_key_frame = seconds_per_key_frame
+        self.max_key_frames = max_key_frames
+        self.scene_threshold = scene_threshold
+        self.key_frame_max_side = key_frame_max_side
+        self.groq_client = groq_client
+
+    async def process(self, video: Union[bytes, BinaryIO],
+                      on_token: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
         Process video to extract features and generate a description.
-        
+
         Args:
-            video_data: Raw video data in bytes
-            
+            video: Raw video data in bytes or a binary file handle
+            on_token: Optional callback receiving summary tokens as they are generated
+
         Returns:
             Dictionary containing video features and description
         """
+        video_file = as_binary_file(video)
+        size = get_file_size(video_file)
+
         try:
-            # Save video to temporary file for processing
-            with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_file:
-                temp_file.write(video_data)
-                temp_path = temp_file.name
-            
-            try:
-                # Extract video metadata and key frames
-                metadata = self._extract_metadata(temp_path)
-                key_frames = self._extract_key_frames(temp_path)
-                
-                # Process key frames to get descriptions
-                frame_descriptions = []
-                for frame in key_frames:
-                    frame_description = await self._process_frame(frame)
-                    frame_descriptions.append(frame_description)
-                
+            # Decoding is CPU bound, keep it off the event loop
+            loop = asyncio.get_running_loop()
+            metadata, key_frames, key_frame_times = await loop.run_in_executor(
+                None, self._extract_video, video_file
+            )
+
+            if self.groq_client is not None and key_frames:
+                # The client describes the key frames concurrently (bounded,
+                # dropping frames that fail or time out) and summarises them
+                analysis = await self.groq_client.process_video(
+                    str(getattr(video_file, "name", "") or ""), key_frames, on_token=on_token
+                )
+                frame_descriptions = analysis["frame_descriptions"]
+                features, description, summary = [], analysis["description"], analysis["summary"]
+            else:
+                # Process key frames concurrently, keeping frame order and
+                # dropping frames that fail or time out
+                frame_results = await gather_bounded(
+                    self._process_frame, key_frames, self.frame_concurrency, self.frame_timeout
+                )
+                frame_descriptions = [result for result in frame_results if result is not None]
+
                 # Get video features from Groq API (placeholder)
-                features, description, summary = await self._get_video_features_from_groq(temp_path)
-                
-                return {
-                    "features": features,
-                    "description": description,
-                    "summary": summary,
-                    "metadata": metadata,
-                    "frame_descriptions": frame_descriptions,
-                    "duration": metadata.get("duration", 0),
-                    "size": len(video_data)
-                }
-                
-            finally:
-                # Clean up temporary file
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                    
+                features, description, summary = await self._get_video_features_from_groq(metadata)
+
+            return {
+                "features": features,
+                "description": description,
+                "summary": summary,
+                "metadata": metadata,
+                "frame_descriptions": frame_descriptions,
+                "key_frame_times": key_frame_times,
+                "duration": metadata.get("duration", 0),
+                "size": size
+            }
+
         except Exception as e:
             logger.error(f"Error processing video: {str(e)}")
             return {
@@ -72,51 +126,232 @@ class VideoProcessor:
                 "summary": "",
                 "metadata": {},
                 "frame_descriptions": [],
+                "key_frame_times": [],
                 "duration": 0,
-                "size": len(video_data) if video_data else 0,
+                "size": size,
                 "error": str(e)
             }
-    
-    def _extract_metadata(self, video_path: str) -> Dict[str, Any]:
+
+    def _extract_video(self, video_file: BinaryIO) -> Tuple[Dict[str, Any], List[bytes], List[float]]:
         """
-        Extract metadata from video file.
-        
+        Read metadata and key frames from a video file handle.
+
+        A single decoding pass scores the sampled frames and keeps the best
+        candidates; only the selected ones are encoded as JPEG.
+
         Args:
-            video_path: Path to video file
-            
+            video_file: Binary file handle of the video
+
+        Returns:
+            Tuple of (metadata, key frame JPEG bytes, key frame timestamps)
+        """
+        if av is None or np is None:
+            raise RuntimeError("Video processing requires the 'av' and 'numpy' packages")
+
+        with av.open(video_file, mode="r") as container:
+            stream = container.streams.video[0]
+            stream.thread_type = "AUTO"
+            metadata = self._extract_metadata(container, stream)
+            frame_times, scores, candidates = self._sample_frames(container, stream, metadata)
+
+        if not frame_times:
+            return metadata, [], []
+
+        # Only frames kept as candidates while decoding can be chosen
+        pooled = np.full_like(scores, -1.0)
+        pooled[list(candidates)] = scores[list(candidates)]
+        selected = self._select_key_frames(pooled, frame_times, metadata["duration"])
+
+        key_frames = [self._encode_key_frame(candidates[i]) for i in selected]
+        return metadata, key_frames, [round(frame_times[i], 3) for i in selected]
+
+    def _extract_metadata(self, container, stream) -> Dict[str, Any]:
+        """
+        Extract metadata from the video container.
+
+        Args:
+            container: Open PyAV container
+            stream: Video stream of the container
+
         Returns:
             Dictionary of video metadata
         """
-        # Placeholder implementation - in a real system this would use a library like FFmpeg
+        if container.duration:
+            duration = container.duration / av.time_base
+        elif stream.duration and stream.time_base:
+            duration = float(stream.duration * stream.time_base)
+        else:
+            duration = 0.0
+
+        fps = float(stream.average_rate) if stream.average_rate else 0.0
+
         return {
-            "duration": 30,  # Placeholder 30 seconds
-            "width": 1280,   # Placeholder width
-            "height": 720,   # Placeholder height
-            "fps": 30,       # Placeholder FPS
-            "codec": "h264"  # Placeholder codec
+            "duration": round(duration, 3),
+            "width": stream.codec_context.width,
+            "height": stream.codec_context.height,
+            "fps": round(fps, 3),
+            "codec": stream.codec_context.name,
+            "frame_count": stream.frames or int(duration * fps)
+        }
+
+    def _sample_frames(self, container, stream,
+                       metadata: Dict[str, Any]) -> Tuple[List[float], "np.ndarray", Dict[int, Any]]:
+        """
+        Decode the stream once, scoring frames at the sampling rate.
+
+        Each sampled frame is scored against the previous one on downscaled
+        grayscale thumbnails. The best-scoring frames that pass the scene
+        threshold are kept as downscaled images, up to KEY_FRAME_CANDIDATES
+        per allowed key frame; the others are dropped as decoding goes on.
+
+        Args:
+            container: Open PyAV container
+            stream: Video stream of the container
+            metadata: Video metadata
+
+        Returns:
+            Tuple of (timestamps in seconds, scene-change scores, candidate
+            images by sample index)
+        """
+        sample_fps = self.sample_fps
+        if metadata["duration"] > 0:
+            sample_fps = min(sample_fps, self.max_samples / metadata["duration"])
+        interval = 1.0 / sample_fps
+        max_candidates = self._max_key_frames(metadata["duration"]) * self.KEY_FRAME_CANDIDATES
+
+        frame_times, scores = [], []
+        # Min-heap of (score, -sample index, sample index, image); ties keep the earlier frame
+        candidates: List[Tuple[float, int, int, Any]] = []
+        previous = None
+        next_time = 0.0
+
+        for index, frame in enumerate(container.decode(stream)):
+            frame_time = frame.time if frame.time is not None else index / (metadata["fps"] or 30.0)
+            if frame_time + 1e-6 < next_time:
+                continue
+            next_time = frame_time + interval
+
+            thumbnail = frame.reformat(width=64, height=36, format="gray").to_ndarray()[:36, :64]
+            score = 1.0 if previous is None else float(
+                self._score_scene_changes(np.stack([previous, thumbnail]))[1]
+            )
+            previous = thumbnail
+            sample = len(frame_times)
+            frame_times.append(frame_time)
+            scores.append(score)
+
+            if score >= self.scene_threshold and (
+                    len(candidates) < max_candidates or (score, -sample) > candidates[0][:2]):
+                image = frame.to_image()
+                image.thumbnail((self.key_frame_max_side, self.key_frame_max_side))
+                entry = (score, -sample, sample, image)
+                if len(candidates) < max_candidates:
+                    heapq.heappush(candidates, entry)
+                else:
+                    heapq.heapreplace(candidates, entry)
+
+            if len(frame_times) >= self.max_samples:
+                break
+
+        return frame_times, np.asarray(scores, dtype=np.float32), {
+            sample: image for _, _, sample, image in candidates
         }
-    
-    def _extract_key_frames(self, video_path: str) -> list:
+
+    def _score_scene_changes(self, thumbnails: "np.ndarray") -> "np.ndarray":
         """
-        Extract key frames from video.
-        
+        Score how much each sampled frame differs from the previous one.
+
+        The score averages the mean absolute pixel difference and the total
+        variation distance between 32-bin luma histograms, both in [0, 1].
+        The first frame always scores 1.
+
         Args:
-            video_path: Path to video file
-            
+            thumbnails: Array of shape (frames, height, width) with uint8 luma
+
         Returns:
-            List of key frame data
+            Array of scene-change scores, one per frame
         """
-        # Placeholder implementation - in a real system this would extract actual frames
-        # Return placeholder empty frames
-        return [b"frame1_data", b"frame2_data", b"frame3_data"]
-        
+        count = thumbnails.shape[0]
+        flat = thumbnails.reshape(count, -1)
+
+        pixel_diff = np.abs(np.diff(flat.astype(np.float32), axis=0)).mean(axis=1) / 255.0
+
+        bins = (flat >> 3).astype(np.int64) + (np.arange(count, dtype=np.int64) * 32)[:, None]
+        histograms = np.bincount(bins.ravel(), minlength=count * 32).reshape(count, 32)
+        histograms = histograms / float(flat.shape[1])
+        histogram_diff = 0.5 * np.abs(np.diff(histograms, axis=0)).sum(axis=1)
+
+        scores = np.ones(count, dtype=np.float32)
+        scores[1:] = 0.5 * (pixel_diff + histogram_diff)
+        return scores
+
+    def _select_key_frames(self, scores: "np.ndarray", frame_times: List[float],
+                           duration: float) -> List[int]:
+        """
+        Pick the fewest frames that still represent the video.
+
+        Frames are taken in order of decreasing scene-change score if they
+        pass the threshold and are not too close to an already chosen frame.
+        The number of frames is capped by the video duration.
+
+        Args:
+            scores: Scene-change score per sampled frame
+            frame_times: Timestamp per sampled frame
+            duration: Video duration in seconds
+
+        Returns:
+            Indices into the sampled frames, in time order
+        """
+        max_frames = self._max_key_frames(duration)
+        min_spacing = min(1.0, duration / (2 * max_frames)) if duration else 0.0
+
+        candidates = np.flatnonzero(scores >= self.scene_threshold)
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+        selected: List[int] = []
+        for index in candidates:
+            if len(selected) >= max_frames:
+                break
+            if all(abs(frame_times[index] - frame_times[other]) >= min_spacing for other in selected):
+                selected.append(int(index))
+
+        return sorted(selected)
+
+    def _max_key_frames(self, duration: float) -> int:
+        """
+        Number of key frames allowed for a video.
+
+        Args:
+            duration: Video duration in seconds
+
+        Returns:
+            Key frame budget, at least 1
+        """
+        return max(1, min(self.max_key_frames,
+                          math.ceil(duration / self.seconds_per_key_frame) if duration else 1))
+
+    @staticmethod
+    def _encode_key_frame(image) -> bytes:
+        """
+        Encode a key frame image as JPEG.
+
+        Args:
+            image: Downscaled PIL image of the frame
+
+        Returns:
+            JPEG bytes
+        """
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=85)
+        return buffer.getvalue()
+
     async def _process_frame(self, frame_data: bytes) -> Dict[str, Any]:
         """
         Process a single video frame.
-        
+
         Args:
             frame_data: Raw frame data
-            
+
         Returns:
             Dictionary of frame features
         """
@@ -125,23 +360,23 @@ class VideoProcessor:
             "description": "A frame from the video",
             "objects": "object1, object2"
         }
-        
-    async def _get_video_features_from_groq(self, video_path: str) -> tuple:
+
+    async def _get_video_features_from_groq(self, metadata: Dict[str, Any]) -> tuple:
         """
         Get video features from Groq API.
-        
+
         Args:
-            video_path: Path to video file
-            
+            metadata: Video metadata
+
         Returns:
             Tuple of (features, description, summary)
         """
         # This is a placeholder - actual implementation will use the Groq API
         # This would be implemented in groq_client.py and called from here
-        
+
         # Placeholder return
         return (
             [0.1, 0.2, 0.3],  # Vector representation
             "A video of something",  # Description
             "This video shows various scenes of activity"  # Summary
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.circuit_breaker import CircuitBreaker
+
+
+def open_breaker(**kwargs):
+    breaker = CircuitBreaker(window_size=4, minimum_calls=4, half_open_calls=2, **kwargs)
+    for _ in range(2):
+        breaker.record_success(0.1)
+    for _ in range(2):
+        breaker.record_failure()
+    return breaker
+
+
+def test_failures_open_the_circuit():
+    breaker = CircuitBreaker(window_size=4, minimum_calls=4)
+
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 1
+    assert not breaker.allow_request()
+
+
+def test_slow_calls_open_the_circuit():
+    breaker = CircuitBreaker(slow_call_seconds=1.0, slow_call_rate_threshold=0.5,
+                             window_size=4, minimum_calls=4)
+
+    for duration in (0.1, 0.1, 2.0, 2.0):
+        breaker.record_success(duration)
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_successful_trials_close_the_circuit():
+    breaker = open_breaker(open_seconds=0.05)
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    # Only half_open_calls trials are let through
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    breaker.record_success(0.1)
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+    assert breaker.stats()["calls_in_window"] == 0
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = open_breaker(open_seconds=0.05)
+    time.sleep(0.06)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.times_opened == 2
+    assert not breaker.allow_request()
@@ -0,0 +1,81 @@
+import asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from api.rate_limit import AdaptiveConcurrencyLimiter, RetryPolicy, parse_retry_after
+
+
+def test_limit_growth_wakes_waiting_requests():
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, increase_every=1)
+        release = asyncio.Event()
+        entered = []
+
+        async def hold(name):
+            async with limiter.slot():
+                entered.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(hold("first"))
+        await asyncio.sleep(0.01)
+        second = asyncio.create_task(hold("second"))
+        await asyncio.sleep(0.01)
+        waiting = list(entered)
+
+        # The first request still holds its slot; only the new one can admit the second
+        await limiter.on_success()
+        await asyncio.sleep(0.01)
+        admitted = list(entered)
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(first, second), 1.0)
+        return waiting, admitted, limiter.limit
+
+    waiting, admitted, limit = asyncio.run(scenario())
+    assert waiting == ["first"]
+    assert admitted == ["first", "second"]
+    assert limit == 2
+
+
+def test_overload_decreases_limit_once_per_cooldown():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=16, decrease_cooldown=60.0)
+
+    limiter.on_overload()
+    limiter.on_overload()
+
+    assert limiter.limit == 8
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("5", 5.0),
+    ("0.5", 0.5),
+    ("-3", 0.0),
+    (None, None),
+    ("", None),
+    ("soon", None),
+])
+def test_parse_retry_after_seconds(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+
+    delay = parse_retry_after(format_datetime(retry_at, usegmt=True))
+
+    assert 28.0 <= delay <= 30.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+
+def test_retry_delay_is_never_shorter_than_retry_after():
+    policy = RetryPolicy(base_delay=0.5)
+
+    delays = [policy.delay(attempt, retry_after=2.0) for attempt in range(20)]
+
+    assert all(2.0 <= delay <= 2.5 for delay in delays)
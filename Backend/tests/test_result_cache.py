@@ -0,0 +1,78 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from Instructor.result_cache import ResultCache
+
+
+def test_concurrent_callers_share_one_computation():
+    async def scenario():
+        cache = ResultCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"message": "done"}, set(), None
+
+        results = await asyncio.gather(*(cache.get_or_compute("key", compute) for _ in range(3)))
+        return calls, results, cache.shared
+
+    calls, results, shared = asyncio.run(scenario())
+    assert calls == 1
+    assert shared == 2
+    assert all(result == {"message": "done"} for result in results)
+
+
+def test_follower_takes_over_when_leader_is_cancelled():
+    async def scenario():
+        cache = ResultCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"message": f"run {calls}"}, set(), None
+
+        leader = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, calls
+
+    result, calls = asyncio.run(scenario())
+    assert result == {"message": "run 2"}
+    assert calls == 2
+
+
+def test_response_computed_across_a_task_write_is_not_stored():
+    async def scenario():
+        cache = ResultCache()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return {"message": f"run {calls}"}, set(), None
+
+        first = asyncio.create_task(cache.get_or_compute("key", compute))
+        await asyncio.sleep(0.01)
+        cache.on_task_changed("created", "task-1", [1.0, 0.0])
+        stale = await first
+        return stale, await cache.get_or_compute("key", compute), calls
+
+    stale, fresh, calls = asyncio.run(scenario())
+    assert stale == {"message": "run 1"}
+    assert fresh == {"message": "run 2"}
+    assert calls == 2